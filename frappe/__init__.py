@@ -413,6 +413,8 @@ def setup_redis_cache_connection():
 		from frappe.utils.redis_wrapper import RedisWrapper
 
 		cache = RedisWrapper.from_url(conf.get("redis_cache"))
+		if conf.get("redis_client_cache_size"):
+			cache.enable_client_cache(conf.redis_client_cache_size)
 
 
 def get_traceback(with_context: bool = False) -> str:
@@ -947,6 +949,8 @@ def clear_cache(user: str | None = None, doctype: str | None = None):
 		for fn in get_hooks("clear_cache"):
 			get_attr(fn)()
 
+		frappe.utils.caching.invalidate_site_cache()
+
 	frappe.utils.caching._SITE_CACHE.clear()
 	local.role_permissions = {}
 	if hasattr(local, "request_cache"):
@@ -1022,6 +1026,21 @@ def has_permission(
 	return out
 
 
+def has_permission_many(doctype, docs, ptype="read", user=None) -> set[str]:
+	"""
+	Returns a set of names of documents for which the user has permission `ptype`.
+	Faster than calling `has_permission` for each document.
+
+	:param doctype: DocType of the documents.
+	:param docs: List of document names or document objects.
+	:param ptype: Permission type (`read`, `write`, `print`, ...). Default: `read`.
+	:param user: [optional] Check for given user. Default: current user.
+	"""
+	import frappe.permissions
+
+	return frappe.permissions.has_permission_many(doctype, docs, ptype=ptype, user=user)
+
+
 def has_website_permission(doc=None, ptype="read", user=None, verbose=False, doctype=None):
 	"""Raises `frappe.PermissionError` if not permitted.
 
@@ -1146,7 +1165,7 @@ def get_cached_doc(*args, **kwargs) -> "Document":
 
 
 def _set_document_in_cache(key: str, doc: "Document") -> None:
-	cache.set_value(key, doc)
+	cache.set_value(key, doc, tags=get_document_cache_tags(doc.doctype))
 
 
 def can_cache_doc(args) -> str | None:
@@ -1170,12 +1189,16 @@ def get_document_cache_key(doctype: str, name: str):
 	return f"document_cache::{doctype}::{name}"
 
 
+def get_document_cache_tags(doctype: str) -> tuple[str, str]:
+	return ("document_cache::", get_document_cache_key(doctype, ""))
+
+
 def clear_document_cache(doctype: str, name: str | None = None) -> None:
 	def clear_in_redis():
 		if name is not None:
-			cache.delete_value(get_document_cache_key(doctype, name))
+			cache.delete_value(get_document_cache_key(doctype, name), tags=get_document_cache_tags(doctype))
 		else:
-			cache.delete_keys(get_document_cache_key(doctype, ""))
+			cache.delete_tags(get_document_cache_key(doctype, ""))
 
 	clear_in_redis()
 	if hasattr(db, "after_commit"):
@@ -2208,6 +2231,8 @@ def enqueue(*args, **kwargs):
 	:param event: this is passed to enable clearing of jobs from queues
 	:param is_async: (optional) if is_async=False, the method is executed immediately, else via a worker
 	:param job_name: (optional) can be used to name an enqueue call, which can be used to prevent duplicate calls
+	:param priority: (optional) urgent, high, normal or low, decides how soon the job should start
+	:param deadline: (optional) seconds within which the job should start, instead of the priority's
 	:param kwargs: keyword arguments to be passed to the method
 	"""
 	import frappe.utils.background_jobs
@@ -2215,6 +2240,39 @@ def enqueue(*args, **kwargs):
 	return frappe.utils.background_jobs.enqueue(*args, **kwargs)
 
 
+def enqueue_many(*args, **kwargs):
+	"""
+	Enqueue a job for each set of keyword arguments, creating jobs in batches
+
+	:param method: method string or method object
+	:param kwargs_list: keyword arguments to be passed to the method, one dict per job
+	:param queue: (optional) should be either long, default or short
+	:param job_ids: (optional) unique job ids in the same order as `kwargs_list`
+	:param chunk_size: (optional) number of jobs enqueued per round trip to redis
+	:param enqueue_after_commit: (optional) enqueue after the current transaction is committed
+	"""
+	import frappe.utils.background_jobs
+
+	return frappe.utils.background_jobs.enqueue_many(*args, **kwargs)
+
+
+def parallel_map(*args, **kwargs):
+	"""
+	Process documents in chunks of names in parallel background jobs, with an optional reduce step
+
+	:param doctype: DocType of the documents
+	:param filters: filters of the documents to process
+	:param method: method string or method object, called as `method(doctype, names, **kwargs)`
+	:param chunk_size: (optional) number of documents per job
+	:param reduce: (optional) method called as `reduce(results, **kwargs)` once all chunks are done
+	:param queue: (optional) should be either long, default or short
+	:param kwargs: keyword arguments to be passed to the methods
+	"""
+	import frappe.utils.background_jobs
+
+	return frappe.utils.background_jobs.parallel_map(*args, **kwargs)
+
+
 def task(**task_kwargs):
 	def decorator_task(f):
 		f.enqueue = lambda **fun_kwargs: enqueue(f, **task_kwargs, **fun_kwargs)
@@ -4,6 +4,9 @@
 bootstrap client session
 """
 
+import hashlib
+from copy import deepcopy
+
 import frappe
 import frappe.defaults
 import frappe.desk.desk_page
@@ -26,10 +29,14 @@ from frappe.utils.change_log import get_versions
 from frappe.website.doctype.web_page_view.web_page_view import is_tracking_enabled
 
 
-def get_bootinfo():
-	"""build and return boot info"""
-	from frappe.translate import get_lang_dict, get_translated_doctypes
+def get_bootinfo(include_sections=True):
+	"""build and return boot info
 
+	Parts of bootinfo that don't depend on the session user are built per section (see
+	`BOOTINFO_SECTIONS`) and cached per site, language or role-set. Pass
+	`include_sections=False` to leave them out and get only their hashes in `section_hashes`,
+	they can then be added with `add_bootinfo_sections`.
+	"""
 	frappe.set_user_lang(frappe.session.user)
 	bootinfo = frappe._dict()
 	hooks = frappe.get_hooks()
@@ -50,27 +57,13 @@ def get_bootinfo():
 	bootinfo.modules = {}
 	bootinfo.module_list = []
 	load_desktop_data(bootinfo)
-	bootinfo.letter_heads = get_letter_heads()
-	bootinfo.active_domains = frappe.get_active_domains()
-	bootinfo.all_domains = [d.get("name") for d in frappe.get_all("Domain")]
-	add_layouts(bootinfo)
-
-	bootinfo.module_app = frappe.local.module_app
-	bootinfo.single_types = [d.name for d in frappe.get_all("DocType", {"issingle": 1})]
-	bootinfo.nested_set_doctypes = [
-		d.parent for d in frappe.get_all("DocField", {"fieldname": "lft"}, ["parent"])
-	]
 	add_home_page(bootinfo, doclist)
-	bootinfo.page_info = get_allowed_pages()
-	load_translations(bootinfo)
+	bootinfo.lang = frappe.lang
 	add_timezone_info(bootinfo)
-	load_conf_settings(bootinfo)
 	load_print(bootinfo, doclist)
 	doclist.extend(get_meta_bundle("Page"))
 	bootinfo.home_folder = frappe.db.get_value("File", {"is_home_folder": 1})
-	bootinfo.navbar_settings = get_navbar_settings()
 	bootinfo.notification_settings = get_notification_settings()
-	bootinfo.onboarding_tours = get_onboarding_ui_tours()
 	set_time_zone(bootinfo)
 
 	# ipinfo
@@ -82,33 +75,159 @@ def get_bootinfo():
 	load_country_doc(bootinfo)
 	load_currency_docs(bootinfo)
 
+	sections = get_bootinfo_sections()
+	for section in sections.values():
+		# boot_session hooks may change it in place, the cached section must stay as is
+		bootinfo.update(deepcopy(section.data))
+
 	for method in hooks.boot_session or []:
 		frappe.get_attr(method)(bootinfo)
 
 	if bootinfo.lang:
 		bootinfo.lang = str(bootinfo.lang)
-	bootinfo.versions = {k: v["version"] for k, v in get_versions().items()}
 
+	bootinfo.update(get_email_accounts(user=frappe.session.user))
+	bootinfo.points = get_energy_points(frappe.session.user)
+	bootinfo.frequently_visited_links = frequently_visited_links()
+
+	bootinfo.section_hashes = {}
+	for name, section in sections.items():
+		if get_bootinfo_hash({key: bootinfo.get(key) for key in section.data}) != section.hash:
+			# changed by a boot_session hook, keep it in this user's bootinfo
+			continue
+
+		bootinfo.section_hashes[name] = section.hash
+		if not include_sections:
+			for key in section.data:
+				bootinfo.pop(key, None)
+
+	return bootinfo
+
+
+def get_bootinfo_sections():
+	return {name: get_bootinfo_section(name) for name in BOOTINFO_SECTIONS}
+
+
+def get_bootinfo_section(name):
+	"""Return `{"hash": ..., "data": ...}` for a boot section, cached for its scope."""
+	builder, scope = BOOTINFO_SECTIONS[name]
+
+	def build():
+		data = frappe._dict()
+		builder(data)
+		return frappe._dict(hash=get_bootinfo_hash(data), data=data)
+
+	if getattr(frappe.conf, "disable_session_cache", None):
+		return build()
+
+	# stored along with user bootinfo so that clearing it clears the sections too, see
+	# `frappe.cache_manager.clear_user_bootinfo`
+	return frappe.cache.hget("bootinfo", get_section_key(name), build)
+
+
+def get_section_key(name, user=None):
+	return f"section:{name}:{get_section_scope(BOOTINFO_SECTIONS[name][1], user)}"
+
+
+def get_section_scope(scope, user=None):
+	if scope == "lang":
+		return frappe.local.lang
+
+	if scope == "roles":
+		roles = ",".join(sorted(frappe.get_roles(user)))
+		return hashlib.sha1(roles.encode()).hexdigest()
+
+	return "site"
+
+
+def get_user_section_keys(user):
+	"""Cache keys of the boot sections of `user` that depend on the user (on their roles)."""
+	return [
+		get_section_key(name, user) for name, (_, scope) in BOOTINFO_SECTIONS.items() if scope == "roles"
+	]
+
+
+def get_bootinfo_hash(data):
+	return hashlib.sha1(frappe.as_json(data, indent=None).encode()).hexdigest()[:16]
+
+
+def add_bootinfo_sections(bootinfo, cached_sections=None):
+	"""Add boot sections left out by `get_bootinfo(include_sections=False)`.
+
+	Sections are merged into bootinfo, unless `cached_sections` (`{section: hash}` of the
+	sections cached by the client) is passed. They are then set in `boot_sections` for the
+	client to merge, as `None` if the client already has the same version.
+	"""
+	frappe.set_user_lang(frappe.session.user)
+
+	if cached_sections is not None:
+		bootinfo.boot_sections = {}
+
+	section_hashes = bootinfo.get("section_hashes") or {}
+	bootinfo.section_hashes = {}
+
+	for name in section_hashes:
+		section = get_bootinfo_section(name)
+		bootinfo.section_hashes[name] = section.hash
+
+		if cached_sections is None:
+			bootinfo.update(section.data)
+		elif cached_sections.get(name) == section.hash:
+			bootinfo.boot_sections[name] = None
+		else:
+			bootinfo.boot_sections[name] = section.data
+
+
+def load_site_bootinfo(bootinfo):
+	bootinfo.letter_heads = get_letter_heads()
+	bootinfo.active_domains = frappe.get_active_domains()
+	bootinfo.all_domains = [d.get("name") for d in frappe.get_all("Domain")]
+	add_layouts(bootinfo)
+
+	bootinfo.module_app = frappe.local.module_app
+	bootinfo.single_types = [d.name for d in frappe.get_all("DocType", {"issingle": 1})]
+	bootinfo.nested_set_doctypes = [
+		d.parent for d in frappe.get_all("DocField", {"fieldname": "lft"}, ["parent"])
+	]
+	load_conf_settings(bootinfo)
+	load_print_css(bootinfo, frappe.db.get_singles_dict("Print Settings"))
+	bootinfo.navbar_settings = get_navbar_settings()
+	bootinfo.onboarding_tours = get_onboarding_ui_tours()
+
+	bootinfo.versions = {k: v["version"] for k, v in get_versions().items()}
 	bootinfo.error_report_email = frappe.conf.error_report_email
 	bootinfo.calendars = sorted(frappe.get_hooks("calendars"))
 	bootinfo.treeviews = frappe.get_hooks("treeviews") or []
-	bootinfo.lang_dict = get_lang_dict()
 	bootinfo.success_action = get_success_action()
-	bootinfo.update(get_email_accounts(user=frappe.session.user))
 	bootinfo.energy_points_enabled = is_energy_point_enabled()
 	bootinfo.website_tracking_enabled = is_tracking_enabled()
-	bootinfo.points = get_energy_points(frappe.session.user)
-	bootinfo.frequently_visited_links = frequently_visited_links()
 	bootinfo.link_preview_doctypes = get_link_preview_doctypes()
 	bootinfo.additional_filters_config = get_additional_filters_from_hooks()
-	bootinfo.desk_settings = get_desk_settings()
 	bootinfo.app_logo_url = get_app_logo()
 	bootinfo.link_title_doctypes = get_link_title_doctypes()
-	bootinfo.translated_doctypes = get_translated_doctypes()
 	bootinfo.subscription_conf = add_subscription_conf()
 	bootinfo.marketplace_apps = get_marketplace_apps()
 
-	return bootinfo
+
+def load_role_bootinfo(bootinfo):
+	bootinfo.page_info = get_allowed_pages()
+	bootinfo.desk_settings = get_desk_settings()
+
+
+def load_translations(bootinfo):
+	from frappe.translate import get_lang_dict, get_messages_for_boot, get_translated_doctypes
+
+	bootinfo["__messages"] = get_messages_for_boot()
+	bootinfo.lang_dict = get_lang_dict()
+	bootinfo.translated_doctypes = get_translated_doctypes()
+
+
+# section: (builder, scope) - scope is one of "site", "lang" or "roles"
+BOOTINFO_SECTIONS = {
+	"site": (load_site_bootinfo, "site"),
+	"permissions": (load_role_bootinfo, "roles"),
+	"translations": (load_translations, "lang"),
+}
 
 
 def get_letter_heads():
@@ -258,13 +377,6 @@ def get_user_pages_or_reports(parent, cache=False):
 	return has_role
 
 
-def load_translations(bootinfo):
-	from frappe.translate import get_messages_for_boot
-
-	bootinfo["lang"] = frappe.lang
-	bootinfo["__messages"] = get_messages_for_boot()
-
-
 def get_user_info():
 	# get info for current user
 	user_info = frappe._dict()
@@ -311,7 +423,6 @@ def load_print(bootinfo, doclist):
 	print_settings = frappe.db.get_singles_dict("Print Settings")
 	print_settings.doctype = ":Print Settings"
 	doclist.append(print_settings)
-	load_print_css(bootinfo, print_settings)
 
 
 def load_print_css(bootinfo, print_settings):
@@ -74,6 +74,13 @@ doctype_cache_keys = (
 	"data_import_column_header_map",
 )
 
+# `site_cache` functions whose values depend on DocType definitions
+doctype_site_cache_functions = (
+	"frappe.model.utils.is_virtual_doctype",
+	"frappe.model.utils.is_single_doctype",
+	"frappe.core.doctype.log_settings.log_settings._supports_log_clearing",
+)
+
 
 def clear_user_cache(user=None):
 	from frappe.desk.notifications import clear_notifications
@@ -85,7 +92,8 @@ def clear_user_cache(user=None):
 	if user:
 		for name in user_cache_keys:
 			frappe.cache.hdel(name, user)
-		frappe.cache.delete_keys("user:" + user)
+		clear_user_bootinfo(user)
+		frappe.cache.delete_tags(f"user:{user}:")
 		clear_defaults_cache(user)
 	else:
 		for name in user_cache_keys:
@@ -94,6 +102,14 @@ def clear_user_cache(user=None):
 		clear_global_cache()
 
 
+def clear_user_bootinfo(user):
+	"""Clear cached bootinfo of `user` and the boot sections cached for their roles (see
+	`frappe.boot.get_bootinfo_section`). Sections cached per site or language are kept."""
+	from frappe.boot import get_user_section_keys
+
+	frappe.cache.hdel("bootinfo", user, *get_user_section_keys(user))
+
+
 def clear_domain_cache(user=None):
 	domain_cache_keys = ("domain_restricted_doctypes", "domain_restricted_pages")
 	frappe.cache.delete_value(domain_cache_keys)
@@ -119,6 +135,8 @@ def clear_defaults_cache(user=None):
 
 def clear_doctype_cache(doctype=None):
 	clear_controller_cache(doctype)
+	for fn in doctype_site_cache_functions:
+		frappe.get_attr(fn).clear_cache(broadcast=True)
 
 	_clear_doctype_cache_from_redis(doctype)
 	if hasattr(frappe.db, "after_commit"):
@@ -160,7 +178,7 @@ def _clear_doctype_cache_from_redis(doctype: str | None = None):
 		# clear all
 		for name in doctype_cache_keys:
 			frappe.cache.delete_value(name)
-		frappe.cache.delete_keys("document_cache::")
+		frappe.cache.delete_tags("document_cache::")
 
 
 def clear_controller_cache(doctype=None):
@@ -199,8 +199,20 @@ def start_scheduler():
 	type=click.Choice(["round_robin", "random"]),
 	help="Dequeuing strategy to use",
 )
+@click.option(
+	"--no-fork",
+	is_flag=True,
+	default=False,
+	help="Run jobs in the worker process and reuse database connections across jobs.",
+)
 def start_worker(
-	queue, quiet=False, rq_username=None, rq_password=None, burst=False, strategy=None
+	queue,
+	quiet=False,
+	rq_username=None,
+	rq_password=None,
+	burst=False,
+	strategy=None,
+	no_fork=False,
 ):
 	"""Start a backgrond worker"""
 	from frappe.utils.background_jobs import start_worker
@@ -212,6 +224,7 @@ def start_worker(
 		rq_password=rq_password,
 		burst=burst,
 		strategy=strategy,
+		no_fork=no_fork,
 	)
 
 
@@ -224,7 +237,13 @@ def start_worker(
 @click.option("--num-workers", type=int, default=2, help="Number of workers to spawn in pool.")
 @click.option("--quiet", is_flag=True, default=False, help="Hide Log Outputs")
 @click.option("--burst", is_flag=True, default=False, help="Run Worker in Burst mode.")
-def start_worker_pool(queue, quiet=False, num_workers=2, burst=False):
+@click.option(
+	"--max-workers",
+	type=int,
+	default=None,
+	help="Scale the pool between --num-workers and these many workers depending on queued jobs.",
+)
+def start_worker_pool(queue, quiet=False, num_workers=2, burst=False, max_workers=None):
 	"""Start a backgrond worker"""
 	from frappe.utils.background_jobs import start_worker_pool
 
@@ -233,6 +252,7 @@ def start_worker_pool(queue, quiet=False, num_workers=2, burst=False):
 		quiet=quiet,
 		burst=burst,
 		num_workers=num_workers,
+		max_workers=max_workers,
 	)
 
 
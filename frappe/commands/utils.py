@@ -196,6 +196,169 @@ def show_config(context, format):
 		click.echo(frappe.as_json(sites_config))
 
 
+@click.command("show-cache-usage")
+@click.option("--limit", default=5, help="Number of largest keys to show per prefix")
+@click.option("--format", "-f", type=click.Choice(["text", "json"]), default="text")
+@pass_context
+def show_cache_usage(context, limit=5, format="text"):
+	"Show memory used by the site's Redis cache keys, grouped by key prefix"
+	from frappe.utils import format_size
+	from frappe.utils.commands import render_table
+
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	sites_usage = {}
+
+	for site in context.sites:
+		try:
+			frappe.init(site=site)
+			usage = frappe.cache.get_memory_usage(limit=limit)
+		finally:
+			frappe.destroy()
+
+		if format == "json":
+			sites_usage[site] = usage
+			continue
+
+		if len(context.sites) != 1:
+			click.secho(f"Site {site}", fg="yellow")
+
+		data = [["Prefix", "Keys", "Memory", "Largest Keys"]]
+		for prefix, group in usage.items():
+			largest = "\n".join(f"{key} ({format_size(size)})" for key, size in group["largest"])
+			data.append([prefix, group["keys"], format_size(group["memory"]), largest])
+		render_table(data)
+
+	if format == "json":
+		click.echo(frappe.as_json(sites_usage))
+
+
+@click.command("cache-stats")
+@click.option("--reset", is_flag=True, default=False, help="Reset the counters")
+@click.option("--format", "-f", type=click.Choice(["text", "json"]), default="text")
+@pass_context
+def cache_stats(context, reset=False, format="text"):
+	"Show cache hits, misses and time spent per cache and key prefix, collected by the monitor"
+	from frappe.monitor import get_cache_stats, reset_cache_stats
+	from frappe.utils import format_size
+	from frappe.utils.commands import render_table
+
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	sites_stats = {}
+
+	for site in context.sites:
+		try:
+			frappe.init(site=site)
+			stats = get_cache_stats()
+			if reset:
+				reset_cache_stats()
+		finally:
+			frappe.destroy()
+
+		if format == "json":
+			sites_stats[site] = [
+				{"cache": cache, "key": key, **counters} for (cache, key), counters in stats.items()
+			]
+			continue
+
+		if len(context.sites) != 1:
+			click.secho(f"Site {site}", fg="yellow")
+
+		data = [
+			["Cache", "Key", "Hits", "Misses", "Hit Ratio", "Time (ms)", "Generator Time (ms)", "Read"]
+		]
+		for (cache, key), counters in stats.items():
+			lookups = counters["hits"] + counters["misses"]
+			data.append(
+				[
+					cache,
+					key,
+					counters["hits"],
+					counters["misses"],
+					f"{counters['hits'] / lookups:.1%}" if lookups else "-",
+					round(counters["time"] / 1000, 1),
+					round(counters["generator_time"] / 1000, 1),
+					format_size(counters["bytes"]),
+				]
+			)
+		render_table(data)
+
+	if format == "json":
+		click.echo(frappe.as_json(sites_stats))
+
+
+@click.command("job-stats")
+@click.option(
+	"--group-by",
+	type=click.Choice(["method", "queue", "priority"]),
+	default="method",
+	help="Group metrics by",
+)
+@click.option("--reset", is_flag=True, default=False, help="Reset the metrics")
+@click.option("--format", "-f", type=click.Choice(["text", "json"]), default="text")
+@pass_context
+def job_stats(context, group_by="method", reset=False, format="text"):
+	"Show background job wait, run and DB time percentiles and missed deadlines, from the monitor"
+	from frappe.monitor import JOB_STATS_METRICS, get_job_stats, reset_job_stats
+	from frappe.utils.commands import render_table
+
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	sites_stats = {}
+
+	for site in context.sites:
+		try:
+			frappe.init(site=site)
+			stats = get_job_stats(group_by=group_by)
+			if reset:
+				reset_job_stats()
+		finally:
+			frappe.destroy()
+
+		if format == "json":
+			sites_stats[site] = [{group_by: name, **metrics} for name, metrics in stats.items()]
+			continue
+
+		if len(context.sites) != 1:
+			click.secho(f"Site {site}", fg="yellow")
+
+		data = [
+			[
+				group_by.title(),
+				"Jobs",
+				"Failures",
+				"Retries",
+				"Missed Deadline",
+				"Wait p50/p95/p99 (ms)",
+				"Run p50/p95/p99 (ms)",
+				"DB p50/p95/p99 (ms)",
+				"Queries p50/p95/p99",
+			]
+		]
+		for name, metrics in stats.items():
+			data.append(
+				[
+					name,
+					metrics["count"],
+					metrics["failures"],
+					metrics["retries"],
+					metrics["missed"],
+					*(
+						"/".join(f"{metrics[metric][p]:g}" for p in ("p50", "p95", "p99"))
+						for metric in JOB_STATS_METRICS
+					),
+				]
+			)
+		render_table(data)
+
+	if format == "json":
+		click.echo(frappe.as_json(sites_stats))
+
+
 @click.command("reset-perms")
 @pass_context
 def reset_perms(context):
@@ -1180,6 +1343,9 @@ commands = [
 	serve,
 	set_config,
 	show_config,
+	show_cache_usage,
+	cache_stats,
+	job_stats,
 	watch,
 	bulk_rename,
 	add_to_email_queue,
@@ -175,6 +175,8 @@ class DocType(Document):
 		track_views: DF.Check
 		translated_doctype: DF.Check
 		website_search_field: DF.Data | None
+		write_behind: DF.Check
+
 	# end: auto-generated types
 	def validate(self):
 		"""Validate DocType before saving.
@@ -211,6 +213,7 @@ class DocType(Document):
 		self.validate_child_table()
 		self.validate_website()
 		self.validate_virtual_doctype_methods()
+		self.validate_write_behind()
 		self.ensure_minimum_max_attachment_limit()
 		validate_links_table_fieldnames(self)
 
@@ -416,6 +419,41 @@ class DocType(Document):
 
 		validate_controller(self.name)
 
+	def validate_write_behind(self):
+		if not self.write_behind:
+			return
+
+		if (
+			self.istable
+			or self.issingle
+			or self.is_submittable
+			or self.is_virtual
+			or any(d.fieldtype in table_fields for d in self.fields)
+		):
+			frappe.throw(
+				_(
+					"Write Behind can only be enabled for DocTypes without child tables that are not single, submittable or virtual"
+				),
+				title=_("Invalid DocType"),
+			)
+
+		if self.is_new():
+			return
+
+		# write behind inserts skip the hooks that would need the row in the database
+		try:
+			controller = get_controller(self.name)
+		except ImportError:
+			return
+
+		if hooks := [m for m in ("after_insert", "on_update", "on_change") if hasattr(controller, m)]:
+			frappe.throw(
+				_("Write Behind can not be enabled for DocTypes whose controller defines {0}").format(
+					", ".join(hooks)
+				),
+				title=_("Invalid DocType"),
+			)
+
 	def ensure_minimum_max_attachment_limit(self):
 		"""Ensure that max_attachments is *at least* bigger than number of attach fields."""
 		from frappe.model import attachment_fieldtypes
@@ -75,6 +75,8 @@ class PreparedReport(Document):
 			prepared_report=self.name,
 			timeout=REPORT_TIMEOUT,
 			enqueue_after_commit=True,
+			# someone is waiting for it, unlike most other jobs of the long queue
+			priority="high",
 		)
 
 	def get_prepared_data(self, with_file_name=False):
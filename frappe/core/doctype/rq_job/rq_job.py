@@ -19,7 +19,7 @@ from frappe.utils import (
 	create_batch,
 	make_filter_dict,
 )
-from frappe.utils.background_jobs import get_queues, get_redis_conn
+from frappe.utils.background_jobs import get_queues, get_redis_conn, parse_qname
 
 QUEUES = ["default", "long", "short"]
 JOB_STATUSES = ["queued", "started", "failed", "finished", "deferred", "scheduled", "canceled"]
@@ -100,7 +100,8 @@ class RQJob(Document):
 
 		matched_job_ids = []
 		for queue in get_queues():
-			if not queue.name.endswith(tuple(queues)):
+			qtype, site = parse_qname(queue.name)
+			if qtype not in queues or site not in (None, frappe.local.site):
 				continue
 			for status in statuses:
 				matched_job_ids.extend(fetch_job_ids(queue, status))
@@ -152,7 +153,7 @@ def serialize_job(job: Job) -> frappe._dict:
 	return frappe._dict(
 		name=job.id,
 		job_id=job.id,
-		queue=job.origin.rsplit(":", 1)[1],
+		queue=parse_qname(job.origin)[0],
 		job_name=job_name,
 		status=job.get_status(),
 		started_at=convert_utc_to_system_timezone(job.started_at) if job.started_at else "",
@@ -11,6 +11,7 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import get_datetime, now_datetime
 from frappe.utils.background_jobs import enqueue, is_job_enqueued
+from frappe.utils.scheduler import reset_next_runs, update_next_runs
 
 
 class ScheduledJobType(Document):
@@ -52,6 +53,16 @@ class ScheduledJobType(Document):
 			# force logging for all events other than continuous ones (ALL)
 			self.create_log = 1
 
+	def on_update(self):
+		reset_next_runs()
+
+	def on_change(self):
+		# also runs for db_set, e.g. of last_execution when the job starts
+		if self.stopped:
+			update_next_runs({}, removed={self.name})
+		else:
+			update_next_runs({self.name: self.get_next_execution()}, existing_only=True)
+
 	def enqueue(self, force=False) -> bool:
 		# enqueue event if last execution is done
 		if self.is_event_due() or force:
@@ -112,6 +123,15 @@ class ScheduledJobType(Document):
 		last_execution = get_datetime(self.last_execution or self.creation)
 		return croniter(self.cron_format, last_execution).get_next(datetime)
 
+	def get_next_run(self, current_time=None):
+		"""Returns when the scheduler should look at this job next after enqueueing it: its next
+		execution, or the next one after now if that is due already (it has not started yet)"""
+		current_time = current_time or now_datetime()
+		next_execution = self.get_next_execution()
+		if next_execution <= current_time:
+			next_execution = croniter(self.cron_format, current_time).get_next(datetime)
+		return next_execution
+
 	def execute(self):
 		self.scheduler_log = None
 		try:
@@ -156,6 +176,7 @@ class ScheduledJobType(Document):
 
 	def on_trash(self):
 		frappe.db.delete("Scheduled Job Log", {"scheduled_job_type": self.name})
+		reset_next_runs()
 
 
 @frappe.whitelist()
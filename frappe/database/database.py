@@ -10,7 +10,7 @@ import string
 import traceback
 from collections.abc import Iterable, Sequence
 from contextlib import contextmanager, suppress
-from time import time
+from time import perf_counter, time
 from typing import Any
 
 from pypika.dialects import MySQLQueryBuilder, PostgreSQLQueryBuilder
@@ -29,7 +29,7 @@ from frappe.database.utils import (
 	is_query_type,
 )
 from frappe.exceptions import DoesNotExistError, ImplicitCommitError
-from frappe.monitor import get_trace_id
+from frappe.monitor import add_query_time, get_trace_id
 from frappe.query_builder.functions import Count
 from frappe.utils import CallbackManager
 from frappe.utils import cast as cast_fieldtype
@@ -120,6 +120,11 @@ class Database:
 		If any statement takes more time it will be killed along with entire transaction."""
 		raise NotImplementedError
 
+	def reset_connection(self):
+		"""Reset the session state of the connection (session variables, temporary tables etc.)
+		to the one of a new connection, without reconnecting. Rolls back the transaction."""
+		raise NotImplementedError
+
 	def use(self, db_name):
 		"""`USE` db_name."""
 		self._conn.select_db(db_name)
@@ -213,6 +218,7 @@ class Database:
 		if trace_id := get_trace_id():
 			query += f" /* FRAPPE_TRACE_ID: {trace_id} */"
 
+		query_start = perf_counter()
 		try:
 			self._cursor.execute(query, values)
 		except Exception as e:
@@ -252,6 +258,9 @@ class Database:
 			):
 				raise
 
+		if trace_id:
+			add_query_time(perf_counter() - query_start)
+
 		if debug:
 			time_end = time()
 			frappe.errprint(f"Execution time: {time_end - time_start:.2f} sec")
@@ -9,6 +9,8 @@ from frappe.database.database import Database
 from frappe.database.mariadb.schema import MariaDBTable
 from frappe.utils import UnicodeWithAttrs, cstr, get_datetime, get_table_name
 
+COM_RESET_CONNECTION = 0x1F
+
 _PARAM_COMP = re.compile(r"%\([\w]*\)s")
 
 
@@ -113,6 +115,14 @@ class MariaDBConnectionUtil:
 	def set_execution_timeout(self, seconds: int):
 		self.sql("set session max_statement_time = %s", int(seconds))
 
+	def reset_connection(self):
+		# COM_RESET_CONNECTION, which pymysql doesn't wrap
+		self._conn._execute_command(COM_RESET_CONNECTION, b"")
+		self._conn._read_ok_packet()
+		# back to the server's defaults, restore what pymysql set when connecting
+		self._conn.set_character_set(self._conn.charset, self._conn.collation)
+		self._conn.autocommit(False)
+
 	def get_connection_settings(self) -> dict:
 		conn_settings = {
 			"host": self.host,
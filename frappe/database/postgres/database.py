@@ -173,6 +173,15 @@ class PostgresDatabase(PostgresExceptionUtil, Database):
 		# Postgres expects milliseconds as input
 		self.sql("set local statement_timeout = %s", int(seconds) * 1000)
 
+	def reset_connection(self):
+		self._conn.rollback()
+		# DISCARD ALL can't run in a transaction block
+		self._conn.autocommit = True
+		try:
+			self._conn.cursor().execute("DISCARD ALL")
+		finally:
+			self._conn.autocommit = False
+
 	def escape(self, s, percent=True):
 		"""Escape quotes and percent in given string."""
 		if isinstance(s, bytes):
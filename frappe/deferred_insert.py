@@ -1,16 +1,51 @@
 import json
+import time
 from typing import TYPE_CHECKING, Union
 
 import redis
 
 import frappe
-from frappe.utils import cstr
+from frappe.model.base_document import get_controller
+from frappe.utils import cstr, now
 
 if TYPE_CHECKING:
 	from frappe.model.document import Document
 
 queue_prefix = "insert_queue_for_"
 
+# number of queue entries popped and inserted at a time
+BATCH_SIZE = 1000
+
+# controller methods and `doc_events` that `Document.insert` would run, doctypes with any of
+# these are inserted one record at a time
+INSERT_HOOKS = (
+	"autoname",
+	"before_insert",
+	"before_validate",
+	"validate",
+	"before_save",
+	"after_insert",
+	"on_update",
+	"on_change",
+)
+
+# generic ("*") doc_events of frappe that deferred records are inserted without. They act on
+# documents people work on (workflows, assignments, attachments, notification counts, energy
+# points, milestones) and have nothing to do for logs. Other generic hooks, like the ones
+# added by apps, make doctypes be inserted one record at a time.
+SKIPPED_GENERIC_HOOKS = frozenset(
+	(
+		"frappe.desk.notifications.clear_doctype_notifications",
+		"frappe.workflow.doctype.workflow_action.workflow_action.process_workflow_actions",
+		"frappe.core.doctype.file.utils.attach_files_to_document",
+		"frappe.automation.doctype.assignment_rule.assignment_rule.apply",
+		"frappe.automation.doctype.assignment_rule.assignment_rule.update_due_date",
+		"frappe.core.doctype.user_type.user_type.apply_permissions_for_non_standard_user_type",
+		"frappe.social.doctype.energy_point_rule.energy_point_rule.process_energy_points",
+		"frappe.automation.doctype.milestone_tracker.milestone_tracker.evaluate_milestone",
+	)
+)
+
 
 def deferred_insert(doctype: str, records: list[Union[dict, "Document"]] | str):
 	if isinstance(records, (dict, list)):
@@ -21,34 +56,164 @@ def deferred_insert(doctype: str, records: list[Union[dict, "Document"]] | str):
 	try:
 		frappe.cache.rpush(f"{queue_prefix}{doctype}", _records)
 	except redis.exceptions.ConnectionError:
+		if isinstance(records, str):
+			records = json.loads(records)
+		if isinstance(records, dict):
+			records = [records]
+
 		for record in records:
 			insert_record(record, doctype)
 
 
+def is_write_behind_enabled() -> bool:
+	"""Whether inserts of DocTypes with "Write Behind" enabled should be queued.
+
+	They are queued with `deferred_insert` and written by `save_to_db`, so inserted documents
+	aren't in the database until the next flush and are lost if Redis restarts before it.
+	Documents are always written directly during install, migrate, patches, imports and tests.
+	"""
+	return not (
+		frappe.flags.in_install
+		or frappe.flags.in_migrate
+		or frappe.flags.in_patch
+		or frappe.flags.in_import
+		or frappe.flags.in_test
+	)
+
+
 def save_to_db():
+	"""Insert records queued by `deferred_insert`, `BATCH_SIZE` queue entries at a time.
+
+	Queues are drained up to the length they had when the flush started, so that records
+	queued meanwhile don't keep this running forever. Entries are only removed from the queue
+	once their records are committed, a failed flush leaves them for the next one."""
 	queue_keys = frappe.cache.get_keys(queue_prefix)
 	for key in queue_keys:
-		record_count = 0
-		queue_key = get_key_name(key)
 		doctype = get_doctype_name(key)
-		while frappe.cache.llen(queue_key) > 0 and record_count <= 500:
-			records = frappe.cache.lpop(queue_key)
-			records = json.loads(records.decode("utf-8"))
-			if isinstance(records, dict):
-				record_count += 1
-				insert_record(records, doctype)
-				continue
-			for record in records:
-				record_count += 1
-				insert_record(record, doctype)
+		start = time.monotonic()
+		record_count = 0
+		pending = frappe.cache.llen(get_key_name(key))
+
+		while pending > 0:
+			entries = frappe.cache.lrange(get_key_name(key), 0, min(pending, BATCH_SIZE) - 1)
+			if not entries:
+				break
+			pending -= len(entries)
+
+			records = []
+			for entry in entries:
+				entry = json.loads(entry.decode("utf-8"))
+				records.extend([entry] if isinstance(entry, dict) else entry)
+
+			insert_records(records, doctype)
+			frappe.db.commit()
+			# records queued meanwhile were appended, the first entries are still the inserted ones
+			frappe.cache.ltrim(get_key_name(key), len(entries), -1)
+			record_count += len(records)
+
+		if record_count:
+			duration = time.monotonic() - start
+			frappe.logger("deferred_insert").info(
+				f"Inserted {record_count} {doctype} records in {duration:.2f}s"
+				f" ({record_count / max(duration, 0.001):.0f} records/s)"
+			)
+
+
+def insert_records(records: list[dict], doctype: str):
+	"""Insert `records` with a single query, falling back to inserting them one by one if
+	the doctype has insert hooks or if the query fails.
+
+	Unlike `Document.insert`, this keeps the timestamps and owner of queued records and
+	doesn't run frappe's generic `doc_events` listed in `SKIPPED_GENERIC_HOOKS`. Records of
+	"Write Behind" DocTypes have been validated when they were queued and are inserted as
+	is."""
+	if not can_bulk_insert(doctype):
+		for record in records:
+			insert_record(record, doctype)
+		return
+
+	docs = [prepare_record(record, doctype) for record in records]
+	columns = frappe.get_meta(doctype).get_valid_columns()
+	values = []
+	for doc in docs:
+		doc_values = doc.get_valid_dict(
+			convert_dates_to_str=True, ignore_nulls=True, ignore_virtual=True
+		)
+		values.append(tuple(doc_values.get(column) for column in columns))
+
+	save_point = "deferred_insert"
+	frappe.db.savepoint(save_point)
+	try:
+		frappe.db.bulk_insert(doctype, columns, values, chunk_size=BATCH_SIZE)
+	except Exception:
+		frappe.db.rollback(save_point=save_point)
+		for doc in docs:
+			frappe.db.savepoint(save_point)
+			try:
+				doc.db_insert()
+			except Exception as e:
+				frappe.db.rollback(save_point=save_point)
+				frappe.logger().error(f"Error while inserting deferred {doctype} record: {e}")
+			else:
+				frappe.db.release_savepoint(save_point)
+	else:
+		frappe.db.release_savepoint(save_point)
+
+
+def prepare_record(record: dict, doctype: str) -> "Document":
+	"""Set defaults, docstatus and name of a queued record, keeping its owner and timestamps."""
+	doc = frappe.get_doc({**record, "doctype": doctype})
+	doc._set_defaults()
+	doc.owner = doc.owner or frappe.session.user
+	doc.modified_by = doc.modified_by or doc.owner
+	doc.creation = doc.creation or now()
+	doc.modified = doc.modified or doc.creation
+	doc.set_docstatus()
+	if not doc.name:
+		doc.set_new_name()
+
+	return doc
+
+
+def can_bulk_insert(doctype: str) -> bool:
+	meta = frappe.get_meta(doctype)
+	if meta.issingle or meta.istable or meta.get_table_fields():
+		return False
+
+	if meta.write_behind:
+		return True
+
+	doc_events = frappe.get_hooks("doc_events", {})
+	if doc_events.get(doctype):
+		return False
+
+	generic_hooks = doc_events.get("*") or {}
+	for event in INSERT_HOOKS:
+		methods = generic_hooks.get(event) or []
+		if isinstance(methods, str):
+			methods = [methods]
+		if set(methods) - SKIPPED_GENERIC_HOOKS:
+			return False
+
+	controller = get_controller(doctype)
+	return not any(hasattr(controller, method) for method in INSERT_HOOKS)
 
 
 def insert_record(record: Union[dict, "Document"], doctype: str):
+	save_point = "deferred_insert_record"
+	frappe.db.savepoint(save_point)
 	try:
-		record.update({"doctype": doctype})
-		frappe.get_doc(record).insert()
+		if frappe.get_meta(doctype).write_behind:
+			# validated when it was queued, inserting it again would queue it again
+			prepare_record(record, doctype).db_insert()
+		else:
+			record.update({"doctype": doctype})
+			frappe.get_doc(record).insert()
 	except Exception as e:
+		frappe.db.rollback(save_point=save_point)
 		frappe.logger().error(f"Error while inserting deferred {doctype} record: {e}")
+	else:
+		frappe.db.release_savepoint(save_point)
 
 
 def get_key_name(key: str) -> str:
@@ -365,9 +365,12 @@ class Workspace:
 		all_custom_blocks = []
 		if frappe.has_permission("Custom HTML Block", throw=False):
 			custom_blocks = self.doc.custom_blocks
+			permitted_blocks = frappe.has_permission_many(
+				"Custom HTML Block", [d.custom_block_name for d in custom_blocks]
+			)
 
 			for custom_block in custom_blocks:
-				if frappe.has_permission("Custom HTML Block", doc=custom_block.custom_block_name):
+				if custom_block.custom_block_name in permitted_blocks:
 					if not self.is_custom_block_permitted(custom_block.custom_block_name):
 						continue
 
@@ -6,6 +6,7 @@ import random
 
 import frappe
 from frappe import _
+from frappe.cache_manager import clear_user_bootinfo
 from frappe.model.document import Document
 from frappe.utils.user import UserPermissions
 
@@ -340,7 +341,7 @@ def get_all_icons():
 
 def clear_desktop_icons_cache(user=None):
 	frappe.cache.hdel("desktop_icons", user or frappe.session.user)
-	frappe.cache.hdel("bootinfo", user or frappe.session.user)
+	clear_user_bootinfo(user or frappe.session.user)
 
 
 def get_user_copy(module_name, user=None):
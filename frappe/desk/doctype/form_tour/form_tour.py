@@ -5,6 +5,7 @@ import json
 
 import frappe
 from frappe import _
+from frappe.cache_manager import clear_user_bootinfo
 from frappe.model.document import Document
 from frappe.modules.export_file import export_to_files
 
@@ -81,8 +82,8 @@ def reset_tour(tour_name):
 		frappe.db.set_value(
 			"User", user, "onboarding_status", frappe.as_json(onboarding_status), update_modified=False
 		)
-		frappe.cache.hdel("bootinfo", user)
 
+	frappe.cache.delete_key("bootinfo")
 	frappe.msgprint(_("Successfully reset onboarding status for all users."), alert=True)
 
 
@@ -102,7 +103,7 @@ def update_user_status(value, step):
 		"User", frappe.session.user, "onboarding_status", value, update_modified=False
 	)
 
-	frappe.cache.hdel("bootinfo", frappe.session.user)
+	clear_user_bootinfo(frappe.session.user)
 
 
 def get_onboarding_ui_tours():
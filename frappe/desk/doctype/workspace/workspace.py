@@ -6,6 +6,7 @@ from json import loads
 
 import frappe
 from frappe import _
+from frappe.cache_manager import clear_user_bootinfo
 from frappe.desk.desktop import save_new_widget
 from frappe.desk.utils import validate_route_conflict
 from frappe.model.document import Document
@@ -81,7 +82,7 @@ class Workspace(Document):
 	def clear_cache(self):
 		super().clear_cache()
 		if self.for_user:
-			frappe.cache.hdel("bootinfo", self.for_user)
+			clear_user_bootinfo(self.for_user)
 		else:
 			frappe.cache.delete_key("bootinfo")
 
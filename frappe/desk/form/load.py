@@ -3,6 +3,7 @@
 
 import json
 import typing
+from collections import defaultdict
 from urllib.parse import quote
 
 import frappe
@@ -13,18 +14,21 @@ from frappe import _, _dict
 from frappe.desk.form.document_follow import is_document_followed
 from frappe.model.utils.user_settings import get_user_settings
 from frappe.permissions import get_doc_permissions
-from frappe.utils.data import cstr
+from frappe.utils.data import cstr, sbool
 
 if typing.TYPE_CHECKING:
 	from frappe.model.document import Document
 
 
 @frappe.whitelist()
-def getdoc(doctype, name, user=None):
+def getdoc(doctype, name, user=None, lazy_docinfo=False):
 	"""
 	Loads a doclist for a given document. This method is called directly from the client.
 	Requries "doctype", "name" as form variables.
 	Will also call the "onload" method on the document.
+
+	If `lazy_docinfo` is set, sections of docinfo that are only needed for the timeline are
+	left empty and listed in `docinfo.pending_sections` to be fetched with `get_docinfo`.
 	"""
 
 	if not (doctype and name):
@@ -47,7 +51,15 @@ def getdoc(doctype, name, user=None):
 
 	# add file list
 	doc.add_viewed()
-	get_docinfo(doc)
+	if sbool(lazy_docinfo):
+		docinfo = _get_docinfo(doc, [s for s in DOCINFO_SECTIONS if s not in LAZY_DOCINFO_SECTIONS])
+		docinfo.pending_sections = list(LAZY_DOCINFO_SECTIONS)
+		for keys in LAZY_DOCINFO_SECTIONS.values():
+			for key in keys:
+				docinfo[key] = []
+		frappe.response["docinfo"] = docinfo
+	else:
+		get_docinfo(doc)
 
 	doc.add_seen()
 	set_link_titles(doc)
@@ -81,59 +93,111 @@ def getdoctype(doctype, with_parent=False, cached_timestamp=None):
 
 def get_meta_bundle(doctype):
 	bundle = [frappe.desk.form.meta.get_meta(doctype)]
-	bundle.extend(
-		frappe.desk.form.meta.get_meta(df.options)
-		for df in bundle[0].fields
-		if df.fieldtype in frappe.model.table_fields
-	)
+	child_doctypes = [
+		df.options for df in bundle[0].fields if df.fieldtype in frappe.model.table_fields
+	]
+
+	# load cached meta of all child tables in a single round trip
+	if child_doctypes and not frappe.conf.developer_mode:
+		frappe.cache.hget_values("doctype_form_meta", child_doctypes)
+
+	bundle.extend(frappe.desk.form.meta.get_meta(child_doctype) for child_doctype in child_doctypes)
 	return bundle
 
 
 @frappe.whitelist()
-def get_docinfo(doc=None, doctype=None, name=None):
-	from frappe.share import _get_users as get_docshares
+def get_docinfo(doc=None, doctype=None, name=None, sections=None):
+	"""Sets `docinfo` (timeline, sidebar data etc.) of the document in response.
 
+	:param sections: [optional] List of sections of `DOCINFO_SECTIONS` to load. Default: all.
+	"""
 	if not doc:
 		doc = frappe.get_doc(doctype, name)
 		if not doc.has_permission("read"):
 			raise frappe.PermissionError
 
-	all_communications = _get_communications(doc.doctype, doc.name, limit=21)
-	automated_messages = [
-		msg for msg in all_communications if msg["communication_type"] == "Automated Message"
-	]
-	communications_except_auto_messages = [
-		msg for msg in all_communications if msg["communication_type"] != "Automated Message"
-	]
+	if sections:
+		sections = frappe.parse_json(sections)
 
-	docinfo = frappe._dict(user_info={})
+	docinfo = _get_docinfo(doc, sections or DOCINFO_SECTIONS)
+	if sections:
+		# only update the requested sections on the client
+		docinfo.partial = 1
 
-	add_comments(doc, docinfo)
+	frappe.response["docinfo"] = docinfo
 
-	docinfo.update(
-		{
-			"doctype": doc.doctype,
-			"name": doc.name,
-			"attachments": get_attachments(doc.doctype, doc.name),
-			"communications": communications_except_auto_messages,
-			"automated_messages": automated_messages,
-			"versions": get_versions(doc),
-			"assignments": get_assignments(doc.doctype, doc.name),
-			"permissions": get_doc_permissions(doc),
-			"shared": get_docshares(doc),
-			"views": get_view_logs(doc),
-			"energy_point_logs": get_point_logs(doc.doctype, doc.name),
-			"additional_timeline_content": get_additional_timeline_content(doc.doctype, doc.name),
-			"milestones": get_milestones(doc.doctype, doc.name),
-			"is_document_followed": is_document_followed(doc.doctype, doc.name, frappe.session.user),
-			"tags": get_tags(doc.doctype, doc.name),
-			"document_email": get_document_email(doc.doctype, doc.name),
-		}
-	)
+
+def _get_docinfo(doc, sections):
+	docinfo = frappe._dict(user_info={}, doctype=doc.doctype, name=doc.name)
+
+	for section in sections:
+		if section not in DOCINFO_SECTIONS:
+			frappe.throw(_("Invalid docinfo section: {0}").format(section))
+
+		docinfo.update(DOCINFO_SECTIONS[section](doc))
 
 	update_user_info(docinfo)
+	return docinfo
 
-	frappe.response["docinfo"] = docinfo
+
+def get_comment_logs(doc):
+	docinfo = frappe._dict()
+	add_comments(doc, docinfo)
+	# shared logs are superseded by the "shared" section
+	docinfo.pop("shared")
+	return docinfo
+
+
+def get_communication_logs(doc):
+	all_communications = _get_communications(doc.doctype, doc.name, limit=21)
+
+	return {
+		"communications": [
+			msg for msg in all_communications if msg["communication_type"] != "Automated Message"
+		],
+		"automated_messages": [
+			msg for msg in all_communications if msg["communication_type"] == "Automated Message"
+		],
+	}
+
+
+def get_docshares(doc):
+	from frappe.share import _get_users
+
+	return _get_users(doc)
+
+
+# each section is independent of the others and can be fetched separately
+DOCINFO_SECTIONS = {
+	"comments": get_comment_logs,
+	"communications": get_communication_logs,
+	"attachments": lambda doc: {"attachments": get_attachments(doc.doctype, doc.name)},
+	"versions": lambda doc: {"versions": get_versions(doc)},
+	"assignments": lambda doc: {"assignments": get_assignments(doc.doctype, doc.name)},
+	"permissions": lambda doc: {"permissions": get_doc_permissions(doc)},
+	"shared": lambda doc: {"shared": get_docshares(doc)},
+	"views": lambda doc: {"views": get_view_logs(doc)},
+	"energy_point_logs": lambda doc: {"energy_point_logs": get_point_logs(doc.doctype, doc.name)},
+	"additional_timeline_content": lambda doc: {
+		"additional_timeline_content": get_additional_timeline_content(doc.doctype, doc.name)
+	},
+	"milestones": lambda doc: {"milestones": get_milestones(doc.doctype, doc.name)},
+	"is_document_followed": lambda doc: {
+		"is_document_followed": is_document_followed(doc.doctype, doc.name, frappe.session.user)
+	},
+	"tags": lambda doc: {"tags": get_tags(doc.doctype, doc.name)},
+	"document_email": lambda doc: {"document_email": get_document_email(doc.doctype, doc.name)},
+}
+
+# sections only needed to render the timeline, with the docinfo keys they set
+LAZY_DOCINFO_SECTIONS = {
+	"communications": ("communications", "automated_messages"),
+	"versions": ("versions",),
+	"views": ("views",),
+	"energy_point_logs": ("energy_point_logs",),
+	"additional_timeline_content": ("additional_timeline_content",),
+	"milestones": ("milestones",),
+}
 
 
 def add_comments(doc, docinfo):
@@ -258,15 +322,21 @@ def get_point_logs(doctype, docname):
 
 def _get_communications(doctype, name, start=0, limit=20):
 	communications = get_communication_data(doctype, name, start, limit)
+	names = [c.name for c in communications if c.communication_type == "Communication"]
+	if not names:
+		return communications
+
+	attachments = defaultdict(list)
+	for file in frappe.get_all(
+		"File",
+		fields=["file_url", "is_private", "attached_to_name"],
+		filters={"attached_to_doctype": "Communication", "attached_to_name": ("in", names)},
+	):
+		attachments[file.pop("attached_to_name")].append(file)
+
 	for c in communications:
 		if c.communication_type == "Communication":
-			c.attachments = json.dumps(
-				frappe.get_all(
-					"File",
-					fields=["file_url", "is_private"],
-					filters={"attached_to_doctype": "Communication", "attached_to_name": c.name},
-				)
-			)
+			c.attachments = json.dumps(attachments[c.name])
 
 	return communications
 
@@ -416,15 +486,25 @@ def get_additional_timeline_content(doctype, docname):
 
 
 def set_link_titles(doc):
-	link_titles = {}
-	link_titles.update(get_title_values_for_link_and_dynamic_link_fields(doc))
-	link_titles.update(get_title_values_for_table_and_multiselect_fields(doc))
+	send_link_titles(get_link_titles(doc))
 
-	send_link_titles(link_titles)
 
+def get_link_titles(doc) -> dict[str, str]:
+	"""Returns titles of all links in `doc` and its child tables as `{"doctype::name": title}`.
 
-def get_title_values_for_link_and_dynamic_link_fields(doc, link_fields=None):
-	link_titles = {}
+	Titles are fetched with one query per linked doctype."""
+	links = get_link_values(doc)
+	for field in frappe.get_meta(doc.doctype).get_table_fields():
+		for row in doc.get(field.fieldname) or []:
+			links.extend(get_link_values(row))
+
+	return fetch_link_titles(links)
+
+
+def get_link_values(doc, link_fields=None) -> list[tuple[str, str]]:
+	"""Returns `(doctype, name)` of link and dynamic link values in `doc`,
+	for doctypes that show title in links"""
+	links = []
 
 	if not link_fields:
 		meta = frappe.get_meta(doc.doctype)
@@ -435,34 +515,67 @@ def get_title_values_for_link_and_dynamic_link_fields(doc, link_fields=None):
 			continue
 
 		doctype = field.options if field.fieldtype == "Link" else doc.get(field.options)
+		if not doctype:
+			continue
 
 		meta = frappe.get_meta(doctype)
 		if not meta or not (meta.title_field and meta.show_title_field_in_link):
 			continue
 
-		link_title = frappe.db.get_value(
-			doctype, doc.get(field.fieldname), meta.title_field, cache=True, order_by=None
-		)
-		link_titles.update({doctype + "::" + doc.get(field.fieldname): link_title})
+		links.append((doctype, doc.get(field.fieldname)))
+
+	return links
+
+
+def fetch_link_titles(links: list[tuple[str, str]]) -> dict[str, str]:
+	names_by_doctype = defaultdict(set)
+	for doctype, name in links:
+		names_by_doctype[doctype].add(name)
+
+	link_titles = {}
+	for doctype, names in names_by_doctype.items():
+		meta = frappe.get_meta(doctype)
+
+		if meta.issingle or meta.is_virtual:
+			titles = {
+				cstr(name).casefold(): frappe.db.get_value(doctype, name, meta.title_field, cache=True)
+				for name in names
+			}
+		else:
+			titles = {
+				cstr(name).casefold(): title
+				for name, title in frappe.get_all(
+					doctype,
+					filters={"name": ("in", list(names))},
+					fields=["name", meta.title_field],
+					order_by=None,
+					as_list=True,
+				)
+			}
+
+		for name in names:
+			# names are compared case insensitively by the database
+			link_titles[f"{doctype}::{name}"] = titles.get(cstr(name).casefold())
 
 	return link_titles
 
 
+def get_title_values_for_link_and_dynamic_link_fields(doc, link_fields=None):
+	return fetch_link_titles(get_link_values(doc, link_fields))
+
+
 def get_title_values_for_table_and_multiselect_fields(doc, table_fields=None):
-	link_titles = {}
+	links = []
 
 	if not table_fields:
 		meta = frappe.get_meta(doc.doctype)
 		table_fields = meta.get_table_fields()
 
 	for field in table_fields:
-		if not doc.get(field.fieldname):
-			continue
-
-		for value in doc.get(field.fieldname):
-			link_titles.update(get_title_values_for_link_and_dynamic_link_fields(value))
+		for value in doc.get(field.fieldname) or []:
+			links.extend(get_link_values(value))
 
-	return link_titles
+	return fetch_link_titles(links)
 
 
 def send_link_titles(link_titles):
@@ -476,16 +589,16 @@ def send_link_titles(link_titles):
 def update_user_info(docinfo):
 	users = set()
 
-	users.update(d.sender for d in docinfo.communications)
-	users.update(d.user for d in docinfo.shared)
-	users.update(d.owner for d in docinfo.assignments)
-	users.update(d.owner for d in docinfo.views)
-	users.update(d.owner for d in docinfo.workflow_logs)
-	users.update(d.owner for d in docinfo.like_logs)
-	users.update(d.owner for d in docinfo.info_logs)
-	users.update(d.owner for d in docinfo.attachment_logs)
-	users.update(d.owner for d in docinfo.assignment_logs)
-	users.update(d.owner for d in docinfo.comments)
+	users.update(d.sender for d in docinfo.get("communications", []))
+	users.update(d.user for d in docinfo.get("shared", []))
+	users.update(d.owner for d in docinfo.get("assignments", []))
+	users.update(d.owner for d in docinfo.get("views", []))
+	users.update(d.owner for d in docinfo.get("workflow_logs", []))
+	users.update(d.owner for d in docinfo.get("like_logs", []))
+	users.update(d.owner for d in docinfo.get("info_logs", []))
+	users.update(d.owner for d in docinfo.get("attachment_logs", []))
+	users.update(d.owner for d in docinfo.get("assignment_logs", []))
+	users.update(d.owner for d in docinfo.get("comments", []))
 
 	frappe.utils.add_user_info(users, docinfo.user_info)
 
@@ -5,7 +5,7 @@
 import copy
 import json
 import re
-from collections import Counter
+from collections import Counter, defaultdict
 from datetime import datetime
 
 import frappe
@@ -56,6 +56,10 @@ ORDER_GROUP_PATTERN = re.compile(r".*[^a-z0-9-_ ,`'\"\.\(\)].*")
 FN_PARAMS_PATTERN = re.compile(r".*?\((.*)\).*")
 SPECIAL_FIELD_CHARS = frozenset(("(", "`", ".", "'", '"', "*"))
 
+# compiled select, from, order by & group by clauses of queries, keyed by query shape
+_COMPILED_QUERY_CACHE = defaultdict(dict)
+COMPILED_QUERY_CACHE_MAXSIZE = 512
+
 
 class DatabaseQuery:
 	def __init__(self, doctype, user=None):
@@ -213,7 +217,12 @@ class DatabaseQuery:
 		return result
 
 	def build_and_run(self):
-		args = self.prepare_args()
+		if compiled_query := self.get_compiled_query():
+			args = self.bind_compiled_query(compiled_query)
+		else:
+			args = self.prepare_args()
+			self.set_compiled_query(args)
+
 		args.limit = self.add_limit()
 
 		if args.conditions:
@@ -274,13 +283,7 @@ class DatabaseQuery:
 		for link in self.link_tables:
 			args.tables += f" {self.join} {link.table_name} {link.table_alias} on ({link.table_alias}.`name` = {self.tables[0]}.`{link.fieldname}`)"
 
-		if self.grouped_or_conditions:
-			self.conditions.append(f"({' or '.join(self.grouped_or_conditions)})")
-
-		args.conditions = " and ".join(self.conditions)
-
-		if self.or_conditions:
-			args.conditions += (" or " if args.conditions else "") + " or ".join(self.or_conditions)
+		args.conditions = self.get_conditions()
 
 		self.set_field_tables()
 		self.cast_name_fields()
@@ -320,6 +323,102 @@ class DatabaseQuery:
 
 		return args
 
+	def get_conditions(self) -> str:
+		if self.grouped_or_conditions:
+			self.conditions.append(f"({' or '.join(self.grouped_or_conditions)})")
+
+		conditions = " and ".join(self.conditions)
+
+		if self.or_conditions:
+			conditions += (" or " if conditions else "") + " or ".join(self.or_conditions)
+
+		return conditions
+
+	def get_query_shape(self) -> tuple | None:
+		"""Returns a key for everything that decides the select, from, order by and group by
+		clauses of the query. Filter values only affect the where clause and are not part of it."""
+		try:
+			shape = (
+				self.doctype,
+				self.fields if isinstance(self.fields, str) else tuple(self.fields),
+				get_filters_shape(self.filters),
+				get_filters_shape(self.or_filters),
+				self.group_by,
+				self.order_by,
+				self.distinct,
+				self.as_list,
+				self.with_childnames,
+				self.join,
+				self.strict,
+				bool(self.flags.ignore_permissions),
+				self.parent_doctype,
+				tuple(sorted(frappe.get_roles(self.user))),
+				tuple(self.columns),
+			)
+			hash(shape)
+		except TypeError:
+			# unhashable fields or filters, don't cache
+			return None
+
+		return shape
+
+	def get_compiled_query(self) -> frappe._dict | None:
+		if not getattr(frappe.local, "site", None) or not (shape := self.get_query_shape()):
+			return None
+
+		self.query_shape = shape
+		compiled_query = _COMPILED_QUERY_CACHE[frappe.local.site].get(shape)
+
+		# compiled clauses are invalid once any of the involved doctypes' meta is rebuilt
+		if compiled_query and all(
+			get_meta_cache_token(doctype) == token for doctype, token in compiled_query.meta_tokens.items()
+		):
+			return compiled_query
+
+	def set_compiled_query(self, args):
+		if not getattr(self, "query_shape", None):
+			return
+
+		doctypes = {self.doctype, *self.permission_map, *(d.doctype for d in self.link_tables)}
+		doctypes.update(t[4:-1] for t in self.tables)
+		if self.parent_doctype:
+			doctypes.add(self.parent_doctype)
+
+		meta_tokens = {doctype: get_meta_cache_token(doctype) for doctype in doctypes}
+		if not all(meta_tokens.values()):
+			return
+
+		cache = _COMPILED_QUERY_CACHE[frappe.local.site]
+		if len(cache) >= COMPILED_QUERY_CACHE_MAXSIZE:
+			cache.pop(next(iter(cache)), None)
+
+		cache[self.query_shape] = frappe._dict(
+			args=frappe._dict(args, conditions=None),
+			tables=self.tables.copy(),
+			link_tables=copy.deepcopy(self.link_tables),
+			linked_table_aliases=self.linked_table_aliases.copy(),
+			permission_map=self.permission_map.copy(),
+			meta_tokens=meta_tokens,
+		)
+
+	def bind_compiled_query(self, compiled_query):
+		"""Prepare args from a compiled query by only building the conditions"""
+		self.tables = compiled_query.tables.copy()
+		self.link_tables = copy.deepcopy(compiled_query.link_tables)
+		self.linked_table_aliases = compiled_query.linked_table_aliases.copy()
+
+		# permissions can depend on shared documents, so these are always re-evaluated
+		for doctype in compiled_query.permission_map:
+			self.check_read_permission(doctype)
+
+		self.parse_filters()
+		self.remove_optional_filters()
+		self.build_conditions()
+
+		args = frappe._dict(compiled_query.args)
+		args.conditions = self.get_conditions()
+		return args
+
 	def prepare_select_args(self, args):
 		order_field = ORDER_BY_PATTERN.sub("", args.order_by)
 
@@ -369,6 +468,9 @@ class DatabaseQuery:
 					field = f"{field} as {alias}"
 				self.fields[self.fields.index(original_field)] = field
 
+		self.parse_filters()
+
+	def parse_filters(self):
 		for filter_name in ["filters", "or_filters"]:
 			filters = getattr(self, filter_name)
 			if isinstance(filters, str):
@@ -566,7 +668,9 @@ class DatabaseQuery:
 		for fld in to_remove:
 			del self.fields[self.fields.index(fld)]
 
-		# remove from filters
+		self.remove_optional_filters()
+
+	def remove_optional_filters(self):
 		to_remove = []
 		for each in self.filters:
 			if isinstance(each, str):
@@ -1207,6 +1311,38 @@ def check_parent_permission(parent, child_doctype):
 	raise frappe.PermissionError
 
 
+def get_meta_cache_token(doctype: str) -> str | None:
+	try:
+		return getattr(frappe.get_meta(doctype), "_cache_token", None)
+	except frappe.DoesNotExistError:
+		return None
+
+
+def get_filters_shape(filters) -> tuple | str:
+	"""Returns filters without their values, e.g. `(("status", "="), ("modified", ">"))`"""
+	if isinstance(filters, str):
+		# JSON encoded, can't tell values apart without parsing
+		return filters
+
+	if isinstance(filters, dict):
+		return tuple(
+			(key, value[0] if isinstance(value, (list, tuple)) else None) for key, value in filters.items()
+		)
+
+	shape = []
+	for f in filters:
+		if isinstance(f, str):
+			shape.append(f)
+		elif isinstance(f, dict):
+			shape.append(get_filters_shape(f))
+		elif isinstance(f, (list, tuple)) and len(f) > 2:
+			shape.append(tuple(f[:-1]))
+		else:
+			shape.append(tuple(f))
+
+	return tuple(shape)
+
+
 def get_order_by(doctype, meta):
 	order_by = ""
 
@@ -4,6 +4,7 @@ import hashlib
 import json
 import time
 from collections.abc import Generator, Iterable
+from functools import partial
 from typing import TYPE_CHECKING, Any, Optional
 
 from werkzeug.exceptions import NotFound
@@ -12,6 +13,7 @@ import frappe
 from frappe import _, is_whitelisted, msgprint
 from frappe.core.doctype.file.utils import relink_mismatched_files
 from frappe.core.doctype.server_script.server_script_utils import run_server_script_for_doc_event
+from frappe.deferred_insert import deferred_insert, is_write_behind_enabled
 from frappe.desk.form.document_follow import follow_document
 from frappe.integrations.doctype.webhook import run_webhooks
 from frappe.model import optional_fields, table_fields
@@ -290,9 +292,20 @@ class Document(BaseDocument):
 
 		# run validate, on update etc.
 
+		write_behind = self.meta.get("write_behind") and is_write_behind_enabled()
+
 		# parent
 		if getattr(self.meta, "issingle", 0):
 			self.update_single(self.get_valid_dict())
+		elif write_behind:
+			# queued only once the request commits, rolled back inserts must not be flushed later
+			frappe.db.after_commit.add(
+				partial(
+					deferred_insert,
+					self.doctype,
+					self.get_valid_dict(convert_dates_to_str=True, ignore_virtual=True),
+				)
+			)
 		else:
 			self.db_insert(ignore_if_duplicate=ignore_if_duplicate)
 
@@ -300,15 +313,20 @@ class Document(BaseDocument):
 		for d in self.get_all_children():
 			d.db_insert()
 
-		self.run_method("after_insert")
-		self.flags.in_insert = True
+		if write_behind:
+			# the row is only written once deferred inserts are flushed, so hooks that work with it
+			# (after_insert, on_update, on_change and their doc_events) are not run
+			frappe.flags.currently_saving.remove((self.doctype, self.name))
+		else:
+			self.run_method("after_insert")
+			self.flags.in_insert = True
 
-		if self.get("amended_from"):
-			self.copy_attachments_from_amended_from()
+			if self.get("amended_from"):
+				self.copy_attachments_from_amended_from()
 
-		relink_mismatched_files(self)
-		self.run_post_save_methods()
-		self.flags.in_insert = False
+			relink_mismatched_files(self)
+			self.run_post_save_methods()
+			self.flags.in_insert = False
 
 		# delete __islocal
 		if hasattr(self, "__islocal"):
@@ -319,7 +337,10 @@ class Document(BaseDocument):
 			delattr(self, "__unsaved")
 
 		if not (
-			frappe.flags.in_migrate or frappe.local.flags.in_install or frappe.flags.in_setup_wizard
+			write_behind
+			or frappe.flags.in_migrate
+			or frappe.local.flags.in_install
+			or frappe.flags.in_setup_wizard
 		):
 			if frappe.get_cached_value("User", frappe.session.user, "follow_created_documents"):
 				follow_document(self.doctype, self.name, frappe.session.user)
@@ -1597,8 +1618,6 @@ class Document(BaseDocument):
 		before data is flushed to database.
 		"""
 
-		from frappe.deferred_insert import deferred_insert
-
 		self.set_user_and_timestamp()
 
 		doc = self.get_valid_dict(convert_dates_to_str=True, ignore_virtual=True)
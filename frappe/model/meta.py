@@ -118,6 +118,9 @@ class Meta(Document):
 
 		self.process()
 
+		# changes every time meta is rebuilt, used to invalidate values derived from it
+		self._cache_token = frappe.generate_hash(length=10)
+
 	def load_from_db(self):
 		try:
 			super().load_from_db()
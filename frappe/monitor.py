@@ -3,8 +3,11 @@
 
 import json
 import os
+import time
 import traceback
 import uuid
+from bisect import bisect_left
+from collections import defaultdict
 from datetime import datetime
 
 import rq
@@ -13,6 +16,15 @@ import frappe
 
 MONITOR_REDIS_KEY = "monitor-transactions"
 MONITOR_MAX_ENTRIES = 1000000
+CACHE_STATS_KEY = "cache-stats"
+CACHE_STATS_COUNTERS = ("hits", "misses", "time", "generator_time", "bytes")
+JOB_STATS_KEY = "job-stats"
+# Histograms of job wait, run and db times (ms) and query counts
+JOB_STATS_METRICS = ("wait", "duration", "db_time", "queries")
+JOB_STATS_BUCKETS = tuple(m * 10**e for e in range(7) for m in (1, 2, 5))
+JOB_STATS_PERCENTILES = (50, 95, 99)
+# Seconds for which workers that don't fork buffer job metrics before adding them to redis
+JOB_STATS_FLUSH_INTERVAL = 10
 
 
 def start(transaction_type="request", method=None, kwargs=None):
@@ -32,6 +44,151 @@ def add_data_to_monitor(**kwargs) -> None:
 		frappe.local.monitor.add_custom_data(**kwargs)
 
 
+def add_cache_stats(cache: str, key: str, **counters) -> None:
+	"""Count a cache access in the monitor log of the current transaction.
+
+	:param cache: Cache used, e.g. `redis` or `site_cache`
+	:param key: Key prefix or function the access is grouped by
+	:param counters: Increments of `CACHE_STATS_COUNTERS`, times are in microseconds
+	"""
+	if monitor := getattr(frappe.local, "monitor", None):
+		monitor.add_cache_stats(cache, key, counters)
+
+
+def get_cache_stats() -> dict:
+	"""Returns cache counters of the current site aggregated from monitor logs,
+	`{(cache, key): {counter: value}}`, sorted by time spent."""
+	stats = {}
+	for field, value in frappe.cache.hscan_iter(frappe.cache.make_key(CACHE_STATS_KEY)):
+		name, counter = frappe.safe_decode(field).rsplit(":", 1)
+		cache, key = name.split(":", 1)
+		group = stats.setdefault((cache, key), dict.fromkeys(CACHE_STATS_COUNTERS, 0))
+		group[counter] = int(value)
+
+	return dict(
+		sorted(
+			stats.items(),
+			key=lambda item: item[1]["time"] + item[1]["generator_time"],
+			reverse=True,
+		)
+	)
+
+
+def reset_cache_stats() -> None:
+	frappe.cache.delete_value(CACHE_STATS_KEY)
+
+
+def add_query_time(seconds: float) -> None:
+	"""Count a query in the monitor log of the current transaction."""
+	if monitor := getattr(frappe.local, "monitor", None):
+		monitor.data.queries = monitor.data.get("queries", 0) + 1
+		monitor.data.db_time = monitor.data.get("db_time", 0) + int(seconds * 1000000)
+
+
+def set_job_status(status: str) -> None:
+	"""Record how the current job ended if it didn't finish, `failed` or `retried`."""
+	if (monitor := getattr(frappe.local, "monitor", None)) and monitor.data.get("job"):
+		monitor.data.job.status = status
+
+
+def get_job_stats(group_by: str = "method") -> dict:
+	"""Returns job metrics of the current site aggregated from monitor logs, grouped by `method`,
+	`queue` or `priority`:
+	`{name: {"count", "failures", "retries", "missed", <metric>: {"p50", ..., "avg"}}}`.
+
+	`missed` is the number of jobs which started after their deadline. Percentiles are the upper
+	bound of the histogram bucket they fall in."""
+	groups = {}
+	for field, value in frappe.cache.hscan_iter(frappe.cache.make_key(JOB_STATS_KEY)):
+		method, queue, priority, *counter = frappe.safe_decode(field).split("|")
+		name = {"method": method, "queue": queue, "priority": priority}[group_by]
+		group = groups.setdefault(name, defaultdict(int))
+		group["|".join(counter)] += int(value)
+
+	stats = {}
+	for name, counters in groups.items():
+		count = counters["count"]
+		stats[name] = {
+			"count": count,
+			"failures": counters["failures"],
+			"retries": counters["retries"],
+			"missed": counters["missed"],
+		}
+		for metric in JOB_STATS_METRICS:
+			histogram = [
+				(bucket, counters[f"{metric}|{bucket}"])
+				for bucket in (*JOB_STATS_BUCKETS, "inf")
+				if counters[f"{metric}|{bucket}"]
+			]
+			stats[name][metric] = {
+				**{f"p{p}": get_percentile(histogram, count * p / 100) for p in JOB_STATS_PERCENTILES},
+				"avg": counters[f"{metric}|sum"] / count if count else 0,
+			}
+
+	return dict(sorted(stats.items(), key=lambda item: item[1]["count"], reverse=True))
+
+
+def get_percentile(histogram: list[tuple[int | str, int]], rank: float) -> float:
+	seen = 0
+	for bucket, count in histogram:
+		seen += count
+		if seen >= rank:
+			return float(bucket)
+	return 0
+
+
+def reset_job_stats() -> None:
+	frappe.cache.delete_value(JOB_STATS_KEY)
+
+
+class JobStats:
+	"""Job metrics histograms of this process, added to redis every `flush_interval` seconds.
+
+	Forked work horses run a single job, so they flush after every job. Workers that run jobs
+	themselves can buffer them for a while.
+	"""
+
+	def __init__(self, flush_interval: float = 0):
+		self.flush_interval = flush_interval
+		self.counters = defaultdict(int)  # (redis key, field) -> increment
+		self.flushed_at = time.monotonic()
+
+	def add(self, data: dict) -> None:
+		key = frappe.cache.make_key(JOB_STATS_KEY)
+		prefix = f"{data.job.method}|{data.job.get('queue') or ''}|{data.job.get('priority') or ''}"
+		self.counters[(key, f"{prefix}|count")] += 1
+		if data.job.get("missed_deadline"):
+			self.counters[(key, f"{prefix}|missed")] += 1
+		if status := data.job.get("status"):
+			self.counters[(key, f"{prefix}|{'failures' if status == 'failed' else 'retries'}")] += 1
+
+		for metric, value in (
+			("wait", data.job.wait / 1000),
+			("duration", data.duration / 1000),
+			("db_time", data.get("db_time", 0) / 1000),
+			("queries", data.get("queries", 0)),
+		):
+			index = bisect_left(JOB_STATS_BUCKETS, value)
+			bucket = JOB_STATS_BUCKETS[index] if index < len(JOB_STATS_BUCKETS) else "inf"
+			self.counters[(key, f"{prefix}|{metric}|{bucket}")] += 1
+			self.counters[(key, f"{prefix}|{metric}|sum")] += int(value)
+
+		if time.monotonic() - self.flushed_at >= self.flush_interval:
+			self.flush()
+
+	def flush(self) -> None:
+		if self.counters:
+			pipeline = frappe.cache.pipeline(transaction=False)
+			for (key, field), value in self.counters.items():
+				pipeline.hincrby(key, field, value)
+			pipeline.execute()
+			self.counters.clear()
+		self.flushed_at = time.monotonic()
+
+
+job_stats = JobStats()
+
+
 def get_trace_id() -> str | None:
 	"""Get unique ID for current transaction."""
 	if monitor := getattr(frappe.local, "monitor", None):
@@ -76,6 +233,8 @@ class Monitor:
 			self.data.uuid = request_id
 
 	def collect_job_meta(self, method, kwargs):
+		from frappe.utils.background_jobs import parse_qname
+
 		self.data.job = frappe._dict({"method": method, "scheduled": False, "wait": 0})
 		if "run_scheduled_job" in method:
 			self.data.job.method = kwargs["job_type"]
@@ -83,13 +242,22 @@ class Monitor:
 
 		if job := rq.get_current_job():
 			self.data.uuid = job.id
+			self.data.job.queue = parse_qname(job.origin)[0]
 			waitdiff = self.data.timestamp - job.enqueued_at
 			self.data.job.wait = int(waitdiff.total_seconds() * 1000000)
+			if priority := job.meta.get("priority"):
+				self.data.job.priority = priority
+				self.data.job.missed_deadline = waitdiff.total_seconds() > job.meta["max_wait"]
 
 	def add_custom_data(self, **kwargs):
 		if self.data:
 			self.data.update(kwargs)
 
+	def add_cache_stats(self, cache, key, counters):
+		stats = self.data.setdefault("cache", {}).setdefault(f"{cache}:{key}", {})
+		for counter, value in counters.items():
+			stats[counter] = stats.get(counter, 0) + value
+
 	def dump(self, response=None):
 		try:
 			timediff = datetime.utcnow() - self.data.timestamp
@@ -119,6 +287,21 @@ class Monitor:
 		serialized = json.dumps(self.data, sort_keys=True, default=str, separators=(",", ":"))
 		frappe.cache.rpush(MONITOR_REDIS_KEY, serialized)
 
+		if self.data.get("cache"):
+			self.store_cache_stats()
+
+		if self.data.transaction_type == "job":
+			job_stats.add(self.data)
+
+	def store_cache_stats(self):
+		"""Add this transaction's cache counters to the site's totals, see `get_cache_stats`."""
+		key = frappe.cache.make_key(CACHE_STATS_KEY)
+		pipeline = frappe.cache.pipeline(transaction=False)
+		for name, stats in self.data.cache.items():
+			for counter, value in stats.items():
+				pipeline.hincrby(key, f"{name}:{counter}", int(value))
+		pipeline.execute()
+
 
 def flush():
 	try:
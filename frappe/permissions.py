@@ -202,6 +202,162 @@ def get_doc_permissions(doc, user=None, ptype=None):
 	return permissions
 
 
+def has_permission_many(doctype, docs, ptype="read", user=None) -> set[str]:
+	"""Returns names of documents from `docs` for which `user` has `ptype` permission.
+
+	Evaluates the same rules as `has_permission` with `doc` passed, but role permissions
+	are resolved once and owner and user permission constraints are checked against
+	a single fetch of the documents instead of loading each one.
+
+	:param doctype: DocType of the documents.
+	:param docs: List of document names or document objects.
+	:param ptype: Permission type to check. Default: `read`.
+	:param user: User to check permission for. Defaults to current user.
+	"""
+	if not user:
+		user = frappe.session.user
+
+	names = {get_doc_name(doc) for doc in docs if doc}
+	if not names:
+		return set()
+
+	if user == "Administrator":
+		return names
+
+	if ptype == "share" and frappe.get_system_settings("disable_document_sharing"):
+		return set()
+
+	meta = frappe.get_meta(doctype)
+
+	if (
+		meta.istable
+		or meta.issingle
+		or meta.is_virtual
+		or frappe.get_hooks("has_permission").get(doctype)
+	):
+		# controller permissions and child/virtual documents need the full document
+		return {
+			name
+			for name in names
+			if has_permission(doctype, ptype, doc=name, user=user, raise_exception=False)
+		}
+
+	def evaluated_permissions(is_owner):
+		# mirrors `get_doc_permissions` for documents passing the user permission check
+		permissions = copy.deepcopy(get_role_permissions(meta, user=user, is_owner=is_owner))
+		if not cint(meta.is_submittable):
+			permissions["submit"] = 0
+		if not cint(meta.allow_import):
+			permissions["import"] = 0
+		if permissions.get("has_if_owner_enabled"):
+			permissions.update(permissions.get("if_owner", {}))
+		return permissions
+
+	owner_permissions = evaluated_permissions(is_owner=True)
+	other_permissions = evaluated_permissions(is_owner=False)
+
+	allowed = set()
+	if owner_permissions.get(ptype) or other_permissions.get(ptype):
+		owners, restricted = get_user_permission_matches(meta, names, user)
+		for name, owner in owners.items():
+			is_owner = (owner or "").lower() == user.lower()
+			if name in restricted:
+				# failed user permissions, only `if_owner` rights (without create) apply
+				if is_owner and ptype != "create" and owner_permissions.get("if_owner", {}).get(ptype):
+					allowed.add(name)
+			elif (owner_permissions if is_owner else other_permissions).get(ptype):
+				allowed.add(name)
+
+	not_allowed = names - allowed
+	if not_allowed and ptype in ("read", "write", "share", "submit", "email", "print"):
+		if ptype in ("read", "write", "share", "submit") or meta.permissions[0].get(ptype):
+			rights = ["read" if ptype in ("email", "print") else ptype]
+			allowed.update(
+				frappe.share.get_shared(
+					doctype, user, rights=rights, filters=[["share_name", "in", list(not_allowed)]]
+				)
+			)
+
+	return allowed
+
+
+def get_user_permission_matches(meta, names, user):
+	"""Returns `{name: owner}` of existing documents in `names` and the set of names
+	that are restricted by User Permissions (see `has_user_permission`)"""
+	from frappe.core.doctype.user_permission.user_permission import get_user_permissions
+
+	user_permissions = get_user_permissions(user)
+	doctype = meta.name
+
+	if not user_permissions or get_role_permissions("User Permission", user=user).get("write"):
+		owners = frappe.get_all(
+			doctype, filters={"name": ("in", list(names))}, fields=["name", "owner"], as_list=True
+		)
+		return dict(owners), set()
+
+	apply_strict_user_permissions = frappe.get_system_settings("apply_strict_user_permissions")
+
+	def get_restricted_link_fields(link_meta):
+		return [
+			df
+			for df in link_meta.get_link_fields()
+			if not df.ignore_user_permissions and df.options in user_permissions
+		]
+
+	def is_permitted(row, link_fields):
+		for df in link_fields:
+			value = row.get(df.fieldname)
+			if not value and not apply_strict_user_permissions:
+				continue
+
+			allowed_docs = get_allowed_docs_for_doctype(user_permissions.get(df.options, []), doctype)
+			if allowed_docs and value not in allowed_docs:
+				return False
+
+		return True
+
+	link_fields = get_restricted_link_fields(meta)
+	rows = frappe.get_all(
+		doctype,
+		filters={"name": ("in", list(names))},
+		fields=["name", "owner", *(df.fieldname for df in link_fields)],
+	)
+
+	self_allowed_docs = None
+	if doctype in user_permissions:
+		self_allowed_docs = get_allowed_docs_for_doctype(user_permissions[doctype], doctype)
+
+	owners = {}
+	restricted = set()
+	for row in rows:
+		owners[row.name] = row.owner
+		if (self_allowed_docs and row.name not in self_allowed_docs) or not is_permitted(
+			row, link_fields
+		):
+			restricted.add(row.name)
+
+	# check link fields in child tables, one query per table
+	for table_field in meta.get_table_fields():
+		child_link_fields = get_restricted_link_fields(frappe.get_meta(table_field.options))
+		candidates = [name for name in owners if name not in restricted]
+		if not child_link_fields or not candidates:
+			continue
+
+		for child in frappe.get_all(
+			table_field.options,
+			filters={
+				"parent": ("in", candidates),
+				"parenttype": doctype,
+				"parentfield": table_field.fieldname,
+			},
+			fields=["parent", *(df.fieldname for df in child_link_fields)],
+		):
+			if not is_permitted(child, child_link_fields):
+				restricted.add(child.parent)
+
+	return owners, restricted
+
+
 def get_role_permissions(doctype_meta, user=None, is_owner=None):
 	"""
 	Returns dict of evaluated role permissions like
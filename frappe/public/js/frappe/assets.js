@@ -62,11 +62,14 @@ frappe.assets = {
 				key.indexOf("desk_assets:") === 0 ||
 				key.indexOf("_page:") === 0 ||
 				key.indexOf("_doctype:") === 0 ||
+				key.indexOf("boot_section:") === 0 ||
 				key.indexOf("preferred_breadcrumbs:") === 0
 			) {
 				localStorage.removeItem(key);
 			}
 		}
+		// boot sections are gone, don't let the server skip them
+		document.cookie = "boot_sections=; path=/app; max-age=0";
 		console.log("localStorage cleared");
 	},
 
@@ -632,6 +632,28 @@ frappe.ui.form.Form = class FrappeForm {
 				this.scroll_to_element();
 			});
 		});
+
+		this.load_pending_docinfo();
+	}
+
+	load_pending_docinfo() {
+		// sections of docinfo that were skipped while loading the document
+		const docinfo = frappe.model.get_docinfo(this.doctype, this.docname);
+		const sections = docinfo && docinfo.pending_sections;
+		if (!sections || !sections.length || this.is_new()) return;
+
+		docinfo.pending_sections = [];
+		return frappe.call({
+			method: "frappe.desk.form.load.get_docinfo",
+			args: {
+				doctype: this.doctype,
+				name: this.docname,
+				sections: sections,
+			},
+			callback: () => {
+				this.timeline && this.timeline.refresh();
+			},
+		});
 	}
 
 	onload_post_render() {
@@ -1309,9 +1331,14 @@ frappe.ui.form.Form = class FrappeForm {
 
 		if (!this.doc.__islocal) {
 			frappe.model.remove_from_locals(this.doctype, this.docname);
-			return frappe.model.with_doc(this.doctype, this.docname, () => {
-				this.refresh();
-			});
+			return frappe.model.with_doc(
+				this.doctype,
+				this.docname,
+				() => {
+					this.refresh();
+				},
+				true
+			);
 		}
 	}
 
@@ -295,7 +295,7 @@ $.extend(frappe.model, {
 		}
 	},
 
-	with_doc: function (doctype, name, callback) {
+	with_doc: function (doctype, name, callback, lazy_docinfo) {
 		return new Promise((resolve) => {
 			if (!name) name = doctype; // single type
 			if (
@@ -312,6 +312,8 @@ $.extend(frappe.model, {
 					args: {
 						doctype: doctype,
 						name: name,
+						// set by forms, which load timeline sections once they are rendered
+						lazy_docinfo: lazy_docinfo ? 1 : 0,
 					},
 					callback: function (r) {
 						callback && callback(name, r);
@@ -60,7 +60,15 @@ Object.assign(frappe.model, {
 			if (!frappe.model.docinfo[doctype]) {
 				frappe.model.docinfo[doctype] = {};
 			}
-			frappe.model.docinfo[doctype][name] = r.docinfo;
+
+			const partial = r.docinfo.partial;
+			delete r.docinfo.partial;
+			if (partial && frappe.model.docinfo[doctype][name]) {
+				// only some sections were fetched, keep the rest
+				Object.assign(frappe.model.docinfo[doctype][name], r.docinfo);
+			} else {
+				frappe.model.docinfo[doctype][name] = r.docinfo;
+			}
 
 			// copy values to frappe.boot.user_info
 			Object.assign(frappe.boot.user_info, r.docinfo.user_info);
@@ -1,15 +1,81 @@
 # Copyright (c) 2020, Frappe Technologies Pvt. Ltd. and Contributors
 # License: MIT. See LICENSE
 
+import threading
+import time
 from collections.abc import Callable
 from datetime import datetime
 from functools import wraps
+from typing import NamedTuple
 
 from werkzeug.wrappers import Response
 
 import frappe
 from frappe import _
-from frappe.utils import cint
+
+# Sliding window counter: usage is the count of the current fixed window plus the count of the
+# previous one weighted by how much of it still overlaps the sliding window. Checking and
+# consuming happen in a single atomic call.
+#
+# KEYS: counter of the current window, counter of the previous window
+# ARGV: limit, cost, weight of the previous window, window length, consume even if over limit
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call("GET", KEYS[1]) or 0)
+local previous = tonumber(redis.call("GET", KEYS[2]) or 0)
+local used = current + previous * tonumber(ARGV[3])
+local cost = tonumber(ARGV[2])
+local allowed = used + cost <= tonumber(ARGV[1])
+
+if cost > 0 and (allowed or ARGV[5] == "1") then
+	redis.call("INCRBY", KEYS[1], cost)
+	redis.call("EXPIRE", KEYS[1], tonumber(ARGV[4]) * 2)
+	used = used + cost
+end
+
+return {allowed and 1 or 0, math.floor(used)}
+"""
+
+_sliding_window_script = None
+
+# Durations of this process' finished requests by counter key, charged by the next request's
+# check (see `RateLimiter`)
+_pending_costs: dict[str, int] = {}
+_pending_costs_lock = threading.Lock()
+
+
+class WindowUsage(NamedTuple):
+	allowed: bool
+	used: int
+	reset: int
+	key: str
+
+
+def consume(key: str, limit: int, window: int, cost: int = 1, force: bool = False) -> WindowUsage:
+	"""Check usage of `key` in the sliding `window` (in seconds) and consume `cost` from it if
+	it doesn't exceed `limit`, in a single round trip.
+
+	:param key: Redis key (with site prefix if required) the window counters are prefixed with
+	:param cost: Amount to consume, `0` only checks the current usage
+	:param force: Consume `cost` even if it exceeds the limit
+	:return: whether the usage (with `cost`) is within `limit`, the usage, seconds until the
+	        current fixed window ends and the key of its counter.
+	"""
+	now = time.time()
+	window_number, elapsed = divmod(now, window)
+	current_key = f"{key}:{int(window_number)}"
+	previous_key = f"{key}:{int(window_number) - 1}"
+
+	global _sliding_window_script
+	if _sliding_window_script is None:
+		_sliding_window_script = frappe.cache.register_script(SLIDING_WINDOW_SCRIPT)
+
+	allowed, used = _sliding_window_script(
+		keys=[current_key, previous_key],
+		args=[limit, cost, (window - elapsed) / window, window, int(force)],
+		client=frappe.cache,
+	)
+
+	return WindowUsage(bool(allowed), used, int(window - elapsed), current_key)
 
 
 def apply():
@@ -30,18 +96,26 @@ def respond():
 
 
 class RateLimiter:
+	"""Limits the time spent on a site's requests (in microseconds) per `window` seconds.
+
+	A request's duration is only known once it ends, it's charged along with the check of the
+	next request handled by this process for the site, so that each request makes a single call.
+	"""
+
 	def __init__(self, limit, window):
 		self.limit = int(limit * 1000000)
 		self.window = window
 
 		self.start = datetime.utcnow()
-		timestamp = int(frappe.utils.now_datetime().timestamp())
+		self.prefix = frappe.cache.make_key("rate-limit-counter").decode()
 
-		self.window_number, self.spent = divmod(timestamp, self.window)
-		self.key = frappe.cache.make_key(f"rate-limit-counter-{self.window_number}")
-		self.counter = cint(frappe.cache.get(self.key))
+		with _pending_costs_lock:
+			cost = _pending_costs.pop(self.prefix, 0)
+		usage = consume(self.prefix, self.limit, self.window, cost=cost, force=True)
+		self.key = usage.key
+		self.counter = usage.used
 		self.remaining = max(self.limit - self.counter, 0)
-		self.reset = self.window - self.spent
+		self.reset = usage.reset
 
 		self.end = None
 		self.duration = None
@@ -57,10 +131,8 @@ class RateLimiter:
 
 	def update(self):
 		self.record_request_end()
-		pipeline = frappe.cache.pipeline()
-		pipeline.incrby(self.key, self.duration)
-		pipeline.expire(self.key, self.window)
-		pipeline.execute()
+		with _pending_costs_lock:
+			_pending_costs[self.prefix] = _pending_costs.get(self.prefix, 0) + self.duration
 
 	def headers(self):
 		self.record_request_end()
@@ -97,7 +169,7 @@ def rate_limit(
 	"""Decorator to rate limit an endpoint.
 
 	This will limit Number of requests per endpoint to `limit` within `seconds`.
-	Uses redis cache to track request counts.
+	Uses a sliding window in redis cache to track request counts (see `consume`).
 
 	:param key: Key is used to identify the requests uniqueness (Optional)
 	:param limit: Maximum number of requests to allow with in window time
@@ -139,12 +211,7 @@ def rate_limit(
 
 			cache_key = f"rl:{frappe.form_dict.cmd}:{identity}"
 
-			value = frappe.cache.get(cache_key) or 0
-			if not value:
-				frappe.cache.setex(cache_key, seconds, 0)
-
-			value = frappe.cache.incrby(cache_key, 1)
-			if value > _limit:
+			if not consume(cache_key, _limit, seconds).allowed:
 				frappe.throw(
 					_("You hit the rate limit because of too many requests. Please try after sometime.")
 				)
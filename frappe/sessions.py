@@ -125,9 +125,14 @@ def clear_expired_sessions():
 		delete_session(sid, reason="Session Expired")
 
 
-def get():
-	"""get session boot info"""
-	from frappe.boot import get_bootinfo, get_unseen_notes
+def get(cached_sections=None):
+	"""get session boot info
+
+	:param cached_sections: `{section: hash}` of the boot sections cached by the client. If passed,
+	        boot sections are returned in `boot_sections` instead of being merged into bootinfo (see
+	        `frappe.boot.add_bootinfo_sections`).
+	"""
+	from frappe.boot import add_bootinfo_sections, get_bootinfo, get_unseen_notes
 	from frappe.utils.change_log import get_change_log
 
 	bootinfo = None
@@ -140,7 +145,7 @@ def get():
 
 	if not bootinfo:
 		# if not create it
-		bootinfo = get_bootinfo()
+		bootinfo = get_bootinfo(include_sections=False)
 		frappe.cache.hset("bootinfo", frappe.session.user, bootinfo)
 		try:
 			frappe.cache.ping()
@@ -155,6 +160,10 @@ def get():
 		if frappe.local.request:
 			bootinfo["change_log"] = get_change_log()
 
+	# don't modify the cached bootinfo
+	bootinfo = frappe._dict(bootinfo)
+	add_bootinfo_sections(bootinfo, cached_sections)
+
 	bootinfo["metadata_version"] = frappe.cache.get_value("metadata_version")
 	if not bootinfo["metadata_version"]:
 		bootinfo["metadata_version"] = frappe.reset_metadata_version()
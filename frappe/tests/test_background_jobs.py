@@ -1,20 +1,46 @@
 import time
 from contextlib import contextmanager
+from datetime import datetime, timezone
 from unittest.mock import patch
 
-from rq import Queue
+from rq import Callback, Queue
+from rq.job import JobStatus
+from rq.worker_pool import run_worker
 
 import frappe
 from frappe.core.doctype.rq_job.rq_job import remove_failed_jobs
 from frappe.tests.utils import FrappeTestCase
 from frappe.utils.background_jobs import (
+	JOB_PRIORITIES,
 	RQ_JOB_FAILURE_TTL,
 	RQ_RESULTS_TTL,
+	AutoscalingWorkerPool,
+	FairWorker,
+	PriorityQueue,
+	PrioritySimpleWorker,
+	PriorityWorker,
+	RetryPolicy,
+	close_warm_connections,
 	create_job_id,
 	execute_job,
 	generate_qname,
+	get_deadlines_key,
+	get_job,
+	get_job_meta,
+	get_parallel_map_status,
+	get_queue,
+	get_queue_list,
 	get_redis_conn,
+	get_retry_delay,
+	get_retry_policy,
+	parse_qname,
+	plan_parallel_map,
+	pop_debounced_args,
+	reduce_parallel_map,
+	resume_parallel_map,
+	run_parallel_map_chunk,
 )
+from frappe.utils.doctor import any_job_pending, get_jobs_by_queue
 
 
 class TestBackgroundJobs(FrappeTestCase):
@@ -53,6 +79,238 @@ class TestBackgroundJobs(FrappeTestCase):
 		# lesser is earlier
 		self.assertTrue(high_priority_job.get_position() < low_priority_job.get_position())
 
+	def test_enqueue_many(self):
+		job_ids = [frappe.generate_hash() for _ in range(3)]
+		returned_ids = frappe.enqueue_many(
+			"frappe.handler.ping", [{}] * 3, queue="short", job_ids=job_ids, chunk_size=2
+		)
+		self.assertEqual(returned_ids, job_ids)
+		for job_id in job_ids:
+			job = get_job(job_id)
+			self.assertEqual(job.kwargs["method"], "frappe.handler.ping")
+			self.assertEqual(job.origin, generate_qname("short"))
+
+		returned_ids = frappe.enqueue_many("frappe.handler.ping", [{}], enqueue_after_commit=True)
+		self.assertEqual(len(returned_ids), 1)
+		self.assertIsNone(get_job(returned_ids[0]))
+		frappe.db.commit()
+		self.assertIsNotNone(get_job(returned_ids[0]))
+
+	def test_debounce(self):
+		job_id = frappe.generate_hash()
+		kwargs = {"method": "frappe.handler.ping", "queue": "short", "job_id": job_id}
+
+		job = frappe.enqueue(**kwargs, debounce=60, collect=["names"], names=["b", "a"])
+		self.assertIn(
+			job.id, Queue(generate_qname("short"), connection=get_redis_conn()).scheduled_job_registry
+		)
+		self.assertNotIn("names", job.kwargs["kwargs"])
+
+		# merged into the scheduled job
+		self.assertIsNone(frappe.enqueue(**kwargs, debounce=60, collect=["names"], names="c"))
+		self.assertIsNone(frappe.enqueue(**kwargs, debounce=60, collect=["names"], names=["a"]))
+
+		self.assertEqual(
+			pop_debounced_args(create_job_id(job_id), ["names"]), {"names": ["a", "b", "c"]}
+		)
+		job.delete()
+
+		# window is closed once the job starts
+		job = frappe.enqueue(**kwargs, debounce=60)
+		self.assertIsNotNone(job)
+		pop_debounced_args(create_job_id(job_id), [])
+		job.delete()
+
+	def test_retry_policy(self):
+		hooks = {"job_retry_policy": {"frappe.handler.ping": {"max_retries": [1, 10]}}}
+		with patch("frappe.get_hooks", lambda hook, default: hooks.get(hook, default)):
+			self.assertEqual(get_retry_policy("frappe.handler.ping"), RetryPolicy(10, 1, 300))
+			self.assertEqual(get_retry_policy("frappe.handler.version"), RetryPolicy(5, 1, 300))
+
+		policy = RetryPolicy(max_retries=10, base_delay=2, max_delay=60)
+		for retry, delay in ((0, 2), (3, 16), (9, 60)):
+			for _ in range(10):
+				self.assertTrue(delay / 2 <= get_retry_delay(policy, retry) <= delay)
+
+	def test_job_retry(self):
+		_test_JOB_RETRY.clear()
+		conn = get_redis_conn()
+		queue = PriorityQueue(generate_qname(f"test-{frappe.generate_hash(length=8)}"), connection=conn)
+		self.addCleanup(conn.delete, queue.key, get_deadlines_key(queue.key))
+
+		job = queue.enqueue_call(
+			execute_job,
+			kwargs=dict(
+				site=frappe.local.site,
+				method="frappe.tests.test_background_jobs.fail_once",
+				event=None,
+				job_name="fail_once",
+				kwargs={},
+				user="Administrator",
+			),
+			job_id=create_job_id(None),
+			on_success=Callback(count_job_success),
+		)
+		self.addCleanup(job.delete)
+
+		def work():
+			worker = PrioritySimpleWorker([queue.name], connection=conn)
+			with freeze_local() as locals, frappe.init_site(locals.site), patch.object(
+				worker, "_install_signal_handlers"
+			):
+				worker.work(burst=True)
+
+		with patch("frappe.utils.background_jobs.get_retry_delay", return_value=0.1):
+			work()
+
+		# the failed attempt waits for its retry under the same id, without reporting success
+		self.assertEqual(job.get_status(refresh=True), JobStatus.SCHEDULED)
+		self.assertEqual(_test_JOB_RETRY, {"attempts": 1})
+
+		time.sleep(0.2)
+		work()
+		job.refresh()
+		self.assertEqual(job.get_status(), JobStatus.FINISHED)
+		self.assertEqual(job.kwargs["retry"], 1)
+		self.assertEqual(_test_JOB_RETRY, {"attempts": 2, "succeeded": 1})
+
+	def test_scheduled_job_in_worker_pool(self):
+		conn = get_redis_conn()
+		queue = PriorityQueue(generate_qname(f"test-{frappe.generate_hash(length=8)}"), connection=conn)
+		self.addCleanup(conn.delete, queue.key, get_deadlines_key(queue.key))
+
+		job = queue.create_job("frappe.handler.ping", kwargs={"site": frappe.local.site})
+		retry_job = queue.schedule_job(job, datetime.now(timezone.utc))
+		self.addCleanup(retry_job.delete)
+
+		executed = []
+		with patch.object(PriorityWorker, "_install_signal_handlers"), patch.object(
+			PriorityWorker, "execute_job", lambda self, job, queue: executed.append(job.id)
+		):
+			# same as the workers started by `bench worker-pool`
+			run_worker(
+				frappe.generate_hash(),
+				[queue.name],
+				conn.__class__,
+				conn.connection_pool.connection_class,
+				conn.connection_pool.connection_kwargs,
+				worker_class=PriorityWorker,
+				burst=True,
+			)
+
+		self.assertEqual(executed, [retry_job.id])
+		self.assertNotIn(retry_job.id, queue.scheduled_job_registry.get_job_ids())
+
+	def test_fair_queueing(self):
+		site = frappe.local.site
+		# only a bench wide setting
+		with patch.dict(frappe.conf, {"fair_queueing": 1}):
+			self.assertEqual(get_queue("short").name, generate_qname("short"))
+		with patch("frappe.utils.background_jobs.is_fair_queueing_enabled", return_value=True):
+			queue = get_queue("short")
+		self.assertEqual(queue.name, generate_qname("short", site))
+		self.assertEqual(parse_qname(queue.name), ("short", site))
+		self.assertEqual(parse_qname(generate_qname("short")), ("short", None))
+
+		job = queue.enqueue_call(
+			"frappe.handler.ping", kwargs={"site": site}, job_id=create_job_id(None), at_front=True
+		)
+		self.addCleanup(job.delete)
+		self.assertTrue(any_job_pending(site))
+		self.assertIn("frappe.handler.ping", get_jobs_by_queue(site)[0]["short"])
+
+		worker = FairWorker(
+			get_queue_list(["short"], build_queue_name=True), connection=get_redis_conn()
+		)
+		queues = [q.name for q in worker.get_fair_queues()]
+		self.assertEqual(queues[0], generate_qname("short"))
+		self.assertIn(queue.name, queues)
+
+		# site stays first in line for as many jobs as its weight
+		worker._sites = ["a", "b"]
+		worker._site_limits = {"a": (2, 0), "b": (1, 0)}
+		worker.reorder_queues(worker.get_site_queue("short", "a"))
+		self.assertEqual(worker._sites, ["a", "b"])
+		worker.reorder_queues(worker.get_site_queue("short", "a"))
+		self.assertEqual(worker._sites, ["b", "a"])
+		worker.reorder_queues(worker.get_site_queue("short", "b"))
+		self.assertEqual(worker._sites, ["a", "b"])
+
+	def test_job_priority(self):
+		self.assertEqual(get_job_meta("long"), {"priority": "low", "max_wait": JOB_PRIORITIES["low"]})
+		self.assertEqual(get_job_meta("long", "high", at_front=True)["max_wait"], 0)
+		self.assertRaises(frappe.ValidationError, get_job_meta, "short", "invalid")
+
+		conn = get_redis_conn()
+		first, second = (
+			PriorityQueue(generate_qname(f"test-{frappe.generate_hash(length=8)}"), connection=conn)
+			for _ in range(2)
+		)
+		for queue in (first, second):
+			self.addCleanup(conn.delete, queue.key, get_deadlines_key(queue.key))
+
+		def enqueue(queue, **kwargs):
+			job = queue.enqueue_call(
+				"frappe.handler.ping", job_id=create_job_id(None), meta=get_job_meta("default", **kwargs)
+			)
+			self.addCleanup(job.delete)
+			return job.id
+
+		low = enqueue(first, priority="low")
+		high = enqueue(first, priority="high")
+		normal = enqueue(second)
+		late = enqueue(second, deadline=-1)
+
+		# jobs past their deadline go first, then by deadline in the first non-empty queue
+		dequeued = [
+			PriorityQueue.dequeue_any([first, second], None, connection=conn)[0].id for _ in range(4)
+		]
+		self.assertEqual(dequeued, [late, high, low, normal])
+		self.assertIsNone(PriorityQueue.dequeue_any([first, second], None, connection=conn))
+
+		# with fair queueing, late jobs of sites further in line don't skip the round-robin
+		qtype = f"test-{frappe.generate_hash(length=8)}"
+		site_a, site_b = (PriorityQueue(generate_qname(qtype, site), connection=conn) for site in "ab")
+		for queue in (site_a, site_b):
+			self.addCleanup(conn.delete, queue.key, get_deadlines_key(queue.key))
+
+		later = enqueue(site_b, deadline=-60)
+		late = enqueue(site_a, deadline=-1)
+		dequeued = [
+			PriorityQueue.dequeue_any([site_a, site_b], None, connection=conn)[0].id for _ in range(2)
+		]
+		self.assertEqual(dequeued, [late, later])
+
+	def test_autoscaling_worker_pool(self):
+		pool = AutoscalingWorkerPool(
+			queues=get_queue_list(["short"], build_queue_name=True),
+			connection=get_redis_conn(),
+			min_workers=1,
+			max_workers=4,
+		)
+		self.assertEqual(pool.num_workers, 1)
+
+		with patch.object(pool, "get_backlog", return_value=(25, 1)):
+			pool.autoscale()
+		self.assertEqual(pool.num_workers, 3)
+
+		with patch.object(pool, "get_backlog", return_value=(2, 60)):
+			pool.autoscale()
+		self.assertEqual(pool.num_workers, 4)
+
+		with patch.object(pool, "get_backlog", return_value=(0, 0)):
+			# queues were busy just now
+			pool.autoscale()
+			self.assertEqual(pool.num_workers, 4)
+
+			pool._backlog_at = pool._scaled_at = time.monotonic() - 3600
+			pool.autoscale()
+			self.assertEqual(pool.num_workers, 3)
+
+		queued, wait = pool.get_backlog()
+		self.assertGreaterEqual(queued, 0)
+		self.assertGreaterEqual(wait, 0)
+
 	def test_job_hooks(self):
 		self.addCleanup(lambda: _test_JOB_HOOK.clear())
 		with freeze_local() as locals, frappe.init_site(locals.site), patch(
@@ -72,11 +330,127 @@ class TestBackgroundJobs(FrappeTestCase):
 			self.assertEqual(r, "pong")
 			self.assertLess(_test_JOB_HOOK.get("before_job"), _test_JOB_HOOK.get("after_job"))
 
+	def test_warm_connections(self):
+		self.addCleanup(close_warm_connections)
+		job = dict(
+			method="frappe.tests.test_background_jobs.get_connection_id",
+			event=None,
+			job_name="get_connection_id",
+			is_async=True,
+			kwargs={},
+		)
+
+		with freeze_local() as locals, frappe.init_site(locals.site):
+			site = frappe.local.site
+			with patch("frappe.utils.background_jobs._keep_connections_warm", True):
+				first = execute_job(site=site, **job)
+				second = execute_job(site=site, **job)
+				self.assertEqual(first, second)
+
+				# session state isn't passed on to the next job
+				set_variable = "frappe.tests.test_background_jobs.set_session_variable"
+				get_variable = "frappe.tests.test_background_jobs.get_session_variable"
+				self.assertEqual(execute_job(site=site, **{**job, "method": set_variable}), "1")
+				self.assertFalse(execute_job(site=site, **{**job, "method": get_variable}))
+				self.assertEqual(execute_job(site=site, **job), first)
+
+			# forking workers close the connection after every job
+			close_warm_connections()
+			first = execute_job(site=site, **job)
+			second = execute_job(site=site, **job)
+			self.assertNotEqual(first, second)
+
+	def test_parallel_map(self):
+		_test_PARALLEL_MAP.clear()
+		filters = {"module": "Core", "issingle": 0}
+		expected = frappe.get_all("DocType", filters=filters, pluck="name", order_by="name asc")
+
+		with patch("frappe.utils.background_jobs.enqueue") as enqueue:
+			map_id = frappe.parallel_map(
+				"DocType",
+				filters,
+				"frappe.tests.test_background_jobs.collect_names",
+				chunk_size=10,
+				reduce="frappe.tests.test_background_jobs.reduce_names",
+				prefix="test",
+			)
+			# names are only read by the planning job
+			self.assertEqual(enqueue.call_args.kwargs["job_id"], f"parallel_map:{map_id}:plan")
+			self.assertIsNone(get_parallel_map_status(map_id)["total"])
+
+			plan_parallel_map(map_id)
+			# planned already
+			plan_parallel_map(map_id)
+			chunks = [call.kwargs["chunk"] for call in enqueue.call_args_list if "chunk" in call.kwargs]
+			self.assertEqual(len(chunks), len(range(0, len(expected), 10)))
+			status = get_parallel_map_status(map_id)
+			self.assertEqual((status["total"], status["pending"]), (len(chunks), len(chunks)))
+
+			# lost chunks are enqueued again
+			self.assertEqual(resume_parallel_map(map_id), len(chunks))
+
+			for chunk in reversed(chunks):
+				run_parallel_map_chunk(map_id, chunk)
+			# already done
+			run_parallel_map_chunk(map_id, chunks[0])
+			self.assertEqual(enqueue.call_args.kwargs["map_id"], map_id)
+			self.assertEqual(get_parallel_map_status(map_id)["pending"], 0)
+
+		reduce_parallel_map(map_id)
+		self.assertEqual(_test_PARALLEL_MAP["names"], [f"test:{name}" for name in expected])
+		self.assertEqual(get_parallel_map_status(map_id)["status"], "done")
+
+
+def collect_names(doctype, names, prefix):
+	return [f"{prefix}:{name}" for name in names]
+
+
+def reduce_names(results, prefix):
+	_test_PARALLEL_MAP["names"] = [name for names in results for name in names]
+
+
+_test_PARALLEL_MAP = {}
+
+
+def get_connection_id():
+	return frappe.db.sql(
+		"select connection_id()" if frappe.db.db_type == "mariadb" else "select pg_backend_pid()"
+	)[0][0]
+
+
+def set_session_variable():
+	if frappe.db.db_type == "mariadb":
+		frappe.db.sql("set @frappe_test_variable = '1'")
+	else:
+		frappe.db.sql("set frappe.test_variable = '1'")
+	return get_session_variable()
+
+
+def get_session_variable():
+	return frappe.db.sql(
+		"select @frappe_test_variable"
+		if frappe.db.db_type == "mariadb"
+		else "select current_setting('frappe.test_variable', true)"
+	)[0][0]
+
 
 def fail_function():
 	return 1 / 0
 
 
+_test_JOB_RETRY = {}
+
+
+def fail_once():
+	_test_JOB_RETRY["attempts"] = _test_JOB_RETRY.get("attempts", 0) + 1
+	if _test_JOB_RETRY["attempts"] == 1:
+		raise frappe.RetryBackgroundJobError
+
+
+def count_job_success(job, connection, result):
+	_test_JOB_RETRY["succeeded"] = _test_JOB_RETRY.get("succeeded", 0) + 1
+
+
 _test_JOB_HOOK = {}
 
 
@@ -1,6 +1,17 @@
+from unittest.mock import patch
+
 import frappe
-from frappe.boot import get_unseen_notes, get_user_pages_or_reports
+from frappe.boot import (
+	BOOTINFO_SECTIONS,
+	get_bootinfo,
+	get_bootinfo_section,
+	get_section_key,
+	get_unseen_notes,
+	get_user_pages_or_reports,
+)
+from frappe.cache_manager import clear_user_bootinfo
 from frappe.desk.doctype.note.note import mark_as_seen
+from frappe.sessions import get as get_session_bootinfo
 from frappe.tests.utils import FrappeTestCase
 
 
@@ -27,6 +38,60 @@ class TestBootData(FrappeTestCase):
 		unseen_notes = [d.title for d in get_unseen_notes()]
 		self.assertListEqual(unseen_notes, [])
 
+	def test_bootinfo_sections(self):
+		bootinfo = get_bootinfo(include_sections=False)
+		self.assertEqual(set(bootinfo.section_hashes), set(BOOTINFO_SECTIONS))
+		self.assertNotIn("__messages", bootinfo)
+		self.assertNotIn("page_info", bootinfo)
+
+		full_bootinfo = get_bootinfo()
+		self.assertEqual(full_bootinfo.section_hashes, bootinfo.section_hashes)
+		self.assertIn("__messages", full_bootinfo)
+		self.assertIn("page_info", full_bootinfo)
+
+		boot = get_session_bootinfo(
+			cached_sections={"translations": bootinfo.section_hashes["translations"]}
+		)
+		self.assertIsNone(boot.boot_sections["translations"])
+		self.assertEqual(boot.boot_sections["permissions"], get_bootinfo_section("permissions").data)
+		self.assertNotIn("__messages", boot)
+
+		# permissions are cached per role-set
+		section = get_bootinfo_section("permissions")
+		frappe.set_user("test@example.com")
+		self.assertNotEqual(get_bootinfo_section("permissions").hash, section.hash)
+		frappe.set_user("Administrator")
+
+	def test_boot_session_hooks(self):
+		get_hooks = frappe.get_hooks
+
+		def get_hooks_with_boot_session(hook=None, *args, **kwargs):
+			if hook is None:
+				return frappe._dict(get_hooks(), boot_session=[f"{__name__}.add_test_treeview"])
+			return get_hooks(hook, *args, **kwargs)
+
+		with patch("frappe.get_hooks", get_hooks_with_boot_session):
+			bootinfo = get_bootinfo()
+
+		self.assertIn("_Test Tree", bootinfo.treeviews)
+		# changed by the hook, so the client doesn't get it from the shared section
+		self.assertNotIn("site", bootinfo.section_hashes)
+		self.assertNotIn("_Test Tree", get_bootinfo_section("site").data.treeviews)
+
+	def test_clear_user_bootinfo(self):
+		get_bootinfo_section("site")
+		get_bootinfo_section("permissions")
+		clear_user_bootinfo(frappe.session.user)
+		frappe.local.cache.clear()
+
+		# only sections that depend on the user are cleared
+		self.assertFalse(frappe.cache.hexists("bootinfo", get_section_key("permissions")))
+		self.assertTrue(frappe.cache.hexists("bootinfo", get_section_key("site")))
+
+
+def add_test_treeview(bootinfo):
+	bootinfo.treeviews.append("_Test Tree")
+
 
 class TestPermissionQueries(FrappeTestCase):
 	@classmethod
@@ -1,5 +1,9 @@
+import pickle
 import time
-from unittest.mock import MagicMock
+from threading import Thread
+from unittest.mock import MagicMock, patch
+
+import redis
 
 import frappe
 from frappe.tests.test_api import FrappeAPITestCase
@@ -90,6 +94,59 @@ class TestSiteCache(FrappeAPITestCase):
 		self.get(f"/api/method/{api_with_ttl}")
 		self.assertEqual(register_with_external_service.call_count, 3)
 
+	def test_site_cache_lru(self):
+		calls = []
+
+		@site_cache(maxsize=2)
+		def square(x):
+			calls.append(x)
+			return x * x
+
+		square(1), square(2), square(1)
+		# 2 is the least recently used, evicted in favour of 3
+		square(3), square(1), square(2)
+		self.assertEqual(calls, [1, 2, 3, 2])
+		self.assertEqual(square.cache_info().hits, 2)
+		self.assertEqual(square.cache_info().currsize, 2)
+
+		# 1 and 1.0 are cached separately
+		square(1.0)
+		self.assertEqual(calls[-1], 1.0)
+
+		square.clear_cache()
+		self.assertEqual(square.cache_info().currsize, 0)
+
+	def test_site_cache_unhashable_args(self):
+		calls = []
+
+		@site_cache
+		def total(values, **kwargs):
+			calls.append(values)
+			return sum(values)
+
+		self.assertEqual(total([1, 2]), 3)
+		self.assertEqual(total([1, 2]), 3)
+		self.assertEqual(total(values=[1, 2]), 3)
+		self.assertEqual(len(calls), 2)
+
+	def test_site_cache_invalidation(self):
+		from frappe.utils.caching import _SITE_CACHE_SYNC, invalidate_site_cache
+
+		def get_token(func_key):
+			return frappe.cache.hget("site_cache_invalidations", func_key)
+
+		everything = get_token("*")
+		is_single_doctype = get_token("frappe.model.utils.is_single_doctype")
+		frappe.clear_cache(doctype="ToDo")
+		# only functions depending on doctypes are invalidated in other processes
+		self.assertEqual(get_token("*"), everything)
+		self.assertNotEqual(get_token("frappe.model.utils.is_single_doctype"), is_single_doctype)
+
+		# redis couldn't be reached when this process last synced
+		with patch.dict(_SITE_CACHE_SYNC, {frappe.local.site: (0, None)}):
+			invalidate_site_cache()
+		self.assertNotEqual(get_token("*"), everything)
+
 
 class TestRedisCache(FrappeAPITestCase):
 	def test_redis_cache(self):
@@ -242,5 +299,237 @@ class TestRedisWrapper(FrappeAPITestCase):
 		frappe.cache.delete_keys(prefix)
 		self.assertEqual(len(frappe.cache.get_keys(prefix)), 0)
 
+	def test_bulk_values(self):
+		values = {f"test_bulk_{i}": {"value": i} for i in range(5)}
+		frappe.cache.set_values(values)
+		frappe.local.cache.clear()
+
+		self.assertEqual(
+			frappe.cache.get_values([*values, "test_bulk_missing"]),
+			{**values, "test_bulk_missing": None},
+		)
+
+		# served from frappe.local now
+		with patch.object(frappe.cache, "mget") as mget:
+			self.assertEqual(frappe.cache.get_values(values), values)
+			mget.assert_not_called()
+
+		frappe.cache.delete_values(values)
+		frappe.local.cache.clear()
+		self.assertEqual(set(frappe.cache.get_values(values).values()), {None})
+
+		frappe.cache.set_values({"test_bulk_expiring": 1}, expires_in_sec=10)
+		self.assertEqual(frappe.cache.get_value("test_bulk_expiring", expires=True), 1)
+		frappe.cache.delete_value("test_bulk_expiring")
+
+		for i in range(3):
+			frappe.cache.hset("test_bulk_hash", f"key{i}", i)
+		frappe.local.cache.clear()
+		self.assertEqual(
+			frappe.cache.hget_values("test_bulk_hash", ["key0", "key2", "missing"]),
+			{"key0": 0, "key2": 2, "missing": None},
+		)
+		self.assertEqual(frappe.cache.hget("test_bulk_hash", "key2"), 2)
+		frappe.cache.delete_value("test_bulk_hash")
+
+	def test_compression(self):
+		from frappe.utils.redis_wrapper import COMPRESSION_THRESHOLD, ZLIB_HEADER
+
+		value = {"data": "x" * COMPRESSION_THRESHOLD}
+		frappe.cache.set_value("test_compression", value)
+		frappe.local.cache.clear()
+		self.assertTrue(
+			frappe.cache.get(frappe.cache.make_key("test_compression")).startswith(ZLIB_HEADER)
+		)
+		self.assertEqual(frappe.cache.get_value("test_compression"), value)
+
+		# small values aren't compressed
+		frappe.cache.set_value("test_compression", 1)
+		self.assertEqual(frappe.cache.get(frappe.cache.make_key("test_compression"))[:1], b"\x80")
+		frappe.cache.delete_value("test_compression")
+
+	def test_single_flight_generator(self):
+		key = "test_single_flight"
+		frappe.cache.delete_value(key)
+		generator = MagicMock(return_value="generated")
+
+		# another process is generating the value
+		lock = frappe.cache.lock(frappe.cache.make_key(f"{key}::lock"), timeout=5, thread_local=False)
+		lock.acquire()
+		frappe.local.cache.clear()
+		redis_key = frappe.cache.make_key(key)
+
+		def set_value():
+			time.sleep(0.2)
+			frappe.cache.set(redis_key, pickle.dumps("from other process"))
+			lock.release()
+
+		Thread(target=set_value).start()
+		self.assertEqual(frappe.cache.get_value(key, generator), "from other process")
+		generator.assert_not_called()
+
+		frappe.cache.delete_value(key)
+		self.assertEqual(frappe.cache.get_value(key, generator), "generated")
+		generator.assert_called_once()
+		self.assertFalse(lock.locked())
+		frappe.cache.delete_value(key)
+
+		# redis can't be reached while waiting, the value is generated here
+		lock.acquire()
+		self.addCleanup(lock.release)
+		with patch("frappe.utils.redis_wrapper.GENERATOR_WAIT_TIMEOUT", 0.1), patch.object(
+			frappe.cache, "get", side_effect=redis.exceptions.ConnectionError
+		):
+			self.assertEqual(frappe.cache.get_value(key, generator), "generated")
+		self.assertEqual(generator.call_count, 2)
+		frappe.cache.delete_value(key)
+
+	def test_single_flight_hash_generator(self):
+		name, key = "test_single_flight_hash", "field"
+		frappe.cache.delete_value(name)
+		generator = MagicMock(return_value="generated")
+
+		# another process is generating the value
+		lock = frappe.cache.lock(
+			frappe.cache.make_key(f"{name}::{key}::lock"), timeout=5, thread_local=False
+		)
+		lock.acquire()
+		frappe.local.cache.clear()
+		redis_name = frappe.cache.make_key(name)
+
+		def set_value():
+			time.sleep(0.2)
+			redis.Redis.hset(frappe.cache, redis_name, key, pickle.dumps("from other process"))
+			lock.release()
+
+		Thread(target=set_value).start()
+		self.assertEqual(frappe.cache.hget(name, key, generator), "from other process")
+		generator.assert_not_called()
+
+		frappe.cache.delete_value(name)
+		self.assertEqual(frappe.cache.hget(name, key, generator), "generated")
+		generator.assert_called_once()
+		self.assertFalse(lock.locked())
+		frappe.local.cache.clear()
+		self.assertEqual(frappe.cache.hget(name, key), "generated")
+		frappe.cache.delete_value(name)
+
+	def test_refresh_early(self):
+		from frappe.utils.redis_wrapper import should_refresh_early
+
+		self.assertTrue(should_refresh_early(0, 1))
+		self.assertFalse(should_refresh_early(-1, 1))
+		self.assertFalse(should_refresh_early(3600 * 1000, 0.001))
+
+		key = "test_refresh_early"
+		generator = MagicMock(return_value=1)
+		self.assertEqual(
+			frappe.cache.get_value(key, generator, expires_in_sec=60, refresh_early=True), 1
+		)
+		self.assertEqual(
+			frappe.cache.get_value(key, generator, expires_in_sec=60, refresh_early=True), 1
+		)
+		generator.assert_called_once()
+
+		with patch("frappe.utils.redis_wrapper.should_refresh_early", return_value=True):
+			generator.return_value = 2
+			self.assertEqual(
+				frappe.cache.get_value(key, generator, expires_in_sec=60, refresh_early=True), 2
+			)
+		frappe.cache.delete_value(key)
+
+	def test_delete_tags(self):
+		# tags start out incomplete, the first clear scans for keys set before they were tagged
+		frappe.cache.delete_tags("test_tag", "other_tag", "user:test@example.com:")
+		frappe.cache.set_value("test_tag_1", 1, tags=["test_tag"])
+		frappe.cache.set_value("test_tag_2", 2, tags=["test_tag", "other_tag"])
+		frappe.cache.set_value("test_tag_3", 3, user="test@example.com")
+		frappe.cache.set_value("test_tag_4", 4)
+
+		with patch.object(frappe.cache, "scan_iter") as scan_iter:
+			frappe.cache.delete_tags("test_tag", "user:test@example.com:")
+			scan_iter.assert_not_called()
+
+		frappe.local.cache.clear()
+		self.assertIsNone(frappe.cache.get_value("test_tag_1"))
+		self.assertIsNone(frappe.cache.get_value("test_tag_2"))
+		self.assertIsNone(frappe.cache.get_value("test_tag_3", user="test@example.com"))
+		self.assertEqual(frappe.cache.get_value("test_tag_4"), 4)
+		self.assertEqual(frappe.cache.smembers("tag::test_tag"), {b""})
+		frappe.cache.delete_tags("other_tag")
+		frappe.cache.delete_value("test_tag_4")
+
+	def test_delete_tags_without_tag_set(self):
+		frappe.cache.delete_tags("test_tag")
+		frappe.cache.set_value("test_tag_1", 1, tags=["test_tag"])
+		# evicted, or set before keys were tagged
+		frappe.cache.delete_value("tag::test_tag")
+		frappe.cache.set_value("test_tag_2", 2, tags=["test_tag"])
+
+		frappe.cache.delete_tags("test_tag")
+		frappe.local.cache.clear()
+		self.assertIsNone(frappe.cache.get_value("test_tag_1"))
+		self.assertIsNone(frappe.cache.get_value("test_tag_2"))
+
+	def test_tag_expiry(self):
+		frappe.cache.delete_value("tag::test_tag")
+		tag_key = frappe.cache.make_tag_key("test_tag")
+		frappe.cache.set_value("test_tag_1", 1, tags=["test_tag"], expires_in_sec=100000)
+		self.assertGreater(frappe.cache.ttl(tag_key), 100000 - 10)
+
+		# kept as long as the key which expires last
+		frappe.cache.set_value("test_tag_2", 2, tags=["test_tag"], expires_in_sec=10)
+		self.assertGreater(frappe.cache.ttl(tag_key), 100000 - 10)
+
+		frappe.cache.set_value("test_tag_3", 3, tags=["test_tag"])
+		self.assertEqual(frappe.cache.ttl(tag_key), -1)
+
+		# complete sets are kept, their tag would have to be scanned for otherwise
+		frappe.cache.delete_tags("test_tag")
+		frappe.cache.set_value("test_tag_1", 1, tags=["test_tag"], expires_in_sec=10)
+		self.assertEqual(frappe.cache.ttl(tag_key), -1)
+		frappe.cache.delete_tags("test_tag")
+
+	def test_document_cache_tags(self):
+		frappe.get_cached_doc("User", "Administrator")
+		key = frappe.get_document_cache_key("User", "Administrator")
+		self.assertTrue(frappe.cache.exists(key))
+		frappe.clear_document_cache("User")
+		self.assertFalse(frappe.cache.exists(key))
+
 	def test_backward_compat_cache(self):
 		self.assertEqual(frappe.cache, frappe.cache())
+
+	def test_client_cache(self):
+		from frappe.utils.redis_wrapper import RedisWrapper
+
+		cache = RedisWrapper.from_url(frappe.conf.redis_cache)
+		cache.enable_client_cache(maxsize=10)
+		key = "test_client_cache"
+		frappe.cache.set_value(key, 1)
+		frappe.local.cache.clear()
+
+		# first read starts tracking the site's keys
+		self.assertEqual(cache.get_value(key), 1)
+		for _ in range(50):
+			if cache.client_cache.tracked_prefixes:
+				break
+			time.sleep(0.1)
+
+		frappe.local.cache.clear()
+		self.assertEqual(cache.get_value(key), 1)
+		frappe.local.cache.clear()
+		with patch.object(cache, "get") as get:
+			self.assertEqual(cache.get_value(key), 1)
+			get.assert_not_called()
+
+		# changed by another client
+		frappe.cache.set_value(key, 2)
+		for _ in range(50):
+			if cache.make_key(key) not in cache.client_cache.data:
+				break
+			time.sleep(0.1)
+
+		frappe.local.cache.clear()
+		self.assertEqual(cache.get_value(key), 2)
+		frappe.cache.delete_value(key)
@@ -402,6 +402,14 @@ class TestCommands(BaseTestCommands):
 		self.execute("bench --site {site} show-config -f json")
 		self.assertIsInstance(json.loads(self.stdout), dict)
 
+	def test_show_cache_usage(self):
+		frappe.cache.set_value("test_cache_usage", "x" * 1024)
+		self.execute("bench --site {site} show-cache-usage --format json")
+		self.assertEqual(self.returncode, 0)
+		usage = json.loads(self.stdout)[frappe.local.site]
+		self.assertEqual(usage["test_cache_usage"]["keys"], 1)
+		frappe.cache.delete_value("test_cache_usage")
+
 	def test_get_bench_relative_path(self):
 		bench_path = get_bench_path()
 		test1_path = os.path.join(bench_path, "test1.txt")
@@ -992,6 +992,42 @@ class TestDBQuery(FrappeTestCase):
 		self.assertIn("ifnull", frappe.get_all("User", {"name": ("not in", [])}, run=0))
 		self.assertIn("ifnull", frappe.get_all("User", {"name": ("not in", [""])}, run=0))
 
+	def test_compiled_query_cache(self):
+		from frappe.model.db_query import _COMPILED_QUERY_CACHE, get_filters_shape
+
+		self.assertEqual(
+			get_filters_shape({"name": ("in", ["a"]), "enabled": 1}), (("name", "in"), ("enabled", None))
+		)
+		self.assertEqual(
+			get_filters_shape([["User", "name", "=", "a"], ["enabled", "=", 1]]),
+			(("User", "name", "="), ("enabled", "=")),
+		)
+
+		_COMPILED_QUERY_CACHE.clear()
+		fields = ["name", "email"]
+		first = frappe.get_list("User", filters={"name": "Administrator"}, fields=fields, run=0)
+		self.assertEqual(len(_COMPILED_QUERY_CACHE[frappe.local.site]), 1)
+
+		# same shape, different values: only the conditions are rebuilt
+		second = frappe.get_list("User", filters={"name": "Guest"}, fields=fields, run=0)
+		self.assertEqual(len(_COMPILED_QUERY_CACHE[frappe.local.site]), 1)
+		self.assertEqual(first.replace("Administrator", "Guest"), second)
+		self.assertEqual(
+			frappe.get_list("User", filters={"name": "Guest"}, fields=fields, pluck="name"), ["Guest"]
+		)
+
+		# rebuilding meta invalidates compiled queries
+		frappe.clear_cache(doctype="User")
+		third = frappe.get_list("User", filters={"name": "Guest"}, fields=fields, run=0)
+		self.assertEqual(second, third)
+
+		# roles of the user the query is built for are part of its shape
+		for user in ("Administrator", "test@example.com"):
+			frappe.get_list(
+				"User", filters={"name": "Guest"}, fields=fields, user=user, ignore_permissions=True, run=0
+			)
+		self.assertEqual(len(_COMPILED_QUERY_CACHE[frappe.local.site]), 3)
+
 	def test_ambiguous_linked_tables(self):
 		from frappe.desk.reportview import get
 
@@ -1,6 +1,9 @@
+from unittest.mock import patch
+
 import frappe
-from frappe.deferred_insert import deferred_insert, save_to_db
+from frappe.deferred_insert import can_bulk_insert, deferred_insert, save_to_db
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_datetime
 
 
 class TestDeferredInsert(FrappeTestCase):
@@ -10,3 +13,111 @@ class TestDeferredInsert(FrappeTestCase):
 
 		save_to_db()
 		self.assertTrue(frappe.db.exists("Route History", route_history))
+
+	def test_save_to_db_drains_queue(self):
+		route = frappe.generate_hash()
+		routes = [{"route": route, "user": "Administrator"} for _ in range(5)]
+		with patch("frappe.deferred_insert.BATCH_SIZE", 2):
+			for i in range(0, len(routes), 2):
+				deferred_insert("Route History", routes[i : i + 2])
+			deferred_insert("Route History", routes[0])
+
+			save_to_db()
+
+		self.assertEqual(frappe.db.count("Route History", {"route": route}), 6)
+		self.assertFalse(frappe.cache.llen("insert_queue_for_Route History"))
+
+	def test_bulk_insert(self):
+		# with frappe's generic doc_events hooked, as they always are
+		self.assertIn("*", frappe.get_hooks("doc_events"))
+		self.assertTrue(can_bulk_insert("Access Log"))
+
+		page = frappe.generate_hash()
+		access_logs = [{"user": "Administrator", "page": page} for _ in range(3)]
+		deferred_insert("Access Log", access_logs)
+
+		with patch.object(frappe.db, "bulk_insert", wraps=frappe.db.bulk_insert) as bulk_insert:
+			save_to_db()
+		self.assertIn("Access Log", [call.args[0] for call in bulk_insert.call_args_list])
+		self.assertEqual(frappe.db.count("Access Log", {"page": page}), 3)
+
+	def test_failed_flush_keeps_queue(self):
+		route_history = {"route": frappe.generate_hash(), "user": "Administrator"}
+		deferred_insert("Route History", [route_history])
+
+		with patch.object(frappe.db, "commit", side_effect=frappe.db.InternalError):
+			self.assertRaises(frappe.db.InternalError, save_to_db)
+		frappe.db.rollback()
+		self.assertEqual(frappe.cache.llen("insert_queue_for_Route History"), 1)
+
+		save_to_db()
+		self.assertEqual(frappe.db.count("Route History", route_history), 1)
+		self.assertFalse(frappe.cache.llen("insert_queue_for_Route History"))
+
+	def test_deferred_document_timestamps(self):
+		view_log = frappe.get_doc(
+			{
+				"doctype": "View Log",
+				"reference_doctype": "User",
+				"reference_name": "Administrator",
+				"viewed_by": "test@example.com",
+			}
+		)
+		with self.set_user("test@example.com"):
+			view_log.deferred_insert()
+
+		save_to_db()
+		inserted = frappe.get_last_doc("View Log", {"viewed_by": "test@example.com"})
+		self.assertEqual(inserted.owner, "test@example.com")
+		self.assertEqual(inserted.creation, get_datetime(view_log.creation))
+
+	def test_write_behind(self):
+		self.assertTrue(frappe.get_meta("Route History").write_behind)
+		route_history = frappe.get_doc(
+			{"doctype": "Route History", "route": frappe.generate_hash(), "user": "Administrator"}
+		)
+
+		with patch.dict(frappe.flags, {"in_test": False}):
+			route_history.insert()
+
+		self.assertTrue(route_history.name)
+		self.assertFalse(frappe.db.exists("Route History", route_history.name))
+		# queued when the transaction is committed
+		self.assertFalse(frappe.cache.llen("insert_queue_for_Route History"))
+
+		frappe.db.commit()
+		save_to_db()
+		self.assertTrue(frappe.db.exists("Route History", route_history.name))
+
+	def test_write_behind_rollback(self):
+		route_history = frappe.get_doc(
+			{"doctype": "Route History", "route": frappe.generate_hash(), "user": "Administrator"}
+		)
+		with patch.dict(frappe.flags, {"in_test": False}):
+			route_history.insert()
+		frappe.db.rollback()
+
+		self.assertFalse(frappe.cache.llen("insert_queue_for_Route History"))
+		save_to_db()
+		self.assertFalse(frappe.db.exists("Route History", route_history.name))
+
+	def test_write_behind_skips_post_insert_hooks(self):
+		route_history = frappe.get_doc(
+			{"doctype": "Route History", "route": frappe.generate_hash(), "user": "Administrator"}
+		)
+		spy = patch.object(route_history, "run_method", wraps=route_history.run_method)
+		with patch.dict(frappe.flags, {"in_test": False}), spy as run_method:
+			route_history.insert()
+
+		methods = [call.args[0] for call in run_method.call_args_list]
+		self.assertIn("before_insert", methods)
+		self.assertFalse({"after_insert", "on_update", "on_change"} & set(methods))
+		self.assertNotIn(("Route History", route_history.name), frappe.flags.currently_saving)
+		frappe.db.rollback()
+
+	def test_write_behind_with_post_insert_hooks(self):
+		doctype = frappe.get_doc("DocType", "Route History")
+		doctype.write_behind = 1
+		controller = type("RouteHistory", (), {"on_update": None})
+		with patch("frappe.core.doctype.doctype.doctype.get_controller", return_value=controller):
+			self.assertRaises(frappe.ValidationError, doctype.validate_write_behind)
@@ -193,6 +193,47 @@ class TestFormLoad(FrappeTestCase):
 		self.assertIn("email", docinfo.communications[0].content)
 		note.delete()
 
+	def test_lazy_docinfo(self):
+		from frappe.desk.form.load import LAZY_DOCINFO_SECTIONS
+
+		note = frappe.new_doc("Note")
+		note.title = frappe.generate_hash(length=20)
+		note.insert()
+		note.add_comment(text="test")
+		frappe.get_doc(
+			{
+				"doctype": "Communication",
+				"communication_type": "Communication",
+				"content": "test email",
+				"reference_doctype": note.doctype,
+				"reference_name": note.name,
+			}
+		).insert()
+
+		frappe.response.docs = []
+		getdoc(note.doctype, note.name, lazy_docinfo=True)
+		docinfo = frappe.response["docinfo"]
+		self.assertEqual(docinfo.pending_sections, list(LAZY_DOCINFO_SECTIONS))
+		self.assertNotIn("partial", docinfo)
+		self.assertEqual(docinfo.communications, [])
+		self.assertEqual(len(docinfo.comments), 1)
+		self.assertIn("permissions", docinfo)
+
+		get_docinfo(doctype=note.doctype, name=note.name, sections=docinfo.pending_sections)
+		docinfo = frappe.response["docinfo"]
+		self.assertTrue(docinfo.partial)
+		self.assertEqual(len(docinfo.communications), 1)
+		self.assertNotIn("comments", docinfo)
+
+		self.assertRaises(
+			frappe.ValidationError,
+			get_docinfo,
+			doctype=note.doctype,
+			name=note.name,
+			sections=["invalid"],
+		)
+		note.delete()
+
 
 def get_blog(blog_name):
 	frappe.response.docs = []
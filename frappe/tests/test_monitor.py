@@ -88,3 +88,59 @@ class TestMonitor(FrappeTestCase):
 		frappe.db.sql("select 1")
 		self.assertIn(get_trace_id(), str(frappe.db.last_query))
 		frappe.monitor.stop(response)
+
+	def test_cache_stats(self):
+		frappe.monitor.reset_cache_stats()
+		set_request(method="GET", path="/api/method/frappe.ping")
+		response = build_response("json")
+		frappe.cache.delete_value("test_monitor_cache")
+
+		frappe.monitor.start()
+		frappe.cache.get_value("test_monitor_cache", generator=lambda: "value")
+		frappe.cache.get_value("test_monitor_cache")
+		frappe.monitor.stop(response)
+
+		logs = frappe.cache.lrange(MONITOR_REDIS_KEY, 0, -1)
+		log = frappe.parse_json(logs[0].decode())
+		self.assertEqual(log.cache["redis:test_monitor_cache"]["misses"], 1)
+		self.assertIn("generator_time", log.cache["redis:test_monitor_cache"])
+		self.assertEqual(log.cache["local:test_monitor_cache"]["hits"], 1)
+
+		stats = frappe.monitor.get_cache_stats()
+		self.assertEqual(stats[("redis", "test_monitor_cache")]["misses"], 1)
+		self.assertEqual(stats[("local", "test_monitor_cache")]["hits"], 1)
+
+		frappe.monitor.reset_cache_stats()
+		frappe.cache.delete_value("test_monitor_cache")
+		del frappe.local.monitor
+
+	def test_job_stats(self):
+		frappe.monitor.reset_job_stats()
+		execute_job = frappe.utils.background_jobs.execute_job
+
+		execute_job(frappe.local.site, "frappe.ping", None, None, {}, is_async=False)
+		self.assertRaises(
+			ZeroDivisionError,
+			execute_job,
+			frappe.local.site,
+			"frappe.tests.test_background_jobs.fail_function",
+			None,
+			None,
+			{},
+			is_async=False,
+		)
+
+		stats = frappe.monitor.get_job_stats()
+		self.assertEqual(stats["frappe.ping"]["count"], 1)
+		self.assertEqual(stats["frappe.ping"]["failures"], 0)
+		self.assertEqual(stats["frappe.tests.test_background_jobs.fail_function"]["failures"], 1)
+		for metric in frappe.monitor.JOB_STATS_METRICS:
+			self.assertEqual(set(stats["frappe.ping"][metric]), {"p50", "p95", "p99", "avg"}, msg=metric)
+		self.assertLessEqual(
+			stats["frappe.ping"]["duration"]["p50"], stats["frappe.ping"]["duration"]["p99"]
+		)
+
+		self.assertEqual(frappe.monitor.get_job_stats(group_by="queue")[""]["count"], 2)
+		# jobs run without a worker have no priority
+		self.assertEqual(frappe.monitor.get_job_stats(group_by="priority")[""]["missed"], 0)
+		frappe.monitor.reset_job_stats()
@@ -174,6 +174,29 @@ class TestPermissions(FrappeTestCase):
 		self.assertTrue("-test-blog-post-2" in names)
 		self.assertFalse("-test-blog-post-1" in names)
 
+	def test_has_permission_many(self):
+		add_user_permission("Blog Category", "-test-blog-category-1", "test2@example.com")
+
+		frappe.set_user("test2@example.com")
+		names = ["-test-blog-post", "-test-blog-post-1", "-test-blog-post-2"]
+		permitted = frappe.has_permission_many("Blog Post", names)
+
+		for name in names:
+			self.assertEqual(
+				name in permitted,
+				frappe.has_permission("Blog Post", doc=name),
+				msg=f"has_permission_many differs from has_permission for {name}",
+			)
+
+		self.assertIn("-test-blog-post-1", permitted)
+		self.assertNotIn("-test-blog-post", permitted)
+		self.assertEqual(frappe.has_permission_many("Blog Post", ["-non-existent-post"]), set())
+
+		frappe.set_user("Administrator")
+		frappe.share.add("Blog Post", "-test-blog-post", "test2@example.com")
+		frappe.set_user("test2@example.com")
+		self.assertIn("-test-blog-post", frappe.has_permission_many("Blog Post", names))
+
 	def test_set_user_permissions(self):
 		frappe.set_user("test1@example.com")
 		add_user_permission("Blog Post", "-test-blog-post", "test2@example.com")
@@ -7,12 +7,15 @@ from werkzeug.wrappers import Response
 
 import frappe
 import frappe.rate_limiter
-from frappe.rate_limiter import RateLimiter
+from frappe.rate_limiter import RateLimiter, consume
 from frappe.tests.utils import FrappeTestCase
 from frappe.utils import cint
 
 
 class TestRateLimiter(FrappeTestCase):
+	def setUp(self):
+		frappe.rate_limiter._pending_costs.clear()
+
 	def test_apply_with_limit(self):
 		frappe.conf.rate_limit = {"window": 86400, "limit": 1}
 		frappe.rate_limiter.apply()
@@ -107,6 +110,30 @@ class TestRateLimiter(FrappeTestCase):
 		time.sleep(0.01)
 		limiter.update()
 
+		# charged by the next request
+		self.assertIsNone(frappe.cache.get(limiter.key))
+		self.assertEqual(RateLimiter(0.01, 86400).counter, limiter.duration)
 		self.assertEqual(limiter.duration, cint(frappe.cache.get(limiter.key)))
 
 		frappe.cache.delete(limiter.key)
+
+	def test_sliding_window(self):
+		key = f"test-rate-limit-{frappe.generate_hash()}"
+
+		self.assertTrue(consume(key, 2, 60).allowed)
+		usage = consume(key, 2, 60)
+		self.assertTrue(usage.allowed)
+		self.assertEqual(usage.used, 2)
+
+		# rejected requests aren't counted
+		usage = consume(key, 2, 60)
+		self.assertFalse(usage.allowed)
+		self.assertEqual(usage.used, 2)
+		self.assertEqual(consume(key, 2, 60, cost=0).used, 2)
+
+		# usage of the previous window is carried over while it overlaps the sliding window
+		window_number = int(usage.key.rsplit(":", 1)[1])
+		frappe.cache.rename(usage.key, f"{key}:{window_number - 1}")
+		self.assertFalse(consume(key, 1, 60).allowed)
+
+		frappe.cache.delete(usage.key, f"{key}:{window_number - 1}")
@@ -5,12 +5,16 @@ from unittest.mock import patch
 
 import frappe
 from frappe.core.doctype.scheduled_job_type.scheduled_job_type import ScheduledJobType, sync_jobs
-from frappe.utils import add_days, get_datetime
+from frappe.utils import add_days, get_bench_id, get_datetime
+from frappe.utils.background_jobs import get_redis_conn
 from frappe.utils.doctor import purge_pending_jobs
 from frappe.utils.scheduler import (
 	_get_last_modified_timestamp,
 	enqueue_events,
+	get_due_job_types,
+	get_scheduler_shard,
 	is_dormant,
+	reset_next_runs,
 	schedule_jobs_based_on_activity,
 )
 
@@ -38,7 +42,10 @@ class TestScheduler(TestCase):
 		purge_pending_jobs()
 
 	def test_enqueue_jobs(self):
-		frappe.db.sql("update `tabScheduled Job Type` set last_execution = '2010-01-01 00:00:00'")
+		for job_type in frappe.get_all("Scheduled Job Type", pluck="name"):
+			frappe.get_doc("Scheduled Job Type", job_type).db_set(
+				"last_execution", "2010-01-01 00:00:00", update_modified=False
+			)
 
 		enqueued_jobs = enqueue_events(site=frappe.local.site)
 
@@ -49,6 +56,45 @@ class TestScheduler(TestCase):
 			enqueued_jobs,
 		)
 
+	def test_next_run_heap(self):
+		reset_next_runs()
+		job = get_test_job(method="frappe.tests.test_scheduler.test_method", frequency="Daily")
+		self.assertIsNone(get_due_job_types(time.time()))
+
+		with patch.object(ScheduledJobType, "is_job_in_queue", return_value=False):
+			self.assertIn(job.method, enqueue_events(site=frappe.local.site))
+
+			# enqueued jobs move to their next run
+			self.assertNotIn(job.name, get_due_job_types(time.time()))
+			self.assertIn(job.name, get_due_job_types(time.time() + 24 * 60 * 60))
+			self.assertNotIn(job.method, enqueue_events(site=frappe.local.site))
+
+		# jobs that are still queued or running stay due
+		job.db_set("last_execution", "2010-01-01 00:00:00")
+		self.assertIn(job.name, get_due_job_types(time.time()))
+		with patch.object(ScheduledJobType, "is_job_in_queue", return_value=True):
+			self.assertNotIn(job.method, enqueue_events(site=frappe.local.site))
+		self.assertIn(job.name, get_due_job_types(time.time()))
+
+		job.stopped = 1
+		job.save()
+		self.assertIsNone(get_due_job_types(time.time()))
+		job.db_set("stopped", 0)
+		frappe.db.commit()
+
+	def test_scheduler_shards(self):
+		conn = get_redis_conn()
+		sites = [f"site{i}.localhost" for i in range(20)]
+		get_scheduler_shard(conn, "test-scheduler-1", sites, 60)
+		second = get_scheduler_shard(conn, "test-scheduler-2", sites, 60)
+		self.addCleanup(
+			conn.zrem, f"{get_bench_id()}:schedulers", "test-scheduler-1", "test-scheduler-2"
+		)
+
+		# all sites are handled by exactly one scheduler (assuming no other one is running)
+		first = get_scheduler_shard(conn, "test-scheduler-1", sites, 60)
+		self.assertEqual(sorted(first + second), sorted(sites))
+
 	def test_queue_peeking(self):
 		job = get_test_job()
 
@@ -842,6 +842,41 @@ class TestLinkTitle(FrappeTestCase):
 		user.delete()
 		prop_setter.delete()
 
+	def test_link_titles_fetched_in_batch(self):
+		from frappe.desk.form.load import get_link_titles
+
+		prop_setter = frappe.get_doc(
+			{
+				"doctype": "Property Setter",
+				"doc_type": "User",
+				"property": "show_title_field_in_link",
+				"property_type": "Check",
+				"doctype_or_field": "DocType",
+				"value": "1",
+			}
+		).insert()
+
+		todo = frappe.get_doc(
+			{
+				"doctype": "ToDo",
+				"description": "test-link-titles-in-batch",
+				"allocated_to": "Administrator",
+				"assigned_by": "Guest",
+			}
+		).insert()
+
+		get_link_titles(todo)  # warm up meta cache
+		with self.assertQueryCount(1):
+			link_titles = get_link_titles(todo)
+
+		self.assertEqual(
+			link_titles["User::Administrator"], frappe.db.get_value("User", "Administrator", "full_name")
+		)
+		self.assertEqual(link_titles["User::Guest"], frappe.db.get_value("User", "Guest", "full_name"))
+
+		todo.delete()
+		prop_setter.delete()
+
 
 class TestAppParser(MockedRequestTestCase):
 	def test_app_name_parser(self):
@@ -941,6 +941,11 @@ def get_file_size(path, format=False):
 	if not format:
 		return num
 
+	return format_size(num)
+
+
+def format_size(num: int) -> str:
+	"""Format size in bytes as a human readable string e.g. `1.5MiB`."""
 	suffix = "B"
 
 	for unit in ["", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"]:
@@ -1,19 +1,26 @@
 import gc
+import json
+import math
 import os
+import random
 import socket
 import time
 from collections import defaultdict
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta, timezone
 from functools import lru_cache
-from typing import Any, NoReturn
+from itertools import islice
+from typing import Any, NamedTuple, NoReturn
 from uuid import uuid4
 
 import redis
 from redis.exceptions import BusyLoadingError, ConnectionError
-from rq import Callback, Queue, Worker
+from rq import Callback, Queue, SimpleWorker, Worker, get_current_job
 from rq.exceptions import NoSuchJobError
 from rq.job import Job, JobStatus
 from rq.logutils import setup_loghandlers
+from rq.registry import StartedJobRegistry
+from rq.utils import as_text, backend_class, utcnow
 from rq.worker import DequeueStrategy
 from rq.worker_pool import WorkerPool
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
@@ -21,7 +28,7 @@ from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fi
 import frappe
 import frappe.monitor
 from frappe import _
-from frappe.utils import cint, cstr, get_bench_id
+from frappe.utils import cint, cstr, get_bench_id, make_filter_tuple
 from frappe.utils.commands import log
 from frappe.utils.deprecations import deprecation_warning
 from frappe.utils.redis_queue import RedisQueue
@@ -30,9 +37,89 @@ from frappe.utils.redis_queue import RedisQueue
 RQ_JOB_FAILURE_TTL = 7 * 24 * 60 * 60  # 7 days instead of 1 year (default)
 RQ_FAILED_JOBS_LIMIT = 1000  # Only keep these many recent failed jobs around
 RQ_RESULTS_TTL = 10 * 60
+# Seconds after the delay for which a debounced job's window stays open, in case the job is lost
+DEBOUNCE_WINDOW_TTL = 60 * 60
+# Retries of failed jobs, unless the method has its own policy in the `job_retry_policy` hook
+DEFAULT_JOB_RETRY_POLICY = {"max_retries": 5, "base_delay": 1, "max_delay": 5 * 60}
+# Seconds a fair queueing worker blocks on known queues before looking for new site queues
+FAIR_QUEUE_POLL_INTERVAL = 5
+# Seconds fair queueing workers cache the list of sites and their weights and concurrency limits
+FAIR_QUEUE_REFRESH_INTERVAL = 60
+# Autoscaling worker pools add workers when there are more queued jobs per worker than this,
+AUTOSCALE_BACKLOG_PER_WORKER = 10
+# or when the oldest queued job has been waiting for longer than these many seconds.
+AUTOSCALE_MAX_WAIT = 10
+# Workers are removed one at a time, after queues have been empty for these many seconds
+AUTOSCALE_SCALE_DOWN_DELAY = 60
+# Seconds between two scaling decisions
+AUTOSCALE_INTERVAL = 5
+# Seconds a database connection may sit idle between jobs before it is closed instead of reused
+WARM_CONNECTION_IDLE_TIMEOUT = 60
+# Seconds state of a parallel map is kept in redis after its last finished chunk
+PARALLEL_MAP_TTL = 7 * 24 * 60 * 60
+# Times a chunk or reduce step of a parallel map is started before it is no longer resumed
+PARALLEL_MAP_MAX_ATTEMPTS = 3
+# Seconds within which jobs of each priority should start, can be changed with `job_priorities`
+# in site config. Jobs waiting past this deadline are taken before jobs of other queues.
+JOB_PRIORITIES = {"urgent": 10, "high": 60, "normal": 5 * 60, "low": 30 * 60}
+# Priority of jobs enqueued without one, by queue
+DEFAULT_QUEUE_PRIORITIES = {"short": "high", "default": "normal", "long": "low"}
+
+# Take the most urgent job of a worker's queues: the job most past its deadline in the queues
+# flagged in ARGV if there is one, otherwise the job with the earliest deadline in the first
+# non-empty queue.
+#
+# Each queue costs a LINDEX, a ZRANGE and a ZSCORE, all O(1) or O(log n), and only flagged
+# queues and the ones up to the first non-empty queue are looked at. The LREM claiming the job
+# scans the queue from its head, which is where the picked job is unless jobs of higher
+# priority were enqueued behind others, so it stays cheap even with long queues.
+#
+# KEYS: key and deadline index of each queue, in the order the worker prefers them
+# ARGV: current time, then "1" for each queue whose late jobs may go first
+PRIORITY_DEQUEUE_SCRIPT = """
+local now = tonumber(ARGV[1])
+while true do
+	local first, overdue
+	for i = 1, #KEYS, 2 do
+		local eligible = ARGV[(i + 1) / 2 + 1] == "1"
+		if eligible or not first then
+			local head = redis.call("LINDEX", KEYS[i], 0)
+			if head then
+				local entry = redis.call("ZRANGE", KEYS[i + 1], 0, 0, "WITHSCORES")
+				local job_id, deadline = entry[1], tonumber(entry[2])
+				-- jobs moved to the queue by rq's scheduler (retries, debounced jobs) aren't indexed
+				if not (deadline and deadline < now) and not redis.call("ZSCORE", KEYS[i + 1], head) then
+					job_id, deadline = head, now
+				end
+				if eligible and deadline < now and (not overdue or deadline < overdue[3]) then
+					overdue = {i, job_id, deadline}
+				end
+				first = first or {i, job_id, deadline}
+			else
+				-- queue was emptied, whatever is left in its index is stale
+				redis.call("DEL", KEYS[i + 1])
+			end
+		end
+	end
+
+	local pick = overdue or first
+	if not pick then
+		return false
+	end
+	redis.call("ZREM", KEYS[pick[1] + 1], pick[2])
+	-- index entries of jobs removed from the queue are dropped until a queued one is found
+	if redis.call("LREM", KEYS[pick[1]], 1, pick[2]) == 1 then
+		return {KEYS[pick[1]], pick[2]}
+	end
+end
+"""
 
 
 _redis_queue_conn = None
+# Set by non-forking workers, which run all jobs in one process and can reuse connections
+_keep_connections_warm = False
+# (site, db name) -> (connection, last used), for connections released by the previous jobs
+_warm_connections: dict[tuple[str, str], tuple[Any, float]] = {}
 
 
 @lru_cache
@@ -69,6 +156,10 @@ def enqueue(
 	at_front: bool = False,
 	job_id: str = None,
 	deduplicate=False,
+	debounce: int | None = None,
+	collect: Iterable[str] | None = None,
+	priority: str | None = None,
+	deadline: int | None = None,
 	**kwargs,
 ) -> Job | Any:
 	"""
@@ -84,15 +175,24 @@ def enqueue(
 	:param kwargs: keyword arguments to be passed to the method
 	:param deduplicate: do not re-queue job if it's already queued, requires job_id.
 	:param job_id: Assigning unique job id, which can be checked using `is_job_enqueued`
+	:param debounce: run the job after these many seconds, merging all enqueues with the same
+	        `job_id` (or method if not set) made meanwhile into this job.
+	:param collect: names of keyword arguments whose values are collected from all merged
+	        enqueues of a debounced job, the job gets a list of their distinct values.
+	        Other arguments are the ones passed to the first enqueue.
+	:param priority: one of `JOB_PRIORITIES`, by default `high` for the short queue, `low` for
+	        the long queue and `normal` otherwise. Workers take jobs by deadline within a queue.
+	:param deadline: seconds within which the job should start, instead of the priority's
 	"""
 	# To handle older implementations
 	is_async = kwargs.pop("async", is_async)
+	debounce_key = create_job_id(job_id or cstr(method)) if debounce else None
 
 	if deduplicate:
 		if not job_id:
 			frappe.throw(_("`job_id` paramater is required for deduplication."))
 		job = get_job(job_id)
-		if job and job.get_status() in (JobStatus.QUEUED, JobStatus.STARTED):
+		if job and job.get_status() in (JobStatus.QUEUED, JobStatus.STARTED, JobStatus.SCHEDULED):
 			frappe.logger().debug(f"Not queueing job {job.id} because it is in queue already")
 			return
 		elif job:
@@ -130,6 +230,7 @@ def enqueue(
 	if not timeout:
 		timeout = get_queues_timeout().get(queue) or 300
 
+	meta = get_job_meta(queue, priority, deadline, at_front)
 	queue_args = {
 		"site": frappe.local.site,
 		"user": frappe.session.user,
@@ -143,6 +244,21 @@ def enqueue(
 	on_failure = on_failure or truncate_failed_registry
 
 	def enqueue_call():
+		if debounce_key and is_async:
+			return enqueue_debounced(
+				q,
+				debounce_key,
+				debounce,
+				list(collect or ()),
+				queue_args,
+				on_success=Callback(func=on_success) if on_success else None,
+				on_failure=Callback(func=on_failure) if on_failure else None,
+				timeout=timeout,
+				failure_ttl=frappe.conf.get("rq_job_failure_ttl") or RQ_JOB_FAILURE_TTL,
+				result_ttl=frappe.conf.get("rq_results_ttl") or RQ_RESULTS_TTL,
+				meta=meta,
+			)
+
 		return q.enqueue_call(
 			execute_job,
 			on_success=Callback(func=on_success) if on_success else None,
@@ -153,6 +269,7 @@ def enqueue(
 			failure_ttl=frappe.conf.get("rq_job_failure_ttl") or RQ_JOB_FAILURE_TTL,
 			result_ttl=frappe.conf.get("rq_results_ttl") or RQ_RESULTS_TTL,
 			job_id=job_id,
+			meta=meta,
 		)
 
 	if enqueue_after_commit:
@@ -162,6 +279,134 @@ def enqueue(
 	return enqueue_call()
 
 
+def enqueue_debounced(
+	q: Queue, debounce_key: str, debounce: int, collect: Iterable[str], queue_args: dict, **job_kwargs
+) -> Job | None:
+	"""Schedule a job to run after `debounce` seconds unless one is scheduled for `debounce_key`
+	already, and add values of `collect` arguments to the ones the job will get.
+
+	Returns the scheduled job, or `None` if the enqueue was merged into an existing one."""
+	kwargs = dict(queue_args["kwargs"])
+	pipeline = q.connection.pipeline()
+	for arg in collect:
+		values = kwargs.pop(arg, None)
+		if values is None:
+			continue
+		if not isinstance(values, (list, tuple, set)):
+			values = [values]
+		if values:
+			key = f"{debounce_key}:collect:{arg}"
+			pipeline.sadd(key, *(json.dumps(v, sort_keys=True) for v in values))
+			pipeline.expire(key, debounce + DEBOUNCE_WINDOW_TTL)
+
+	# window is closed by the job when it starts, see `pop_debounced_args`
+	pipeline.set(f"{debounce_key}:debounce", 1, nx=True, ex=debounce + DEBOUNCE_WINDOW_TTL)
+	if not pipeline.execute()[-1]:
+		return
+
+	job = q.create_job(
+		execute_job,
+		kwargs={**queue_args, "kwargs": kwargs, "debounce_key": debounce_key, "collect": list(collect)},
+		job_id=create_job_id(None),
+		**job_kwargs,
+	)
+	return get_base_queue(q).schedule_job(
+		job, datetime.now(timezone.utc) + timedelta(seconds=debounce)
+	)
+
+
+def pop_debounced_args(debounce_key: str, collect: Iterable[str]) -> dict:
+	"""Close the debounce window of `debounce_key` and return the values collected for it."""
+	collect = list(collect)
+	pipeline = get_redis_conn().pipeline()
+	pipeline.delete(f"{debounce_key}:debounce")
+	for arg in collect:
+		pipeline.smembers(f"{debounce_key}:collect:{arg}")
+		pipeline.delete(f"{debounce_key}:collect:{arg}")
+
+	results = pipeline.execute()[1::2]
+	return {arg: [json.loads(v) for v in sorted(values)] for arg, values in zip(collect, results)}
+
+
+def enqueue_many(
+	method: str | Callable,
+	kwargs_list: Iterable[dict],
+	queue: str = "default",
+	timeout: int | None = None,
+	event=None,
+	enqueue_after_commit: bool = False,
+	*,
+	job_ids: Iterable[str] | None = None,
+	chunk_size: int = 1000,
+	on_success: Callable = None,
+	on_failure: Callable = None,
+	at_front: bool = False,
+	priority: str | None = None,
+) -> list[str]:
+	"""
+	Enqueue a job for each set of keyword arguments in `kwargs_list`. Jobs are created in
+	batches of `chunk_size`, with a single round trip to redis per batch.
+
+	:param method: method string or method object
+	:param kwargs_list: keyword arguments to be passed to the method, one dict per job
+	:param queue: should be either long, default or short
+	:param timeout: should be set according to the functions
+	:param event: this is passed to enable clearing of jobs from queues
+	:param enqueue_after_commit: enqueue the jobs after the current transaction is committed
+	:param job_ids: unique job ids in the same order as `kwargs_list`, generated if not given
+	:param chunk_size: number of jobs enqueued per round trip
+	:param priority: one of `JOB_PRIORITIES`, see `enqueue`
+	:returns: job ids, which can be checked using `is_job_enqueued`
+	"""
+	kwargs_list = list(kwargs_list)
+	job_ids = list(job_ids) if job_ids is not None else [str(uuid4()) for _ in kwargs_list]
+	if len(job_ids) != len(kwargs_list):
+		frappe.throw(_("Number of job ids should be the same as the number of jobs."))
+
+	q = get_queue(queue)
+	timeout = timeout or get_queues_timeout().get(queue) or 300
+	meta = get_job_meta(queue, priority, at_front=at_front)
+	queue_args = {
+		"site": frappe.local.site,
+		"user": frappe.session.user,
+		"method": method,
+		"event": event,
+		"job_name": cstr(method),
+		"is_async": True,
+	}
+	on_failure = on_failure or truncate_failed_registry
+
+	def enqueue_chunks():
+		jobs = iter(zip(job_ids, kwargs_list))
+		while chunk := list(islice(jobs, chunk_size)):
+			job_datas = [
+				Queue.prepare_data(
+					execute_job,
+					kwargs={**queue_args, "kwargs": kwargs},
+					timeout=timeout,
+					job_id=create_job_id(job_id),
+					at_front=at_front,
+					failure_ttl=frappe.conf.get("rq_job_failure_ttl") or RQ_JOB_FAILURE_TTL,
+					result_ttl=frappe.conf.get("rq_results_ttl") or RQ_RESULTS_TTL,
+					on_success=Callback(func=on_success) if on_success else None,
+					on_failure=Callback(func=on_failure),
+					meta=meta,
+				)
+				for job_id, kwargs in chunk
+			]
+
+			with q.connection.pipeline() as pipeline:
+				q.enqueue_many(job_datas, pipeline=pipeline)
+				pipeline.execute()
+
+	if enqueue_after_commit:
+		frappe.db.after_commit.add(enqueue_chunks)
+	else:
+		enqueue_chunks()
+
+	return job_ids
+
+
 def enqueue_doc(
 	doctype, name=None, method=None, queue="default", timeout=300, now=False, **kwargs
 ):
@@ -182,17 +427,311 @@ def run_doc_method(doctype, name, doc_method, **kwargs):
 	getattr(frappe.get_doc(doctype, name), doc_method)(**kwargs)
 
 
-def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True, retry=0):
+def parallel_map(
+	doctype: str,
+	filters: dict | list | None,
+	method: str | Callable,
+	chunk_size: int = 1000,
+	*,
+	reduce: str | Callable | None = None,
+	queue: str = "long",
+	timeout: int | None = None,
+	title: str | None = None,
+	map_id: str | None = None,
+	**kwargs,
+) -> str:
+	"""
+	Process documents of `doctype` matching `filters` in parallel background jobs.
+
+	A planning job splits names into ranges of `chunk_size` documents and enqueues a job for each
+	range as soon as it finds it, which calls `method(doctype, names, **kwargs)`. Once all chunks
+	are done, another job calls `reduce(results, **kwargs)` with the return values of `method`
+	in order of names.
+
+	State of the chunks is kept in redis and chunks lost to worker restarts are enqueued again
+	by `resume_parallel_maps`, so `method` should be safe to run more than once on a chunk.
+
+	:param method: method string or method object, its return value must be JSON serializable
+	:param reduce: (optional) method string or method object
+	:param queue: queue of the planning, chunk and reduce jobs
+	:param timeout: timeout of each chunk and of the reduce job
+	:param title: title of the progress shown to the user
+	:param map_id: (optional) unique id, generated if not given
+	:returns: id of the map, which can be checked using `get_parallel_map_status`
+	"""
+	map_id = map_id or str(uuid4())
+	if isinstance(filters, dict):
+		filters = [make_filter_tuple(doctype, key, value) for key, value in filters.items()]
+
+	meta = {
+		"doctype": doctype,
+		"filters": list(filters or []),
+		"chunk_size": chunk_size,
+		"method": get_method_path(method),
+		"reduce": reduce and get_method_path(reduce),
+		"kwargs": kwargs,
+		"queue": queue,
+		"timeout": timeout,
+		"title": title or _("Processing {0}").format(_(doctype)),
+	}
+
+	key = create_job_id(f"parallel_map:{map_id}")
+	index = create_job_id("parallel_maps")
+	pipeline = get_redis_conn().pipeline()
+	pipeline.delete(key, f"{key}:pending")
+	pipeline.hset(key, mapping={"meta": frappe.as_json(meta), "status": "running", "found": 0})
+	pipeline.expire(key, PARALLEL_MAP_TTL)
+	pipeline.sadd(index, map_id)
+	pipeline.expire(index, PARALLEL_MAP_TTL)
+	pipeline.execute()
+
+	enqueue_parallel_map_plan(map_id, meta)
+	return map_id
+
+
+def plan_parallel_map(map_id: str) -> None:
+	"""Split the names of a parallel map into chunks and enqueue a job for each of them.
+
+	Continues after the last chunk found if it is run again."""
+	key = create_job_id(f"parallel_map:{map_id}")
+	conn = get_redis_conn()
+	meta, total, found = conn.hmget(key, "meta", "total", "found")
+	if not meta or total is not None:
+		# planned by an earlier run, or expired
+		return
+
+	meta = json.loads(meta)
+	conn.hincrby(key, "attempts:plan")
+	chunk, last = cint(found), None
+	if chunk:
+		last = json.loads(conn.hget(key, f"chunk:{chunk - 1}"))[1]
+
+	# keyset pagination, each query only reads one chunk of names
+	while names := frappe.get_all(
+		meta["doctype"],
+		filters=meta["filters"] + ([["name", ">", last]] if chunk else []),
+		pluck="name",
+		order_by="name asc",
+		limit=meta["chunk_size"],
+	):
+		last = names[-1]
+		pipeline = conn.pipeline()
+		pipeline.hset(key, mapping={f"chunk:{chunk}": json.dumps((names[0], last)), "found": chunk + 1})
+		pipeline.sadd(f"{key}:pending", chunk)
+		pipeline.expire(f"{key}:pending", PARALLEL_MAP_TTL)
+		pipeline.execute()
+		enqueue_parallel_map_chunk(map_id, meta, chunk)
+		chunk += 1
+
+	# atomic with chunks finishing: either they see the total or this sees them done
+	pipeline = conn.pipeline()
+	pipeline.hset(key, "total", chunk)
+	pipeline.scard(f"{key}:pending")
+	_, pending = pipeline.execute()
+	if not pending:
+		enqueue_parallel_reduce(map_id, meta)
+
+
+def run_parallel_map_chunk(map_id: str, chunk: int) -> None:
+	"""Call the method of a parallel map on the names of `chunk`, see `parallel_map`."""
+	key = create_job_id(f"parallel_map:{map_id}")
+	conn = get_redis_conn()
+	meta, bounds = conn.hmget(key, "meta", f"chunk:{chunk}")
+	if not meta or not conn.sismember(f"{key}:pending", chunk):
+		# finished by an earlier run, or expired
+		return
+
+	meta = json.loads(meta)
+	first, last = json.loads(bounds)
+	conn.hincrby(key, f"attempts:{chunk}")
+	names = frappe.get_all(
+		meta["doctype"],
+		filters=meta["filters"] + [["name", ">=", first], ["name", "<=", last]],
+		pluck="name",
+		order_by="name asc",
+	)
+	result = frappe.get_attr(meta["method"])(meta["doctype"], names, **meta["kwargs"])
+	# changes must be saved before the chunk is marked as done
+	frappe.db.commit()
+
+	pipeline = conn.pipeline()
+	pipeline.hset(key, f"result:{chunk}", frappe.as_json(result))
+	pipeline.srem(f"{key}:pending", chunk)
+	pipeline.scard(f"{key}:pending")
+	pipeline.hget(key, "total")
+	pipeline.expire(key, PARALLEL_MAP_TTL)
+	_, removed, pending, total, _ = pipeline.execute()
+	if not removed or total is None:
+		# a duplicate run of the chunk finished first, or chunks are still being planned
+		return
+
+	done, total = int(total) - pending, int(total)
+	frappe.publish_progress(
+		done * 100 / total,
+		title=meta["title"],
+		description=_("{0} of {1} batches done").format(done, total),
+	)
+	if not pending:
+		enqueue_parallel_reduce(map_id, meta)
+
+
+def reduce_parallel_map(map_id: str) -> None:
+	"""Call the reduce method of a parallel map with results of all chunks and mark it as done."""
+	key = create_job_id(f"parallel_map:{map_id}")
+	conn = get_redis_conn()
+	meta, status, total = conn.hmget(key, "meta", "status", "total")
+	if not meta or status == b"done" or total is None or conn.scard(f"{key}:pending"):
+		return
+
+	meta, total = json.loads(meta), int(total)
+	conn.hincrby(key, "attempts:reduce")
+	if meta["reduce"]:
+		results = conn.hmget(key, [f"result:{i}" for i in range(total)]) if total else []
+		frappe.get_attr(meta["reduce"])([json.loads(r) for r in results], **meta["kwargs"])
+		frappe.db.commit()
+
+	pipeline = conn.pipeline()
+	pipeline.hset(key, "status", "done")
+	pipeline.expire(key, RQ_RESULTS_TTL)
+	pipeline.srem(create_job_id("parallel_maps"), map_id)
+	pipeline.execute()
+	frappe.publish_progress(100, title=meta["title"], description=_("Done"))
+
+
+def enqueue_parallel_map_plan(map_id: str, meta: dict) -> None:
+	enqueue(
+		"frappe.utils.background_jobs.plan_parallel_map",
+		queue=meta["queue"],
+		job_id=f"parallel_map:{map_id}:plan",
+		deduplicate=True,
+		map_id=map_id,
+	)
+
+
+def enqueue_parallel_map_chunk(map_id: str, meta: dict, chunk: int) -> None:
+	enqueue(
+		"frappe.utils.background_jobs.run_parallel_map_chunk",
+		queue=meta["queue"],
+		timeout=meta["timeout"],
+		job_id=f"parallel_map:{map_id}:{chunk}",
+		deduplicate=True,
+		map_id=map_id,
+		chunk=chunk,
+	)
+
+
+def enqueue_parallel_reduce(map_id: str, meta: dict) -> None:
+	enqueue(
+		"frappe.utils.background_jobs.reduce_parallel_map",
+		queue=meta["queue"],
+		timeout=meta["timeout"],
+		job_id=f"parallel_map:{map_id}:reduce",
+		deduplicate=True,
+		map_id=map_id,
+	)
+
+
+def resume_parallel_map(map_id: str) -> int:
+	"""Enqueue chunks of a parallel map again whose jobs were lost, like to a worker restart.
+
+	Returns the number of chunks enqueued."""
+	key = create_job_id(f"parallel_map:{map_id}")
+	conn = get_redis_conn()
+	meta, status, total, plan_attempts, reduce_attempts = conn.hmget(
+		key, "meta", "status", "total", "attempts:plan", "attempts:reduce"
+	)
+	if not meta or status == b"done":
+		return 0
+
+	meta = json.loads(meta)
+	if (
+		total is None
+		and cint(plan_attempts) < PARALLEL_MAP_MAX_ATTEMPTS
+		and not is_job_enqueued(f"parallel_map:{map_id}:plan")
+	):
+		enqueue_parallel_map_plan(map_id, meta)
+
+	pending = sorted(int(chunk) for chunk in conn.smembers(f"{key}:pending"))
+	if not pending:
+		if (
+			total is not None
+			and cint(reduce_attempts) < PARALLEL_MAP_MAX_ATTEMPTS
+			and not is_job_enqueued(f"parallel_map:{map_id}:reduce")
+		):
+			enqueue_parallel_reduce(map_id, meta)
+		return 0
+
+	attempts = conn.hmget(key, [f"attempts:{chunk}" for chunk in pending])
+	lost = [
+		chunk
+		for chunk, attempt in zip(pending, attempts)
+		if cint(attempt) < PARALLEL_MAP_MAX_ATTEMPTS
+		and not is_job_enqueued(f"parallel_map:{map_id}:{chunk}")
+	]
+	for chunk in lost:
+		enqueue_parallel_map_chunk(map_id, meta, chunk)
+	return len(lost)
+
+
+def resume_parallel_maps() -> None:
+	"""Resume unfinished parallel maps of the site, runs hourly."""
+	conn = get_redis_conn()
+	index = create_job_id("parallel_maps")
+	for map_id in conn.smembers(index):
+		map_id = map_id.decode()
+		if not conn.exists(create_job_id(f"parallel_map:{map_id}")):
+			conn.srem(index, map_id)
+			continue
+		resume_parallel_map(map_id)
+
+
+def get_parallel_map_status(map_id: str) -> dict | None:
+	"""Get status (running or done), number of chunks (`None` while they are still being found)
+	and of pending chunks of a parallel map."""
+	key = create_job_id(f"parallel_map:{map_id}")
+	conn = get_redis_conn()
+	meta, status, total = conn.hmget(key, "meta", "status", "total")
+	if not meta:
+		return
+
+	return {
+		"status": status.decode(),
+		"total": total and int(total),
+		"pending": conn.scard(f"{key}:pending"),
+	}
+
+
+def get_method_path(method: str | Callable) -> str:
+	if isinstance(method, str):
+		return method
+	return f"{method.__module__}.{method.__qualname__}"
+
+
+def execute_job(
+	site,
+	method,
+	event,
+	job_name,
+	kwargs,
+	user=None,
+	is_async=True,
+	retry=0,
+	debounce_key=None,
+	collect=None,
+):
 	"""Executes job in a worker, performs commit/rollback and logs if there is any error"""
 	retval = None
 	if is_async:
-		frappe.connect(site)
+		connect_job_site(site)
 		if os.environ.get("CI"):
 			frappe.flags.in_test = True
 
 		if user:
 			frappe.set_user(user)
 
+	if debounce_key:
+		kwargs = {**kwargs, **pop_debounced_args(debounce_key, collect or ())}
+
 	if isinstance(method, str):
 		method_name = method
 		method = frappe.get_attr(method)
@@ -207,8 +746,9 @@ def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True,
 
 	except (frappe.db.InternalError, frappe.RetryBackgroundJobError) as e:
 		frappe.db.rollback()
+		policy = get_retry_policy(method_name)
 
-		if retry < 5 and (
+		if retry < policy.max_retries and (
 			isinstance(e, frappe.RetryBackgroundJobError)
 			or (frappe.db.is_deadlocked(e) or frappe.db.is_timedout(e))
 		):
@@ -216,17 +756,30 @@ def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True,
 			# 1213 = deadlock
 			# 1205 = lock wait timeout
 			# or RetryBackgroundJobError is explicitly raised
-			frappe.destroy()
-			time.sleep(retry + 1)
+			delay = get_retry_delay(policy, retry)
+			job = get_current_job() if is_async else None
+			if job:
+				# don't hold up the worker, scheduler moves the retry to the queue when it's due
+				set_job_retry(job, kwargs, retry + 1, delay)
+				frappe.monitor.set_job_status("retried")
+				frappe.logger().info(
+					f"Retrying {method_name} in {delay:.1f}s as job {job.id} (attempt {retry + 1})"
+				)
+				raise
+
+			release_job_site()
+			time.sleep(delay)
 
 			return execute_job(site, method, event, job_name, kwargs, is_async=is_async, retry=retry + 1)
 
 		else:
+			frappe.monitor.set_job_status("failed")
 			frappe.log_error(title=method_name)
 			raise
 
 	except Exception:
 		frappe.db.rollback()
+		frappe.monitor.set_job_status("failed")
 		frappe.log_error(title=method_name)
 		frappe.db.commit()
 		print(frappe.get_traceback())
@@ -241,7 +794,367 @@ def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True,
 			frappe.call(after_job_task, method=method_name, kwargs=kwargs, result=retval)
 
 		if is_async:
-			frappe.destroy()
+			release_job_site()
+
+
+class RetryPolicy(NamedTuple):
+	max_retries: int
+	base_delay: float
+	max_delay: float
+
+
+def get_retry_policy(method_name: str) -> RetryPolicy:
+	"""Get retry policy of a job method, from `job_retry_policy` hooks like:
+
+	job_retry_policy = {"app.module.method": {"max_retries": 10, "max_delay": 600}}
+	"""
+	policy = frappe.get_hooks("job_retry_policy", {}).get(method_name) or {}
+	# hook values get listified, last app wins
+	return RetryPolicy(**{**DEFAULT_JOB_RETRY_POLICY, **{k: v[-1] for k, v in policy.items()}})
+
+
+def get_retry_delay(policy: RetryPolicy, retry: int) -> float:
+	"""Seconds to wait before attempt `retry + 1`.
+
+	Delay doubles every attempt up to `max_delay`, half of it is random so that jobs which
+	failed together (like both sides of a deadlock) don't retry together."""
+	delay = min(policy.max_delay, policy.base_delay * 2**retry)
+	return delay / 2 + random.uniform(0, delay / 2)
+
+
+def set_job_retry(job: Job, kwargs: dict, retry: int, delay: float) -> None:
+	"""Make rq retry the running `job` as attempt `retry`, `delay` seconds after it fails.
+
+	The job keeps its id and is scheduled instead of failed, so it still counts as enqueued
+	(see `is_job_enqueued`) and its success callback only runs once it succeeds. Failure
+	callbacks run after every failed attempt."""
+	# debounced arguments are already merged into `kwargs`
+	job.kwargs = {
+		**job.kwargs,
+		"kwargs": kwargs,
+		"retry": retry,
+		"debounce_key": None,
+		"collect": None,
+	}
+	job.retries_left = 1
+	job.retry_intervals = [delay]
+
+
+def connect_job_site(site: str) -> None:
+	"""Initialize `frappe.local` for a job, reusing a database connection released by the
+	previous job on this site if there is one."""
+	from frappe.database.database import get_query_execution_timeout
+
+	frappe.connect(site)
+
+	conn, last_used = _warm_connections.pop((site, frappe.db.user), (None, 0))
+	if not conn:
+		return
+
+	if time.monotonic() - last_used > WARM_CONNECTION_IDLE_TIMEOUT or not is_connection_open(conn):
+		close_connection(conn)
+		return
+
+	frappe.db.cur_db_name = frappe.db.user
+	frappe.db._conn = conn
+	frappe.db._cursor = conn.cursor()
+
+	# timeout depends on the job being run
+	try:
+		if execution_timeout := get_query_execution_timeout():
+			frappe.db.set_execution_timeout(execution_timeout)
+	except Exception as e:
+		frappe.db.logger.warning(f"Couldn't set execution timeout {e}")
+
+
+def release_job_site() -> None:
+	"""Reset `frappe.local` after a job.
+
+	Non-forking workers keep the (primary) database connection open for the next job on the
+	same site after rolling back whatever the job left uncommitted and resetting its session
+	state. Everything else - flags, caches, user, conf - is rebuilt from scratch by the next
+	`frappe.init`.
+	"""
+	db = getattr(frappe.local, "primary_db", None) or getattr(frappe.local, "db", None)
+	if _keep_connections_warm and db and db._conn:
+		try:
+			db._conn.rollback()
+			# session variables and temporary tables set by the job don't leak to the next one
+			db.reset_connection()
+		except Exception:
+			db.close()
+		else:
+			key = (frappe.local.site, db.cur_db_name)
+			close_connection(_warm_connections.pop(key, (None,))[0])
+			_warm_connections[key] = (db._conn, time.monotonic())
+			db._conn = db._cursor = None
+
+	frappe.destroy()
+
+
+def close_warm_connections() -> None:
+	"""Close all connections kept open between jobs."""
+	while _warm_connections:
+		close_connection(_warm_connections.popitem()[1][0])
+
+
+def is_connection_open(conn) -> bool:
+	# pymysql exposes `open`, psycopg2 exposes `closed`
+	if hasattr(conn, "open"):
+		return conn.open
+	return not getattr(conn, "closed", False)
+
+
+def close_connection(conn) -> None:
+	if not conn:
+		return
+	try:
+		conn.close()
+	except Exception:
+		pass
+
+
+def get_job_priorities() -> dict[str, int]:
+	return {**JOB_PRIORITIES, **(frappe.conf.job_priorities or {})}
+
+
+def get_job_meta(
+	queue: str, priority: str | None = None, deadline: int | None = None, at_front: bool = False
+) -> dict:
+	"""Returns rq job meta with the priority of a job and seconds within which it should start."""
+	priorities = get_job_priorities()
+	priority = priority or DEFAULT_QUEUE_PRIORITIES.get(queue, "normal")
+	if priority not in priorities:
+		frappe.throw(_("Job priority should be one of {0}").format(", ".join(priorities)))
+
+	if deadline is None:
+		# ahead of every job that isn't late yet
+		deadline = 0 if at_front else priorities[priority]
+	return {"priority": priority, "max_wait": deadline}
+
+
+def get_deadlines_key(queue_key: str) -> str:
+	return f"{queue_key}:deadlines"
+
+
+class PriorityQueue(Queue):
+	"""Queue which keeps the deadline of its jobs in a sorted set next to the list of job ids.
+
+	Workers take the job with the earliest deadline of the first non-empty queue, except
+	when jobs of other queues are past their deadline: then the one most overdue goes first, so
+	that batch work in one queue can't keep jobs of another waiting indefinitely.
+
+	With fair queueing, late jobs only jump ahead within the shared queues and those of the
+	first site in line, so that a backlog of late jobs doesn't undo the round-robin of sites.
+	"""
+
+	def schedule_job(self, job, scheduled_at, pipeline=None):
+		# retries of jobs taken from site sub-queues, see `get_base_queue`
+		if (base_queue := get_base_queue(self)) is not self:
+			return base_queue.schedule_job(job, scheduled_at, pipeline=pipeline)
+		return super().schedule_job(job, scheduled_at, pipeline=pipeline)
+
+	def _enqueue_job(self, job, pipeline=None, at_front=False):
+		if not self._is_async:
+			return super()._enqueue_job(job, pipeline=pipeline, at_front=at_front)
+
+		pipe = pipeline if pipeline is not None else self.connection.pipeline()
+		job = super()._enqueue_job(job, pipeline=pipe, at_front=at_front)
+		max_wait = job.meta.get("max_wait", JOB_PRIORITIES["normal"])
+		pipe.zadd(get_deadlines_key(self.key), {job.id: time.time() + max_wait})
+		if pipeline is None:
+			pipe.execute()
+		return job
+
+	@classmethod
+	def dequeue_any(
+		cls,
+		queues,
+		timeout,
+		connection=None,
+		job_class=None,
+		serializer=None,
+		death_penalty_class=None,
+	):
+		job_class = backend_class(cls, "job_class", override=job_class)
+		script = connection.register_script(PRIORITY_DEQUEUE_SCRIPT)
+		keys = [key for q in queues for key in (q.key, get_deadlines_key(q.key))]
+		sites = [parse_qname(q.name)[1] for q in queues]
+		first_site = next(filter(None, sites), None)
+		late_first = [int(site in (None, first_site)) for site in sites]
+
+		while result := script(keys=keys, args=[time.time(), *late_first]):
+			queue_key, job_id = map(as_text, result)
+			queue = cls.from_queue_key(
+				queue_key,
+				connection=connection,
+				job_class=job_class,
+				serializer=serializer,
+				death_penalty_class=death_penalty_class,
+			)
+			try:
+				return job_class.fetch(job_id, connection=connection, serializer=serializer), queue
+			except NoSuchJobError:
+				continue
+
+		# all queues are empty, the first job pushed to any of them is the most urgent one
+		result = super().dequeue_any(
+			queues,
+			timeout,
+			connection=connection,
+			job_class=job_class,
+			serializer=serializer,
+			death_penalty_class=death_penalty_class,
+		)
+		if result:
+			job, queue = result
+			connection.zrem(get_deadlines_key(queue.key), job.id)
+		return result
+
+
+class PriorityWorker(Worker):
+	"""Worker that takes the most urgent job of its queues, see `PriorityQueue`."""
+
+	queue_class = PriorityQueue
+
+	def __init__(self, queues, *args, **kwargs):
+		# worker pools pass plain queues
+		super().__init__([getattr(q, "name", q) for q in queues], *args, **kwargs)
+
+	def work(self, *args, with_scheduler: bool = True, **kwargs):
+		# moves debounced jobs to their queues when they are due, worker pools don't ask for it.
+		# Only the worker holding a queue's scheduler lock does the work, others just check it.
+		return super().work(*args, with_scheduler=with_scheduler, **kwargs)
+
+
+class PrioritySimpleWorker(PriorityWorker, SimpleWorker):
+	pass
+
+
+class FairWorker(PriorityWorker):
+	"""Worker that shares queues fairly between the sites of a bench.
+
+	With `fair_queueing` set in common_site_config.json, jobs are enqueued in per-site
+	sub-queues (`<bench>:<queue>:<site>`), which this worker pulls from in weighted round-robin
+	order: a site stays first in line for `background_jobs_weight` jobs (1 by default), then
+	moves to the back. Sites already running `background_jobs_concurrency` jobs are skipped.
+	This limit is soft: idle workers check it at the same time, so it can be exceeded by as
+	many jobs as there are workers.
+
+	Shared queues are still consumed first, they get the jobs scheduled for later (retries,
+	debounced jobs) and the ones enqueued before fair queueing was enabled.
+	"""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._sites: list[str] = []  # round-robin order
+		self._site_limits: dict[str, tuple[int, int]] = {}  # site -> (weight, concurrency)
+		self._site_queues: dict[str, Queue] = {}
+		self._served: defaultdict[str, int] = defaultdict(int)
+		self._refreshed_at = 0.0
+
+	def dequeue_job_and_maintain_ttl(self, timeout, max_idle_time=None):
+		if timeout is None:  # burst mode
+			self._ordered_queues = self.get_fair_queues()
+			return super().dequeue_job_and_maintain_ttl(timeout, max_idle_time)
+
+		# stop blocking every now and then to pick up new sites and concurrency changes
+		poll_interval = min(timeout, FAIR_QUEUE_POLL_INTERVAL)
+		idle_since = time.monotonic()
+		while True:
+			self._ordered_queues = self.get_fair_queues()
+			if result := super().dequeue_job_and_maintain_ttl(poll_interval, poll_interval):
+				return result
+			if max_idle_time is not None and time.monotonic() - idle_since >= max_idle_time:
+				return None
+
+	def reorder_queues(self, reference_queue):
+		site = parse_qname(reference_queue.name)[1]
+		if site not in self._site_limits:
+			return
+
+		self._served[site] += 1
+		if self._served[site] >= self._site_limits[site][0]:
+			self._served[site] = 0
+			self._sites.remove(site)
+			self._sites.append(site)
+
+	def get_fair_queues(self) -> list[Queue]:
+		"""Returns queues in the order they should be dequeued from."""
+		if time.monotonic() - self._refreshed_at > FAIR_QUEUE_REFRESH_INTERVAL:
+			self.refresh_sites()
+
+		busy_sites = self.get_busy_sites()
+		queues = []
+		for queue in self.queues:
+			queues.append(queue)
+			qtype = parse_qname(queue.name)[0]
+			for site in self._sites:
+				if site not in busy_sites:
+					queues.append(self.get_site_queue(qtype, site))
+
+		return queues
+
+	def get_site_queue(self, qtype: str, site: str) -> Queue:
+		qname = generate_qname(qtype, site)
+		if qname not in self._site_queues:
+			self._site_queues[qname] = self.queue_class(
+				qname,
+				connection=self.connection,
+				job_class=self.job_class,
+				serializer=self.serializer,
+			)
+		return self._site_queues[qname]
+
+	def refresh_sites(self):
+		"""Find sites with sub-queues of this worker's queues and load their limits."""
+		qtypes = {parse_qname(q.name)[0] for q in self.queues}
+		sites = set()
+		for queue in self.queue_class.all(connection=self.connection):
+			qtype, site = parse_qname(queue.name)
+			if site and qtype in qtypes:
+				sites.add(site)
+
+		self._site_limits = {site: get_fair_queueing_limits(site) for site in sites}
+		# keep the round-robin order of known sites, new ones join at the back
+		self._sites = [site for site in self._sites if site in sites]
+		self._sites.extend(sorted(sites - set(self._sites)))
+		self._refreshed_at = time.monotonic()
+
+	def get_busy_sites(self) -> set[str]:
+		"""Sites running as many jobs as their concurrency limit, on any queue."""
+		limited_sites = [
+			(site, concurrency) for site, (_, concurrency) in self._site_limits.items() if concurrency
+		]
+		if not limited_sites:
+			return set()
+
+		now = time.time()
+		pipeline = self.connection.pipeline()
+		for site, _ in limited_sites:
+			for qtype in get_queues_timeout():
+				registry = StartedJobRegistry(generate_qname(qtype, site), connection=self.connection)
+				# scores are expiry times, expired jobs are cleaned up later by maintenance tasks
+				pipeline.zcount(registry.key, now, "+inf")
+		counts = iter(pipeline.execute())
+
+		qtype_count = len(get_queues_timeout())
+		return {
+			site for site, concurrency in limited_sites if sum(islice(counts, qtype_count)) >= concurrency
+		}
+
+
+class FairSimpleWorker(FairWorker, SimpleWorker):
+	pass
+
+
+def get_fair_queueing_limits(site: str) -> tuple[int, int]:
+	"""Returns weight and concurrency limit of a site from its site_config.json."""
+	site_config = os.path.join(site, "site_config.json")
+	conf = frappe.get_file_json(site_config) if os.path.exists(site_config) else {}
+	return max(cint(conf.get("background_jobs_weight")), 1), cint(
+		conf.get("background_jobs_concurrency")
+	)
 
 
 def start_worker(
@@ -251,8 +1164,14 @@ def start_worker(
 	rq_password: str | None = None,
 	burst: bool = False,
 	strategy: DequeueStrategy | None = DequeueStrategy.DEFAULT,
+	no_fork: bool = False,
 ) -> NoReturn | None:  # pragma: no cover
-	"""Wrapper to start rq worker. Connects to redis and monitors these queues."""
+	"""Wrapper to start rq worker. Connects to redis and monitors these queues.
+
+	With `no_fork`, jobs run in the worker process itself instead of a forked work horse, so
+	database connections are reused across consecutive jobs of a site. A crashing or leaking job
+	takes the worker down with it, so this is meant for short and well-behaved jobs."""
+	global _keep_connections_warm
 
 	if not strategy:
 		strategy = DequeueStrategy.DEFAULT
@@ -267,6 +1186,7 @@ def start_worker(
 			queue = [q.strip() for q in queue.split(",")]
 		queues = get_queue_list(queue, build_queue_name=True)
 		queue_name = queue and generate_qname(queue)
+		fair_queueing = is_fair_queueing_enabled()
 
 	if os.environ.get("CI"):
 		setup_loghandlers("ERROR")
@@ -277,14 +1197,25 @@ def start_worker(
 	if quiet:
 		logging_level = "WARNING"
 
-	worker = Worker(queues, name=get_worker_name(queue_name), connection=redis_connection)
-	worker.work(
-		logging_level=logging_level,
-		burst=burst,
-		date_format="%Y-%m-%d %H:%M:%S",
-		log_format="%(asctime)s,%(msecs)03d %(message)s",
-		dequeue_strategy=strategy,
-	)
+	_keep_connections_warm = no_fork
+	if no_fork:
+		frappe.monitor.job_stats.flush_interval = frappe.monitor.JOB_STATS_FLUSH_INTERVAL
+	if fair_queueing:
+		worker_class = FairSimpleWorker if no_fork else FairWorker
+	else:
+		worker_class = PrioritySimpleWorker if no_fork else PriorityWorker
+	worker = worker_class(queues, name=get_worker_name(queue_name), connection=redis_connection)
+	try:
+		worker.work(
+			logging_level=logging_level,
+			burst=burst,
+			date_format="%Y-%m-%d %H:%M:%S",
+			log_format="%(asctime)s,%(msecs)03d %(message)s",
+			dequeue_strategy=strategy,
+		)
+	finally:
+		frappe.monitor.job_stats.flush()
+		close_warm_connections()
 
 
 def start_worker_pool(
@@ -292,12 +1223,18 @@ def start_worker_pool(
 	num_workers: int = 1,
 	quiet: bool = False,
 	burst: bool = False,
+	max_workers: int | None = None,
 ) -> NoReturn:
 	"""Start worker pool with specified number of workers.
 
+	If `max_workers` is more than `num_workers`, the pool scales between the two depending on
+	the backlog of its queues, see `AutoscalingWorkerPool`.
+
 	WARNING: This feature is considered "EXPERIMENTAL".
 	"""
 
+	if frappe._tune_gc:
+		_preload_modules()
 	_freeze_gc()
 
 	with frappe.init_site():
@@ -306,6 +1243,7 @@ def start_worker_pool(
 		if queue:
 			queue = [q.strip() for q in queue.split(",")]
 		queues = get_queue_list(queue, build_queue_name=True)
+		fair_queueing = is_fair_queueing_enabled()
 
 	if os.environ.get("CI"):
 		setup_loghandlers("ERROR")
@@ -315,14 +1253,125 @@ def start_worker_pool(
 	if quiet:
 		logging_level = "WARNING"
 
-	pool = WorkerPool(
+	pool_kwargs = dict(
 		queues=queues,
 		connection=redis_connection,
-		num_workers=num_workers,
+		worker_class=FairWorker if fair_queueing else PriorityWorker,
 	)
+	if max_workers and max_workers > num_workers:
+		pool = AutoscalingWorkerPool(min_workers=num_workers, max_workers=max_workers, **pool_kwargs)
+	else:
+		pool = WorkerPool(num_workers=num_workers, **pool_kwargs)
 	pool.start(logging_level=logging_level, burst=burst)
 
 
+class AutoscalingWorkerPool(WorkerPool):
+	"""Worker pool that keeps between `min_workers` and `max_workers` workers.
+
+	Workers are added when the pool's queues hold more than `AUTOSCALE_BACKLOG_PER_WORKER` jobs
+	per worker or their oldest job has waited for more than `AUTOSCALE_MAX_WAIT` seconds. They are
+	removed one at a time, idle ones first, once queues have been empty for
+	`AUTOSCALE_SCALE_DOWN_DELAY` seconds. Workers are forked from the pool process, so modules it
+	has imported are shared with them.
+	"""
+
+	def __init__(self, *args, min_workers: int, max_workers: int, **kwargs):
+		super().__init__(*args, num_workers=min_workers, **kwargs)
+		self.min_workers = min_workers
+		self.max_workers = max_workers
+		self._stopping: set[str] = set()  # workers asked to shut down after their current job
+		self._scaled_at = self._backlog_at = self._checked_at = time.monotonic()
+
+	def check_workers(self, respawn: bool = True) -> None:
+		self.reap_workers()
+		self._stopping &= set(self.worker_dict)
+		if not respawn or self.status == self.Status.STOPPED:
+			return
+
+		if time.monotonic() - self._checked_at >= AUTOSCALE_INTERVAL:
+			self.autoscale()
+
+		# replaces dead workers too
+		for _ in range(self.num_workers - len(self.worker_dict) + len(self._stopping)):
+			self.start_worker(burst=self._burst, _sleep=self._sleep)
+
+	def autoscale(self):
+		now = self._checked_at = time.monotonic()
+		queued, wait = self.get_backlog()
+		current = desired = self.num_workers
+
+		if queued:
+			self._backlog_at = now
+			if wait > AUTOSCALE_MAX_WAIT or queued > current * AUTOSCALE_BACKLOG_PER_WORKER:
+				desired = max(current + 1, math.ceil(queued / AUTOSCALE_BACKLOG_PER_WORKER))
+		elif min(now - self._backlog_at, now - self._scaled_at) >= AUTOSCALE_SCALE_DOWN_DELAY:
+			desired = current - 1
+
+		desired = max(self.min_workers, min(desired, self.max_workers))
+		if desired == current:
+			return
+
+		self.log.info(
+			"Scaling %s from %d to %d workers: %d jobs queued, oldest waiting for %.1fs",
+			"up" if desired > current else "down",
+			current,
+			desired,
+			queued,
+			wait,
+		)
+		self.num_workers = desired
+		self._scaled_at = now
+		if desired < current:
+			self.stop_idle_workers(current - desired)
+
+	def get_backlog(self) -> tuple[int, float]:
+		"""Returns number of queued jobs and seconds the oldest of them has been waiting."""
+		qtypes = {parse_qname(name)[0] for name in self._queue_names}
+		queues = [q for q in Queue.all(connection=self.connection) if parse_qname(q.name)[0] in qtypes]
+
+		pipeline = self.connection.pipeline()
+		for q in queues:
+			pipeline.llen(q.key)
+			pipeline.lindex(q.key, 0)
+		results = pipeline.execute()
+
+		queued = sum(results[::2])
+		head_job_ids = [cstr(job_id) for job_id in results[1::2] if job_id]
+		enqueued_at = [
+			job.enqueued_at
+			for job in Job.fetch_many(head_job_ids, connection=self.connection)
+			if job and job.enqueued_at
+		]
+		wait = (utcnow() - min(enqueued_at)).total_seconds() if enqueued_at else 0
+		return queued, wait
+
+	def stop_idle_workers(self, count: int):
+		"""Ask `count` workers to shut down, preferring idle ones. Busy workers finish their job."""
+		workers = [data for name, data in self.worker_dict.items() if name not in self._stopping]
+		pipeline = self.connection.pipeline()
+		for data in workers:
+			pipeline.hget(f"{Worker.redis_worker_namespace_prefix}{data.name}", "state")
+		states = pipeline.execute()
+
+		by_idleness = sorted(zip(workers, states), key=lambda w: cstr(w[1]) != "idle")
+		for data, _ in by_idleness[:count]:
+			self.stop_worker(data)
+			self._stopping.add(data.name)
+
+
+def _preload_modules():
+	"""Import modules most jobs need before forking workers, so that they're shared with them.
+
+	Same as what `frappe.app` does for web workers."""
+	import frappe.core.doctype.file.file
+	import frappe.database
+	import frappe.email.queue
+	import frappe.model.document
+	import frappe.model.meta
+	import frappe.query_builder
+	import frappe.utils.data
+
+
 def _freeze_gc():
 	if frappe._tune_gc:
 		gc.collect()
@@ -354,8 +1403,7 @@ def get_jobs(site=None, queue=None, key="method"):
 			# optional keyword arguments are stored in 'kwargs' of 'kwargs'
 			jobs_per_site[job.kwargs["site"]].append(job.kwargs["kwargs"][key])
 
-	for _queue in get_queue_list(queue):
-		q = get_queue(_queue)
+	for _qtype, q in get_queues_by_type(queue, site):
 		jobs = q.jobs + get_running_jobs_in_queue(q)
 		for job in jobs:
 			if job.kwargs.get("site"):
@@ -382,6 +1430,18 @@ def get_queue_list(queue_list=None, build_queue_name=False):
 	return [generate_qname(qtype) for qtype in queue_list] if build_queue_name else queue_list
 
 
+def get_queues_by_type(queue_list=None, site=None) -> list[tuple[str, Queue]]:
+	"""Returns `(queue type, queue)` of the shared queues of the given types (all by default) and
+	of their site sub-queues, only the ones of `site` if given."""
+	queue_list = get_queue_list(queue_list)
+	queues = []
+	for q in get_queues():
+		qtype, qsite = parse_qname(q.name)
+		if qtype in queue_list and not (site and qsite and qsite != site):
+			queues.append((qtype, q))
+	return queues
+
+
 def get_workers(queue=None):
 	"""Returns a list of Worker objects tied to a queue object if queue is passed, else returns a list of all workers"""
 	if queue:
@@ -402,9 +1462,29 @@ def get_running_jobs_in_queue(queue):
 
 
 def get_queue(qtype, is_async=True):
-	"""Returns a Queue object tied to a redis connection"""
+	"""Returns a Queue object tied to a redis connection.
+
+	With `fair_queueing` enabled, this is the current site's sub-queue of `qtype`."""
 	validate_queue(qtype)
-	return Queue(generate_qname(qtype), connection=get_redis_conn(), is_async=is_async)
+	site = frappe.local.site if is_async and is_fair_queueing_enabled() else None
+	return PriorityQueue(generate_qname(qtype, site), connection=get_redis_conn(), is_async=is_async)
+
+
+def is_fair_queueing_enabled() -> bool:
+	"""Fair queueing can only be enabled in common_site_config.json, workers of a bench either
+	all pull from site sub-queues or none do."""
+	return bool(frappe.get_common_site_config().get("fair_queueing"))
+
+
+def get_base_queue(q: Queue) -> Queue:
+	"""Returns the shared queue of a site sub-queue.
+
+	Jobs are scheduled on shared queues: rq's scheduler only moves due jobs of the queues
+	workers are started with, and puts them in that queue."""
+	qtype, site = parse_qname(q.name)
+	if not site:
+		return q
+	return PriorityQueue(generate_qname(qtype), connection=q.connection, is_async=q._is_async)
 
 
 def validate_queue(queue, default_queue_list=None):
@@ -474,20 +1554,30 @@ def get_queues(connection=None) -> list[Queue]:
 	return [q for q in queues if is_queue_accessible(q)]
 
 
-def generate_qname(qtype: str) -> str:
-	"""Generate qname by combining bench ID and queue type.
+def generate_qname(qtype: str, site: str | None = None) -> str:
+	"""Generate qname by combining bench ID and queue type, and site for fair queueing.
 
 	qnames are useful to define namespaces of customers.
 	"""
 	if isinstance(qtype, list):
 		qtype = ",".join(qtype)
+	if site:
+		return f"{get_bench_id()}:{qtype}:{site}"
 	return f"{get_bench_id()}:{qtype}"
 
 
+def parse_qname(qname: str) -> tuple[str | None, str | None]:
+	"""Returns queue type and site (for site sub-queues) of a queue of the current bench."""
+	prefix = f"{get_bench_id()}:"
+	if not qname.startswith(prefix):
+		return None, None
+	qtype, _, site = qname[len(prefix) :].partition(":")
+	return qtype, site or None
+
+
 def is_queue_accessible(qobj: Queue) -> bool:
 	"""Checks whether queue is relate to current bench or not."""
-	accessible_queues = [generate_qname(q) for q in list(get_queues_timeout())]
-	return qobj.name in accessible_queues
+	return parse_qname(qobj.name)[0] in get_queues_timeout()
 
 
 def enqueue_test_job():
@@ -510,7 +1600,8 @@ def create_job_id(job_id: str) -> str:
 
 
 def is_job_enqueued(job_id: str) -> bool:
-	return get_job_status(job_id) in (JobStatus.QUEUED, JobStatus.STARTED)
+	# scheduled jobs are waiting for a retry
+	return get_job_status(job_id) in (JobStatus.QUEUED, JobStatus.STARTED, JobStatus.SCHEDULED)
 
 
 def get_job_status(job_id: str) -> JobStatus | None:
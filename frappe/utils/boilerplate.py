@@ -521,6 +521,9 @@ app_license = "{app_license}"
 # before_job = ["{app_name}.utils.before_job"]
 # after_job = ["{app_name}.utils.after_job"]
 
+# Retries of jobs failing with a deadlock or RetryBackgroundJobError (delays are in seconds)
+# job_retry_policy = {{"{app_name}.tasks.sync": {{"max_retries": 10, "base_delay": 5, "max_delay": 600}}}}
+
 # User Data Protection
 # --------------------
 
@@ -2,14 +2,109 @@
 # License: MIT. Check LICENSE
 
 import json
-from collections import defaultdict
+import pickle
+import sys
+import time
+from collections import OrderedDict, defaultdict
 from collections.abc import Callable
-from datetime import datetime, timedelta
 from functools import wraps
+from typing import NamedTuple
+
+import redis
 
 import frappe
+from frappe.monitor import add_cache_stats
+
+_SITE_CACHE = defaultdict(dict)
+# site: (time of next check, tokens of invalidations seen), see `sync_site_cache`
+_SITE_CACHE_SYNC = {}
+SITE_CACHE_SYNC_INTERVAL = 1
+_MISSING = object()
+
+
+class CacheInfo(NamedTuple):
+	hits: int
+	misses: int
+	maxsize: int | None
+	currsize: int
+	memory: int
+
+
+class LRUCache:
+	"""Least recently used cache with optional per-entry expiry and limits on the number of
+	entries and on their (approximate) memory size."""
+
+	__slots__ = ("data", "ttl", "maxsize", "maxmemory", "memory", "hits", "misses")
+
+	def __init__(
+		self, ttl: int | None = None, maxsize: int | None = None, maxmemory: int | None = None
+	):
+		self.data = OrderedDict()  # key: (value, expires at, size)
+		self.ttl = ttl
+		self.maxsize = maxsize
+		self.maxmemory = maxmemory
+		self.memory = 0
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key, default=None):
+		entry = self.data.get(key)
+		if entry is None or (entry[1] and entry[1] <= time.monotonic()):
+			if entry is not None:
+				self.pop(key)
+			self.misses += 1
+			return default
+
+		self.data.move_to_end(key)
+		self.hits += 1
+		return entry[0]
+
+	def set(self, key, value):
+		self.pop(key)
+
+		size = get_size(value) if self.maxmemory else 0
+		if self.maxmemory and size > self.maxmemory:
+			return
+
+		expires_at = time.monotonic() + self.ttl if self.ttl else None
+		self.data[key] = (value, expires_at, size)
+		self.memory += size
+
+		while (self.maxsize is not None and len(self.data) > self.maxsize) or (
+			self.maxmemory and self.memory > self.maxmemory
+		):
+			self.memory -= self.data.popitem(last=False)[1][2]
+
+	def pop(self, key):
+		entry = self.data.pop(key, None)
+		if entry is not None:
+			self.memory -= entry[2]
+
+	def clear(self):
+		self.data.clear()
+		self.memory = 0
+
+	def info(self) -> CacheInfo:
+		return CacheInfo(self.hits, self.misses, self.maxsize, len(self.data), self.memory)
+
+
+def get_size(value) -> int:
+	"""Approximate memory used by `value`, measured as its pickled size."""
+	try:
+		return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+	except Exception:
+		return sys.getsizeof(value)
+
 
-_SITE_CACHE = defaultdict(lambda: defaultdict(dict))
+def __generate_site_cache_key(args: tuple, kwargs: dict):
+	"""Generate a key for the cache. Types are part of the key so that `1`, `1.0` and `True`
+	don't share a cache entry."""
+	key = (args, tuple(map(type, args)))
+	if kwargs:
+		key += (frozenset((k, v, type(v)) for k, v in kwargs.items()),)
+
+	hash(key)  # raises TypeError for unhashable arguments
+	return key
 
 
 def __generate_request_cache_key(args: tuple, kwargs: dict):
@@ -39,6 +134,8 @@ def request_cache(func: Callable) -> Callable:
 	        calculate_pi(10) # will return value from cache
 	"""
 
+	func_key = f"{func.__module__}.{func.__qualname__}"
+
 	@wraps(func)
 	def wrapper(*args, **kwargs):
 		if not getattr(frappe.local, "initialised", None):
@@ -52,23 +149,40 @@ def request_cache(func: Callable) -> Callable:
 			return func(*args, **kwargs)
 
 		try:
-			return frappe.local.request_cache[func][args_key]
+			return_val = frappe.local.request_cache[func][args_key]
 		except KeyError:
+			start = time.perf_counter()
 			return_val = func(*args, **kwargs)
 			frappe.local.request_cache[func][args_key] = return_val
-			return return_val
+			add_cache_stats(
+				"request_cache",
+				func_key,
+				misses=1,
+				generator_time=int((time.perf_counter() - start) * 1000000),
+			)
+		else:
+			add_cache_stats("request_cache", func_key, hits=1)
+
+		return return_val
 
 	return wrapper
 
 
-def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
+def site_cache(
+	ttl: int | None = None, maxsize: int | None = None, maxmemory: int | None = None
+) -> Callable:
 	"""Decorator to cache method calls across requests. The cache is stored in
 	frappe.utils.caching._SITE_CACHE. The cache persists on the parent process.
 	It offers a light-weight cache for the current process without the additional
 	overhead of serializing / deserializing Python objects.
 
+	Each site gets a least recently used cache of its own. `ttl` is the lifetime of
+	each entry in seconds, `maxsize` the maximum number of entries and `maxmemory` the
+	maximum (approximate) size of the cached values in bytes.
+
 	Note: This cache isn't shared among workers. If you need to share data across
-	workers, use redis (frappe.cache API) instead.
+	workers, use redis (frappe.cache API) instead. `clear_cache(broadcast=True)`
+	clears the cache of the current site in other workers too.
 
 	Usage:
 	        from frappe.utils.caching import site_cache
@@ -81,6 +195,7 @@ def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
 
 	        calculate_pi(10) # will calculate value
 	        calculate_pi(10) # will return value from cache
+	        calculate_pi.cache_info() # hits and misses for the current site
 	        calculate_pi.clear_cache() # clear this function's cache for all sites
 	        calculate_pi(10) # will calculate value
 	"""
@@ -88,37 +203,58 @@ def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
 	def time_cache_wrapper(func: Callable = None) -> Callable:
 		func_key = f"{func.__module__}.{func.__name__}"
 
-		def clear_cache():
-			"""Clear cache for this function for all sites if not specified."""
-			_SITE_CACHE[func_key].clear()
+		def clear_cache(broadcast: bool = False):
+			"""Clear cache for this function for all sites if not specified.
 
-		func.clear_cache = clear_cache
+			:param broadcast: clear the current site's cache in other processes too."""
+			_SITE_CACHE.pop(func_key, None)
+			if broadcast:
+				invalidate_site_cache(func_key)
 
-		if ttl is not None and not callable(ttl):
-			func.ttl = ttl
-			func.expiration = datetime.utcnow() + timedelta(seconds=func.ttl)
+		def cache_info() -> CacheInfo:
+			"""Return hits, misses and size of this function's cache for the current site."""
+			cache = _SITE_CACHE.get(func_key, {}).get(frappe.local.site)
+			return cache.info() if cache else CacheInfo(0, 0, func.maxsize, 0, 0)
 
-		if maxsize is not None and not callable(maxsize):
-			func.maxsize = maxsize
+		func.clear_cache = clear_cache
+		func.cache_info = cache_info
+		func.ttl = ttl if not callable(ttl) else None
+		func.maxsize = maxsize
+		func.maxmemory = maxmemory
 
 		@wraps(func)
 		def site_cache_wrapper(*args, **kwargs):
 			if getattr(frappe.local, "initialised", None):
-				func_call_key = json.dumps((args, kwargs))
-
-				if hasattr(func, "ttl") and datetime.utcnow() >= func.expiration:
-					func.clear_cache()
-					func.expiration = datetime.utcnow() + timedelta(seconds=func.ttl)
-
-				if hasattr(func, "maxsize") and len(_SITE_CACHE[func_key][frappe.local.site]) >= func.maxsize:
-					_SITE_CACHE[func_key][frappe.local.site].pop(
-						next(iter(_SITE_CACHE[func_key][frappe.local.site])), None
+				try:
+					func_call_key = __generate_site_cache_key(args, kwargs)
+				except TypeError:
+					try:
+						func_call_key = json.dumps((args, kwargs))
+					except TypeError:
+						return func(*args, **kwargs)
+
+				sync_site_cache()
+
+				site_caches = _SITE_CACHE[func_key]
+				cache = site_caches.get(frappe.local.site)
+				if cache is None:
+					cache = site_caches[frappe.local.site] = LRUCache(func.ttl, func.maxsize, func.maxmemory)
+
+				value = cache.get(func_call_key, _MISSING)
+				if value is _MISSING:
+					start = time.perf_counter()
+					value = func(*args, **kwargs)
+					cache.set(func_call_key, value)
+					add_cache_stats(
+						"site_cache",
+						func_key,
+						misses=1,
+						generator_time=int((time.perf_counter() - start) * 1000000),
 					)
+				else:
+					add_cache_stats("site_cache", func_key, hits=1)
 
-				if func_call_key not in _SITE_CACHE[func_key][frappe.local.site]:
-					_SITE_CACHE[func_key][frappe.local.site][func_call_key] = func(*args, **kwargs)
-
-				return _SITE_CACHE[func_key][frappe.local.site][func_call_key]
+				return value
 
 			return func(*args, **kwargs)
 
@@ -130,6 +266,47 @@ def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
 	return time_cache_wrapper
 
 
+def invalidate_site_cache(func_key: str = "*"):
+	"""Make other processes drop their `site_cache` entries for the current site, of the
+	given function or of all functions by default."""
+	token = frappe.generate_hash(length=10)
+	frappe.cache.hset("site_cache_invalidations", func_key, token)
+
+	# this process has cleared its own cache already
+	if (sync := _SITE_CACHE_SYNC.get(frappe.local.site)) and sync[1] is not None:
+		sync[1][func_key] = token
+
+
+def sync_site_cache():
+	"""Drop entries invalidated by other processes, checked at most once every
+	`SITE_CACHE_SYNC_INTERVAL` seconds per site."""
+	site = frappe.local.site
+	now = time.monotonic()
+	next_sync, seen = _SITE_CACHE_SYNC.get(site) or (0, None)
+	if now < next_sync:
+		return
+
+	try:
+		tokens = frappe.cache.hgetall("site_cache_invalidations")
+	except redis.exceptions.ConnectionError:
+		_SITE_CACHE_SYNC[site] = (now + SITE_CACHE_SYNC_INTERVAL, seen)
+		return
+
+	tokens = {frappe.safe_decode(func_key): token for func_key, token in tokens.items()}
+	_SITE_CACHE_SYNC[site] = (now + SITE_CACHE_SYNC_INTERVAL, tokens)
+	if seen is None:
+		return
+
+	if tokens.get("*") != seen.get("*"):
+		for site_caches in _SITE_CACHE.values():
+			site_caches.pop(site, None)
+		return
+
+	for func_key in tokens.keys() | seen.keys():
+		if tokens.get(func_key) != seen.get(func_key):
+			_SITE_CACHE.get(func_key, {}).pop(site, None)
+
+
 def redis_cache(ttl: int | None = 3600, user: str | bool | None = None) -> Callable:
 	"""Decorator to cache method calls and its return values in Redis
 
@@ -143,7 +320,7 @@ def redis_cache(ttl: int | None = 3600, user: str | bool | None = None) -> Calla
 		func_key = f"{func.__module__}.{func.__qualname__}"
 
 		def clear_cache():
-			frappe.cache.delete_keys(func_key)
+			frappe.cache.delete_tags(func_key)
 
 		func.clear_cache = clear_cache
 		func.ttl = ttl if not callable(ttl) else 3600
@@ -156,7 +333,7 @@ def redis_cache(ttl: int | None = 3600, user: str | bool | None = None) -> Calla
 			else:
 				val = func(*args, **kwargs)
 				ttl = getattr(func, "ttl", 3600)
-				frappe.cache.set_value(func_call_key, val, expires_in_sec=ttl, user=user)
+				frappe.cache.set_value(func_call_key, val, expires_in_sec=ttl, user=user, tags=(func_key,))
 				return val
 
 		return redis_cache_wrapper
@@ -3,7 +3,7 @@ from collections import defaultdict
 from rq import Connection, Worker
 
 import frappe.utils
-from frappe.utils.background_jobs import get_queue, get_queue_list, get_redis_conn
+from frappe.utils.background_jobs import get_queue_list, get_queues_by_type, get_redis_conn
 from frappe.utils.scheduler import is_scheduler_disabled, is_scheduler_inactive
 
 
@@ -19,8 +19,7 @@ def purge_pending_jobs(event=None, site=None, queue=None):
 	mintues and would any leave daily, hourly and weekly tasks
 	"""
 	purged_task_count = 0
-	for _queue in get_queue_list(queue):
-		q = get_queue(_queue)
+	for _qtype, q in get_queues_by_type(queue, site):
 		for job in q.jobs:
 			if site and event:
 				if job.kwargs["site"] == site and job.kwargs["event"] == event:
@@ -44,14 +43,14 @@ def purge_pending_jobs(event=None, site=None, queue=None):
 def get_jobs_by_queue(site=None):
 	jobs_per_queue = defaultdict(list)
 	job_count = consolidated_methods = {}
-	for queue in get_queue_list():
-		q = get_queue(queue)
+	for qtype, q in get_queues_by_type(site=site):
 		for job in q.jobs:
 			if not site:
-				jobs_per_queue[queue].append(job.kwargs.get("method") or job.description)
+				jobs_per_queue[qtype].append(job.kwargs.get("method") or job.description)
 			elif job.kwargs["site"] == site:
-				jobs_per_queue[queue].append(job.kwargs.get("method") or job.description)
+				jobs_per_queue[qtype].append(job.kwargs.get("method") or job.description)
 
+	for queue in get_queue_list():
 		consolidated_methods = {}
 
 		for method in jobs_per_queue[queue]:
@@ -68,19 +67,17 @@ def get_jobs_by_queue(site=None):
 
 def get_pending_jobs(site=None):
 	jobs_per_queue = defaultdict(list)
-	for queue in get_queue_list():
-		q = get_queue(queue)
+	for qtype, q in get_queues_by_type(site=site):
 		for job in q.jobs:
 			method_kwargs = job.kwargs["kwargs"] if job.kwargs["kwargs"] else ""
 			if job.kwargs["site"] == site:
-				jobs_per_queue[queue].append("{} {}".format(job.kwargs["method"], method_kwargs))
+				jobs_per_queue[qtype].append("{} {}".format(job.kwargs["method"], method_kwargs))
 
 	return jobs_per_queue
 
 
 def any_job_pending(site: str) -> bool:
-	for queue in get_queue_list():
-		q = get_queue(queue)
+	for _qtype, q in get_queues_by_type(site=site):
 		for job_id in q.get_job_ids():
 			if job_id.startswith(site):
 				return True
@@ -1,15 +1,124 @@
 # Copyright (c) 2015, Frappe Technologies Pvt. Ltd. and Contributors
 # License: MIT. See LICENSE
+import heapq
+import lzma
+import math
+import os
 import pickle
+import random
 import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from itertools import islice
 
 import redis
 from redis.commands.search import Search
 
 import frappe
+import frappe.monitor
 from frappe.utils import cstr
 
 
+# pickled values larger than this (in bytes) are compressed, set `redis_compression_threshold`
+# in site config to change it or to 0 to disable compression
+COMPRESSION_THRESHOLD = 32 * 1024
+
+# pickles (protocol 2+) start with b"\x80", compressed values with one of these headers
+ZLIB_HEADER = b"\x01"
+LZMA_HEADER = b"\x02"
+
+# Member of a tag's set once it's known to hold all keys of the tag, see `delete_tags`
+TAG_COMPLETE = b""
+
+# Add keys to the sets of tags, which are kept at least as long as the keys they hold.
+#
+# KEYS: sets of the tags
+# ARGV: seconds until the keys expire (0 if they don't), keys
+TAG_SCRIPT = """
+local ttl = tonumber(ARGV[1])
+for _, tag in ipairs(KEYS) do
+	local current = redis.call("TTL", tag)
+	for i = 2, #ARGV do
+		redis.call("SADD", tag, ARGV[i])
+	end
+	if ttl == 0 then
+		redis.call("PERSIST", tag)
+	elseif current == -2 or (current >= 0 and current < ttl) then
+		redis.call("EXPIRE", tag, ttl)
+	end
+end
+"""
+
+
+def dumps(value) -> bytes:
+	"""Pickle `value` for storing in Redis, compressing it if it's large."""
+	data = pickle.dumps(value)
+
+	threshold = frappe.conf.get("redis_compression_threshold", COMPRESSION_THRESHOLD)
+	if not threshold or len(data) < threshold:
+		return data
+
+	if frappe.conf.get("redis_compression") == "lzma":
+		compressed = LZMA_HEADER + lzma.compress(data, preset=1)
+	else:
+		compressed = ZLIB_HEADER + zlib.compress(data, 1)
+
+	return compressed if len(compressed) < len(data) else data
+
+
+def loads(data: bytes):
+	"""Load a value stored by `dumps`."""
+	header = data[:1]
+	if header == ZLIB_HEADER:
+		data = zlib.decompress(data[1:])
+	elif header == LZMA_HEADER:
+		data = lzma.decompress(data[1:])
+
+	return pickle.loads(data)
+
+
+# seconds after which the lock held while generating a value expires, in case the process
+# holding it dies, and the time for which other processes wait for the value to be set
+GENERATOR_LOCK_TIMEOUT = 10
+GENERATOR_WAIT_TIMEOUT = 5
+
+
+def should_refresh_early(ttl: int, generation_time: float, beta: float = 1.0) -> bool:
+	"""Decide whether to regenerate a value before it expires ("XFetch", see "Optimal
+	Probabilistic Cache Stampede Prevention" by Vattani et al.).
+
+	:param ttl: remaining time to live of the value in milliseconds
+	:param generation_time: seconds taken to generate the value
+	:param beta: values > 1 favour earlier refreshes
+	"""
+	if ttl is None or ttl < 0:
+		return False
+
+	return generation_time * beta * -math.log(1 - random.random()) * 1000 >= ttl
+
+
+def get_key_prefix(key: str) -> str:
+	"""Returns the prefix of a cache key (without the site prefix) for grouping, e.g.
+	`has_role` for `has_role:Page` and `user:*:defaults` for user specific keys."""
+	if key.startswith("user:") and key.count(":") >= 2:
+		return "user:*:" + get_key_prefix(key.split(":", 2)[2])
+
+	return key.split(":", 1)[0]
+
+
+def add_cache_stats(cache: str, key, **counters):
+	"""Count an access of `key` in the monitor log, grouped by its prefix."""
+	if hasattr(frappe.local, "monitor"):
+		frappe.monitor.add_cache_stats(cache, get_key_prefix(cstr(key)), **counters)
+
+
+def get_elapsed_time(start: float) -> int:
+	"""Microseconds since `start` (from `time.perf_counter`)."""
+	return int((time.perf_counter() - start) * 1000000)
+
+
 class RedisearchWrapper(Search):
 	def sugadd(self, key, *suggestions, **kwargs):
 		return super().sugadd(self.client.make_key(key), *suggestions, **kwargs)
@@ -24,9 +133,165 @@ class RedisearchWrapper(Search):
 		return super().sugget(self.client.make_key(key), *args, **kwargs)
 
 
+class ClientCache:
+	"""Process-local cache of raw values read from Redis.
+
+	Uses server assisted client side caching: a listener thread enables `CLIENT TRACKING`
+	in broadcast mode for the prefixes of the sites used by this process and Redis pushes
+	the names of modified keys to it, which are then dropped from the cache. Values are
+	only cached while the listener is connected.
+	"""
+
+	INVALIDATION_CHANNEL = "__redis__:invalidate"
+
+	def __init__(self, client: redis.Redis, maxsize: int):
+		self.client = client
+		self.maxsize = maxsize
+		self.reset()
+
+	def reset(self):
+		self.lock = threading.Lock()
+		self.data = OrderedDict()  # key: {field: raw value}, field is `None` for plain keys
+		self.pending = {}  # key: {field: token} of values being fetched
+		self.prefixes = set()
+		self.tracked_prefixes = set()
+		self.connection = None
+		self.thread = None
+		self.pid = os.getpid()
+
+	def get(self, key: bytes, fetch, field=None):
+		"""Return the raw value of `key` (or of `field` in hash `key`), calling `fetch` on misses."""
+		if not self.is_tracked(key):
+			return fetch()
+
+		with self.lock:
+			entry = self.data.get(key)
+			if entry is not None and field in entry:
+				self.data.move_to_end(key)
+				return entry[field]
+
+			token = object()
+			self.pending.setdefault(key, {})[field] = token
+
+		value = fetch()
+
+		with self.lock:
+			# don't cache values that were invalidated while being fetched
+			if self.pending.get(key, {}).get(field) is token:
+				del self.pending[key][field]
+				self.data.setdefault(key, {})[field] = value
+				self.data.move_to_end(key)
+				while len(self.data) > self.maxsize:
+					self.data.popitem(last=False)
+
+		return value
+
+	def invalidate(self, keys=None):
+		"""Drop `keys` or everything if not specified."""
+		with self.lock:
+			if keys is None:
+				self.data.clear()
+				self.pending.clear()
+				return
+
+			for key in keys:
+				self.data.pop(key, None)
+				self.pending.pop(key, None)
+
+	def is_tracked(self, key) -> bool:
+		if not isinstance(key, bytes) or b"|" not in key:
+			# shared keys don't have a site prefix
+			return False
+
+		if self.pid != os.getpid():
+			# forked, the listener thread only exists in the parent process
+			self.reset()
+
+		prefix = key.split(b"|", 1)[0] + b"|"
+		if prefix in self.tracked_prefixes:
+			return True
+
+		with self.lock:
+			if prefix in self.prefixes:
+				return False
+			self.prefixes.add(prefix)
+			connection, self.connection = self.connection, None
+
+		if connection:
+			# reconnect to track the new prefix too
+			connection.disconnect()
+
+		if not self.thread or not self.thread.is_alive():
+			self.thread = threading.Thread(target=self.listen, daemon=True, name="redis-client-cache")
+			self.thread.start()
+
+		return False
+
+	def listen(self):
+		pool = self.client.connection_pool
+
+		while True:
+			with self.lock:
+				prefixes = set(self.prefixes)
+
+			connection = pool.connection_class(**{**pool.connection_kwargs, "socket_timeout": None})
+			try:
+				connection.connect()
+				connection.send_command("CLIENT", "ID")
+				client_id = connection.read_response()
+
+				args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+				for prefix in prefixes:
+					args += ["PREFIX", prefix]
+				connection.send_command(*args)
+				connection.read_response()
+
+				connection.send_command("SUBSCRIBE", self.INVALIDATION_CHANNEL)
+				connection.read_response()
+
+				with self.lock:
+					if prefixes != self.prefixes:
+						# a prefix was added meanwhile
+						continue
+					self.connection = connection
+					self.data.clear()
+					self.pending.clear()
+					self.tracked_prefixes = prefixes
+
+				while True:
+					message = connection.read_response()
+					if message and message[0] == b"message":
+						# keys are `None` when the database is flushed
+						self.invalidate(message[2])
+
+			except redis.exceptions.ResponseError:
+				# client side caching isn't supported by this server
+				return
+
+			except Exception:
+				pass
+
+			finally:
+				with self.lock:
+					self.tracked_prefixes = set()
+					self.data.clear()
+					self.pending.clear()
+				connection.disconnect()
+
+			if prefixes == self.prefixes:
+				# connection lost, retry after a while
+				time.sleep(1)
+
+
 class RedisWrapper(redis.Redis):
 	"""Redis client that will automatically prefix conf.db_name"""
 
+	client_cache: ClientCache | None = None
+
+	def enable_client_cache(self, maxsize: int):
+		"""Cache values in this process too, see `ClientCache`."""
+		self.client_cache = ClientCache(self, maxsize)
+
 	def connected(self):
 		try:
 			self.ping()
@@ -49,62 +314,329 @@ class RedisWrapper(redis.Redis):
 
 		return f"{frappe.conf.db_name}|{key}".encode()
 
-	def set_value(self, key, val, user=None, expires_in_sec=None, shared=False):
+	def set_value(self, key, val, user=None, expires_in_sec=None, shared=False, tags=None):
 		"""Sets cache value.
 
 		:param key: Cache key
 		:param val: Value to be cached
 		:param user: Prepends key with User
 		:param expires_in_sec: Expire value of this key in X seconds
+		:param tags: Tags to register the key under, see `delete_tags`. Keys set for a user are
+		        tagged with `user:{user}:`.
 		"""
+		tag_keys = self.get_tag_keys(tags, user, shared)
 		key = self.make_key(key, user, shared)
 
 		if not expires_in_sec:
 			frappe.local.cache[key] = val
 
+		if self.client_cache:
+			self.client_cache.invalidate((key,))
+
 		try:
+			pipeline = self.pipeline() if tag_keys else self
 			if expires_in_sec:
-				self.setex(name=key, time=expires_in_sec, value=pickle.dumps(val))
+				pipeline.setex(name=key, time=expires_in_sec, value=dumps(val))
 			else:
-				self.set(key, pickle.dumps(val))
+				pipeline.set(key, dumps(val))
+
+			if tag_keys:
+				self.add_to_tags(tag_keys, [key], expires_in_sec, pipeline=pipeline)
+				pipeline.execute()
 
 		except redis.exceptions.ConnectionError:
 			return None
 
-	def get_value(self, key, generator=None, user=None, expires=False, shared=False):
+	def make_tag_key(self, tag, shared=False):
+		return self.make_key(f"tag::{tag}", shared=shared)
+
+	def get_tag_keys(self, tags=None, user=None, shared=False) -> list:
+		tags = list(tags or ())
+		if user:
+			tags.append(f"user:{frappe.session.user if user is True else user}:")
+
+		return [self.make_tag_key(tag, shared) for tag in tags]
+
+	def add_to_tags(self, tag_keys, keys, expires_in_sec=None, pipeline=None):
+		self.register_script(TAG_SCRIPT)(
+			keys=tag_keys, args=[expires_in_sec or 0, *keys], client=pipeline or self
+		)
+
+	def delete_tags(self, *tags, shared=False):
+		"""Delete keys registered under any of the `tags` (see `set_value`).
+
+		Tags are key prefixes: all keys tagged with a tag start with it. Keys are deleted
+		without scanning the keyspace if the tag's set is complete, i.e. it was created when the
+		tag was last cleared and hasn't been evicted since. Complete sets don't expire. Otherwise,
+		keys starting with the tag are found with SCAN, which also finds keys set before they
+		were tagged.
+		"""
+		tag_keys = [self.make_tag_key(tag, shared) for tag in tags]
+
+		try:
+			# read and reset tags in a transaction so that keys tagged meanwhile aren't lost
+			pipeline = self.pipeline()
+			for tag_key in tag_keys:
+				pipeline.smembers(tag_key)
+			pipeline.delete(*tag_keys)
+			for tag_key in tag_keys:
+				pipeline.sadd(tag_key, TAG_COMPLETE)
+			tagged = pipeline.execute()[: len(tag_keys)]
+		except redis.exceptions.ConnectionError:
+			return
+
+		keys = set()
+		for tag, members in zip(tags, tagged):
+			if TAG_COMPLETE in members:
+				keys.update(members)
+			else:
+				keys.update(self.scan_iter(match=self.make_key(f"{tag}*", shared=shared), count=1000))
+		keys.discard(TAG_COMPLETE)
+
+		keys = list(keys)
+		for i in range(0, len(keys), 1000):
+			self.delete_value(keys[i : i + 1000], make_keys=False)
+
+	def get_value(
+		self,
+		key,
+		generator=None,
+		user=None,
+		expires=False,
+		shared=False,
+		expires_in_sec=None,
+		refresh_early=False,
+	):
 		"""Returns cache value. If not found and generator function is
 		        given, it will call the generator.
 
+		Only one process calls the generator at a time, others wait for it to set the value
+		(see `generate_value`).
+
 		:param key: Cache key.
 		:param generator: Function to be called to generate a value if `None` is returned.
 		:param expires: If the key is supposed to be with an expiry, don't store it in frappe.local
+		:param expires_in_sec: Expire the value set from generator in X seconds (implies `expires`)
+		:param refresh_early: Regenerate the value before it expires, with a probability that
+		        increases as expiry gets closer and with the time the generator takes. Processes
+		        serve the current value meanwhile. Needs `expires_in_sec`.
 		"""
 		original_key = key
 		key = self.make_key(key, user, shared)
+		expires = expires or bool(expires_in_sec)
 
 		if key in frappe.local.cache:
 			val = frappe.local.cache[key]
+			add_cache_stats("local", original_key, hits=1)
 
 		else:
 			val = None
+			ttl = generation_time = None
+			start = time.perf_counter()
 			try:
-				val = self.get(key)
+				if refresh_early and generator and expires_in_sec:
+					pipeline = self.pipeline(transaction=False)
+					pipeline.get(key)
+					pipeline.pttl(key)
+					pipeline.get(self.make_key(f"{original_key}::generation_time", user, shared))
+					val, ttl, generation_time = pipeline.execute()
+				elif self.client_cache and not expires:
+					val = self.client_cache.get(key, lambda: self.get(key))
+				else:
+					val = self.get(key)
 			except redis.exceptions.ConnectionError:
 				pass
 
+			if not expires:
+				add_cache_stats("local", original_key, misses=1)
+			add_cache_stats(
+				"redis",
+				original_key,
+				hits=int(val is not None),
+				misses=int(val is None),
+				time=get_elapsed_time(start),
+				bytes=len(val or b""),
+			)
+
 			if val is not None:
-				val = pickle.loads(val)
+				val = loads(val)
+
+				if generation_time and should_refresh_early(ttl, float(generation_time)):
+					val = self.generate_value(original_key, generator, user, shared, expires_in_sec, stale=val)
+
+			elif generator and (not expires or expires_in_sec):
+				val = self.generate_value(original_key, generator, user, shared, expires_in_sec)
 
 			if not expires:
-				if val is None and generator:
-					val = generator()
-					self.set_value(original_key, val, user=user)
+				frappe.local.cache[key] = val
 
-				else:
-					frappe.local.cache[key] = val
+		return val
+
+	def generate_value(
+		self, key, generator, user=None, shared=False, expires_in_sec=None, stale=None, field=None
+	):
+		"""Call `generator` and cache the value it returns, as `field` of hash `key` if given.
+
+		A short lived lock makes sure that only one process runs the generator for a key at
+		a time. Others return `stale` if given, or wait for the value to be set. They run
+		the generator themselves if that takes more than `GENERATOR_WAIT_TIMEOUT` seconds.
+		"""
+		_key = self.make_key(key, user, shared)
+		lock_key = f"{key}::{field}::lock" if field else f"{key}::lock"
+		lock = self.lock(self.make_key(lock_key, user, shared), timeout=GENERATOR_LOCK_TIMEOUT)
+
+		try:
+			acquired = lock.acquire(blocking=False)
+		except redis.exceptions.ConnectionError:
+			acquired = None
+
+		if acquired is False:
+			if stale is not None:
+				return stale
+
+			deadline = time.monotonic() + GENERATOR_WAIT_TIMEOUT
+			try:
+				while lock.locked() and time.monotonic() < deadline:
+					time.sleep(0.05)
+				val = super().hget(_key, field) if field else self.get(_key)
+			except redis.exceptions.ConnectionError:
+				# redis went away while waiting, generate the value here
+				val = None
+
+			if val is not None:
+				return loads(val)
+
+		try:
+			start = time.perf_counter()
+			val = generator()
+			generation_time = get_elapsed_time(start)
+			add_cache_stats("redis", key, generator_time=generation_time)
+			if field:
+				self.hset(key, field, val, shared=shared)
+			else:
+				self.set_value(key, val, user=user, expires_in_sec=expires_in_sec, shared=shared)
+
+			if expires_in_sec:
+				try:
+					generation_time_key = self.make_key(f"{key}::generation_time", user, shared)
+					pipeline = self.pipeline()
+					pipeline.setex(generation_time_key, expires_in_sec, round(generation_time / 1000000, 3))
+					if tag_keys := self.get_tag_keys(user=user, shared=shared):
+						self.add_to_tags(tag_keys, [generation_time_key], expires_in_sec, pipeline=pipeline)
+					pipeline.execute()
+				except redis.exceptions.ConnectionError:
+					pass
+
+		finally:
+			if acquired:
+				try:
+					lock.release()
+				except (redis.exceptions.LockError, redis.exceptions.ConnectionError):
+					# expired while generating
+					pass
 
 		return val
 
+	def get_values(self, keys, user=None, shared=False) -> dict:
+		"""Returns `{key: value}` for multiple keys, fetching the ones not in `frappe.local`
+		with a single MGET. Missing keys have `None` as value."""
+		keys = list(keys)
+		redis_keys = {key: self.make_key(key, user, shared) for key in keys}
+		values = {}
+		to_fetch = []
+
+		for key, redis_key in redis_keys.items():
+			if redis_key in frappe.local.cache:
+				values[key] = frappe.local.cache[redis_key]
+			else:
+				to_fetch.append(key)
+
+		if to_fetch:
+			try:
+				fetched = self.mget([redis_keys[key] for key in to_fetch])
+			except redis.exceptions.ConnectionError:
+				fetched = [None] * len(to_fetch)
+
+			for key, val in zip(to_fetch, fetched):
+				if val is not None:
+					val = loads(val)
+				values[key] = frappe.local.cache[redis_keys[key]] = val
+
+		return {key: values[key] for key in keys}
+
+	def set_values(self, mapping: dict, user=None, expires_in_sec=None, shared=False):
+		"""Sets multiple cache values with a single MSET, or with SETEX if they expire.
+
+		:param mapping: `{key: value}` to be cached
+		:param user: Prepends keys with User
+		:param expires_in_sec: Expire values in X seconds
+		"""
+		if not mapping:
+			return
+
+		tag_keys = self.get_tag_keys(user=user, shared=shared)
+		mapping = {self.make_key(key, user, shared): val for key, val in mapping.items()}
+
+		if not expires_in_sec:
+			frappe.local.cache.update(mapping)
+
+		if self.client_cache:
+			self.client_cache.invalidate(mapping)
+
+		try:
+			pipeline = self.pipeline(transaction=bool(tag_keys))
+			if expires_in_sec:
+				for key, val in mapping.items():
+					pipeline.setex(name=key, time=expires_in_sec, value=dumps(val))
+			else:
+				pipeline.mset({key: dumps(val) for key, val in mapping.items()})
+
+			if tag_keys:
+				self.add_to_tags(tag_keys, list(mapping), expires_in_sec, pipeline=pipeline)
+			pipeline.execute()
+
+		except redis.exceptions.ConnectionError:
+			return None
+
+	def delete_values(self, keys, user=None, shared=False):
+		"""Delete multiple values with a single DEL."""
+		self.delete_value(list(keys), user=user, shared=shared)
+
+	def get_memory_usage(self, limit=5) -> dict:
+		"""Returns memory used by the site's keys grouped by prefix, largest first.
+
+		:param limit: number of largest keys to list for each prefix
+		:return: `{prefix: {"keys": count, "memory": bytes, "largest": [(key, bytes), ...]}}`
+		"""
+		site_prefix = self.make_key("")
+		usage = {}
+		keys = self.scan_iter(match=site_prefix + b"*", count=1000)
+
+		while batch := list(islice(keys, 500)):
+			pipeline = self.pipeline(transaction=False)
+			for key in batch:
+				pipeline.memory_usage(key)
+
+			for key, size in zip(batch, pipeline.execute()):
+				if size is None:
+					# expired meanwhile
+					continue
+
+				key = key[len(site_prefix) :].decode(errors="replace")
+				group = usage.setdefault(get_key_prefix(key), {"keys": 0, "memory": 0, "largest": []})
+				group["keys"] += 1
+				group["memory"] += size
+
+				if len(group["largest"]) < limit:
+					heapq.heappush(group["largest"], (size, key))
+				elif limit:
+					heapq.heappushpop(group["largest"], (size, key))
+
+		for group in usage.values():
+			group["largest"] = [(key, size) for size, key in sorted(group["largest"], reverse=True)]
+
+		return dict(sorted(usage.items(), key=lambda item: item[1]["memory"], reverse=True))
+
 	def get_all(self, key):
 		ret = {}
 		for k in self.get_keys(key):
@@ -123,14 +655,19 @@ class RedisWrapper(redis.Redis):
 			return [k for k in list(frappe.local.cache) if regex.match(cstr(k))]
 
 	def delete_keys(self, key):
-		"""Delete keys with wildcard `*`."""
+		"""Delete keys with wildcard `*`.
+
+		This scans the whole keyspace, prefer tagging keys and `delete_tags`."""
 		self.delete_value(self.get_keys(key), make_keys=False)
 
 	def delete_key(self, *args, **kwargs):
 		self.delete_value(*args, **kwargs)
 
-	def delete_value(self, keys, user=None, make_keys=True, shared=False):
-		"""Delete value, list of values."""
+	def delete_value(self, keys, user=None, make_keys=True, shared=False, tags=None):
+		"""Delete value, list of values.
+
+		:param tags: Tags the keys were set with, to remove them from (see `set_value`)
+		"""
 		if not keys:
 			return
 
@@ -143,8 +680,18 @@ class RedisWrapper(redis.Redis):
 		for key in keys:
 			frappe.local.cache.pop(key, None)
 
+		if self.client_cache:
+			self.client_cache.invalidate(keys)
+
 		try:
-			self.delete(*keys)
+			if tags:
+				pipeline = self.pipeline(transaction=False)
+				pipeline.delete(*keys)
+				for tag in tags:
+					pipeline.srem(self.make_tag_key(tag, shared), *keys)
+				pipeline.execute()
+			else:
+				self.delete(*keys)
 		except redis.exceptions.ConnectionError:
 			pass
 
@@ -185,13 +732,36 @@ class RedisWrapper(redis.Redis):
 
 		# set in local
 		frappe.local.cache.setdefault(_name, {})[key] = value
+		if self.client_cache:
+			self.client_cache.invalidate((_name,))
 
 		# set in redis
 		try:
-			super().hset(_name, key, pickle.dumps(value), *args, **kwargs)
+			super().hset(_name, key, dumps(value), *args, **kwargs)
 		except redis.exceptions.ConnectionError:
 			pass
 
+	def hget_values(self, name, keys, shared=False) -> dict:
+		"""Returns `{key: value}` of multiple keys of hash `name`, fetching the ones not in
+		`frappe.local` with a single HMGET. Missing keys have `None` as value."""
+		_name = self.make_key(name, shared=shared)
+		local_cache = frappe.local.cache.setdefault(_name, {})
+
+		keys = [key for key in keys if key]
+		to_fetch = [key for key in dict.fromkeys(keys) if key not in local_cache]
+
+		if to_fetch:
+			try:
+				fetched = super().hmget(_name, to_fetch)
+			except redis.exceptions.ConnectionError:
+				fetched = [None] * len(to_fetch)
+
+			for key, value in zip(to_fetch, fetched):
+				if value is not None:
+					local_cache[key] = loads(value)
+
+		return {key: local_cache.get(key) for key in keys}
+
 	def hexists(self, name: str, key: str, shared: bool = False) -> bool:
 		if key is None:
 			return False
@@ -211,7 +781,7 @@ class RedisWrapper(redis.Redis):
 
 	def hgetall(self, name):
 		value = super().hgetall(self.make_key(name))
-		return {key: pickle.loads(value) for key, value in value.items()}
+		return {key: loads(value) for key, value in value.items()}
 
 	def hget(self, name, key, generator=None, shared=False):
 		_name = self.make_key(name, shared=shared)
@@ -222,30 +792,47 @@ class RedisWrapper(redis.Redis):
 			return None
 
 		if key in frappe.local.cache[_name]:
+			add_cache_stats("local", name, hits=1)
 			return frappe.local.cache[_name][key]
 
 		value = None
+		start = time.perf_counter()
 		try:
-			value = super().hget(_name, key)
+			if self.client_cache:
+				value = self.client_cache.get(_name, lambda: super(RedisWrapper, self).hget(_name, key), key)
+			else:
+				value = super().hget(_name, key)
 		except redis.exceptions.ConnectionError:
 			pass
 
+		add_cache_stats("local", name, misses=1)
+		add_cache_stats(
+			"redis",
+			name,
+			hits=int(value is not None),
+			misses=int(value is None),
+			time=get_elapsed_time(start),
+			bytes=len(value or b""),
+		)
+
 		if value is not None:
-			value = pickle.loads(value)
+			value = loads(value)
 			frappe.local.cache[_name][key] = value
 		elif generator:
-			value = generator()
-			self.hset(name, key, value, shared=shared)
+			value = self.generate_value(name, generator, shared=shared, field=key)
+			frappe.local.cache[_name][key] = value
 		return value
 
-	def hdel(self, name, key, shared=False):
+	def hdel(self, name, *keys, shared=False):
 		_name = self.make_key(name, shared=shared)
 
 		if _name in frappe.local.cache:
-			if key in frappe.local.cache[_name]:
-				del frappe.local.cache[_name][key]
+			for key in keys:
+				frappe.local.cache[_name].pop(key, None)
+		if self.client_cache:
+			self.client_cache.invalidate((_name,))
 		try:
-			super().hdel(_name, key)
+			super().hdel(_name, *keys)
 		except redis.exceptions.ConnectionError:
 			pass
 
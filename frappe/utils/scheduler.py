@@ -11,15 +11,34 @@ Events:
 # imports - standard imports
 import os
 import random
+import socket
 import time
+import zlib
+from datetime import datetime
 from typing import NoReturn
 
+# imports - third party imports
+from pytz import timezone
+
 # imports - module imports
 import frappe
-from frappe.utils import cint, get_datetime, get_sites, now_datetime
-from frappe.utils.background_jobs import set_niceness
+from frappe.utils import (
+	cint,
+	get_bench_id,
+	get_datetime,
+	get_sites,
+	get_system_timezone,
+	now_datetime,
+)
+from frappe.utils.background_jobs import get_redis_conn, set_niceness
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Sorted set of scheduled job types by their next run, so that ticks only look at due ones
+NEXT_RUN_KEY = "scheduler-next-run"
+# Seconds after which the next run heap is rebuilt from the database, in case it missed a change
+NEXT_RUN_TTL = 24 * 60 * 60
+# Scheduler processes that haven't ticked for these many ticks lose their share of sites
+SCHEDULER_MEMBER_TIMEOUT_TICKS = 3
 
 
 def cprint(*args, **kwargs):
@@ -33,18 +52,25 @@ def cprint(*args, **kwargs):
 
 def start_scheduler() -> NoReturn:
 	"""Run enqueue_events_for_all_sites based on scheduler tick.
-	Specify scheduler_interval in seconds in common_site_config.json"""
+	Specify scheduler_interval in seconds in common_site_config.json
+
+	Several schedulers can run on a bench, sites are split between the running ones."""
 
 	tick = cint(frappe.get_conf().scheduler_tick_interval) or 60
+	scheduler_id = f"{socket.gethostname()}.{os.getpid()}"
 	set_niceness()
 
 	while True:
 		time.sleep(tick)
-		enqueue_events_for_all_sites()
+		enqueue_events_for_all_sites(scheduler_id=scheduler_id, tick=tick)
 
 
-def enqueue_events_for_all_sites() -> None:
-	"""Loop through sites and enqueue events that are not already queued"""
+def enqueue_events_for_all_sites(scheduler_id: str | None = None, tick: int = 60) -> None:
+	"""Loop through sites and enqueue events that are not already queued
+
+	:param scheduler_id: Only handle this scheduler's share of sites, and skip sites another
+	        scheduler has handled in the last `tick` seconds.
+	"""
 
 	if os.path.exists(os.path.join(".", ".restarting")):
 		# Don't add task to queue if webserver is in restart mode
@@ -52,23 +78,52 @@ def enqueue_events_for_all_sites() -> None:
 
 	with frappe.init_site():
 		sites = get_sites()
+		if scheduler_id:
+			conn = get_redis_conn()
+			lease_prefix = f"{get_bench_id()}:scheduler-lease:"
+			sites = get_scheduler_shard(conn, scheduler_id, sites, tick)
 
 	# Sites are sorted in alphabetical order, shuffle to randomize priorities
 	random.shuffle(sites)
 
 	for site in sites:
+		# guards against another scheduler that has a different idea of who the schedulers are
+		if scheduler_id and not conn.set(f"{lease_prefix}{site}", scheduler_id, nx=True, ex=tick):
+			continue
+
 		try:
 			enqueue_events_for_site(site=site)
 		except Exception:
 			frappe.logger("scheduler").debug(f"Failed to enqueue events for site: {site}", exc_info=True)
 
 
+def get_scheduler_shard(conn, scheduler_id: str, sites: list[str], tick: int) -> list[str]:
+	"""Register the scheduler as alive and return the sites it should handle.
+
+	Sites are spread over live schedulers by hash, schedulers that stopped ticking are dropped
+	after a few ticks and their sites move to the others."""
+	key = f"{get_bench_id()}:schedulers"
+	now = time.time()
+	pipeline = conn.pipeline()
+	pipeline.zadd(key, {scheduler_id: now})
+	pipeline.zremrangebyscore(key, "-inf", now - tick * SCHEDULER_MEMBER_TIMEOUT_TICKS)
+	pipeline.zrange(key, 0, -1)
+	schedulers = [frappe.safe_decode(s) for s in pipeline.execute()[-1]]
+
+	index, count = schedulers.index(scheduler_id), len(schedulers)
+	return [site for site in sites if zlib.crc32(site.encode()) % count == index]
+
+
 def enqueue_events_for_site(site: str) -> None:
 	def log_exc():
 		frappe.logger("scheduler").error(f"Exception in Enqueue Events for Site {site}", exc_info=True)
 
 	try:
 		frappe.init(site=site)
+		# nothing to do, don't bother connecting to the database (or reading its timezone)
+		if get_due_job_types(time.time()) == []:
+			return
+
 		frappe.connect()
 		if is_scheduler_inactive():
 			return
@@ -77,7 +132,7 @@ def enqueue_events_for_site(site: str) -> None:
 
 		frappe.logger("scheduler").debug(f"Queued events for site {site}")
 	except Exception as e:
-		if frappe.db.is_access_denied(e):
+		if frappe.db and frappe.db.is_access_denied(e):
 			frappe.logger("scheduler").debug(f"Access denied for site {site}")
 		log_exc()
 
@@ -86,14 +141,73 @@ def enqueue_events_for_site(site: str) -> None:
 
 
 def enqueue_events(site: str) -> list[str] | None:
-	if schedule_jobs_based_on_activity():
-		enqueued_jobs = []
-		for job_type in frappe.get_all("Scheduled Job Type", filters={"stopped": 0}, fields="*"):
-			job_type = frappe.get_doc(doctype="Scheduled Job Type", **job_type)
-			if job_type.enqueue():
-				enqueued_jobs.append(job_type.method)
-
-		return enqueued_jobs
+	if not schedule_jobs_based_on_activity():
+		return
+
+	now = now_datetime()
+	filters = {"stopped": 0}
+	due = get_due_job_types(time.time())
+	if due == []:
+		return []
+	if due is not None:
+		filters["name"] = ("in", due)
+
+	enqueued_jobs = []
+	next_runs = {}
+	for job_type in frappe.get_all("Scheduled Job Type", filters=filters, fields="*"):
+		job_type = frappe.get_doc(doctype="Scheduled Job Type", **job_type)
+		if job_type.enqueue():
+			enqueued_jobs.append(job_type.method)
+			next_runs[job_type.name] = job_type.get_next_run(now)
+		else:
+			# not due, or due but still queued or running and looked at again on the next tick
+			next_runs[job_type.name] = job_type.get_next_execution()
+
+	update_next_runs(next_runs, removed=set(due or ()) - set(next_runs), rebuild=due is None)
+	return enqueued_jobs
+
+
+def get_due_job_types(now: float) -> list[str] | None:
+	"""Returns names of the scheduled job types due at the UTC timestamp `now`, or None if the
+	site's next run heap has to be built first."""
+	key = frappe.cache.make_key(NEXT_RUN_KEY)
+	pipeline = frappe.cache.pipeline()
+	pipeline.exists(key)
+	pipeline.zrangebyscore(key, "-inf", now)
+	exists, due = pipeline.execute()
+	if exists:
+		return [frappe.safe_decode(name) for name in due]
+
+
+def update_next_runs(
+	next_runs: dict[str, datetime], removed=(), rebuild=False, existing_only=False
+) -> None:
+	"""Set the next runs of job types in the site's heap.
+
+	:param existing_only: Only move job types that are in the heap, which isn't built if missing.
+	"""
+	key = frappe.cache.make_key(NEXT_RUN_KEY)
+	pipeline = frappe.cache.pipeline()
+	if rebuild:
+		pipeline.delete(key)
+	if removed:
+		pipeline.zrem(key, *removed)
+	if next_runs:
+		time_zone = timezone(get_system_timezone())
+		pipeline.zadd(
+			key,
+			# next runs are in system time, scores are UTC so that they can be read without it
+			{name: time_zone.localize(next_run).timestamp() for name, next_run in next_runs.items()},
+			xx=existing_only,
+		)
+	if rebuild:
+		pipeline.expire(key, NEXT_RUN_TTL)
+	pipeline.execute()
+
+
+def reset_next_runs() -> None:
+	"""Rebuild the site's next run heap on the next tick, to be called when job types change."""
+	frappe.cache.delete_value(NEXT_RUN_KEY)
 
 
 def is_scheduler_inactive(verbose=True) -> bool:
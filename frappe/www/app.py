@@ -24,7 +24,9 @@ def get_context(context):
 
 	hooks = frappe.get_hooks()
 	try:
-		boot = frappe.sessions.get()
+		boot = frappe.sessions.get(
+			cached_sections=None if context.get("for_mobile") else get_cached_boot_sections()
+		)
 	except Exception as e:
 		raise frappe.SessionBootFailed from e
 
@@ -68,3 +70,11 @@ def get_context(context):
 	)
 
 	return context
+
+
+def get_cached_boot_sections():
+	"""Return `{section: hash}` of the boot sections cached by the browser.
+
+	Set by the desk in the `boot_sections` cookie as `section:hash` pairs separated by dots."""
+	cookie = frappe.request.cookies.get("boot_sections") if frappe.request else None
+	return dict(pair.split(":", 1) for pair in (cookie or "").split(".") if ":" in pair)
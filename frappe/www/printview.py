@@ -11,6 +11,7 @@ import frappe
 from frappe import _, get_module_path
 from frappe.core.doctype.access_log.access_log import make_access_log
 from frappe.core.doctype.document_share_key.document_share_key import is_expired
+from frappe.desk.form.load import get_link_titles
 from frappe.utils import cint, escape_html, strip_html
 from frappe.utils.jinja_globals import is_rtl
 
@@ -224,44 +225,7 @@ def set_link_titles(doc):
 	if not doc.get("__link_titles"):
 		setattr(doc, "__link_titles", {})
 
-	meta = frappe.get_meta(doc.doctype)
-	set_title_values_for_link_and_dynamic_link_fields(meta, doc)
-	set_title_values_for_table_and_multiselect_fields(meta, doc)
-
-
-def set_title_values_for_link_and_dynamic_link_fields(meta, doc, parent_doc=None):
-	if parent_doc and not parent_doc.get("__link_titles"):
-		setattr(parent_doc, "__link_titles", {})
-	elif doc and not doc.get("__link_titles"):
-		setattr(doc, "__link_titles", {})
-
-	for field in meta.get_link_fields() + meta.get_dynamic_link_fields():
-		if not doc.get(field.fieldname):
-			continue
-
-		# If link field, then get doctype from options
-		# If dynamic link field, then get doctype from dependent field
-		doctype = field.options if field.fieldtype == "Link" else doc.get(field.options)
-
-		meta = frappe.get_meta(doctype)
-		if not meta or not (meta.title_field and meta.show_title_field_in_link):
-			continue
-
-		link_title = frappe.get_cached_value(doctype, doc.get(field.fieldname), meta.title_field)
-		if parent_doc:
-			parent_doc.__link_titles[f"{doctype}::{doc.get(field.fieldname)}"] = link_title
-		elif doc:
-			doc.__link_titles[f"{doctype}::{doc.get(field.fieldname)}"] = link_title
-
-
-def set_title_values_for_table_and_multiselect_fields(meta, doc):
-	for field in meta.get_table_fields():
-		if not doc.get(field.fieldname):
-			continue
-
-		_meta = frappe.get_meta(field.options)
-		for value in doc.get(field.fieldname):
-			set_title_values_for_link_and_dynamic_link_fields(_meta, value, doc)
+	doc.__link_titles.update(get_link_titles(doc))
 
 
 def convert_markdown(doc: "Document"):